@@ -5,29 +5,107 @@ helper functions to run asynchronous text analysis and aggregate the outputs
 for reporting.
 """
 
+import numpy as np
 import pandas as pd
 import asyncio
-from typing import List, Literal
+import contextvars
+import hashlib
+import json
+import random
+import re
+import time
+import unicodedata
+from collections import Counter
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Mapping,
+    TypeVar,
+)
 from functools import lru_cache
 
-import openai
-
 from pydantic import BaseModel, Field
-import instructor
-from openai import AsyncOpenAI
-import spacy
 
+from checkpoint import CheckpointStore, cell_hash
+from concurrency import AdaptiveConcurrencyLimiter, run_worker_pool
 from config import settings
-from wc_tokenizer import tokenize_texts
+from metrics import get_metrics
+from near_duplicates import cluster_near_duplicates
+from prompt_tokens import get_tokenizer, pretokenize_texts, tokenize_for_prompt
+from rate_limit import TokenBucketRateLimiter
+from result_cache import ResultCache, make_cache_key
+from wc_tokenizer import frequencies_by_slice, get_sudachi
+
+# InstructorでラップしたOpenAIクライアント。起動を速くするため、
+# openai/instructor の読み込みと生成は初回の API 呼び出しまで遅らせる
+aclient = None
+
+
+def get_client():
+    """Return the shared instructor-patched ``AsyncOpenAI`` client.
+
+    The client (and the ``openai``/``instructor`` packages) are loaded on
+    first use.
+    """
+    global aclient
+    if aclient is None:
+        import instructor
+        import openai
+        from openai import AsyncOpenAI
+
+        # Read API key from .env or environment variables
+        openai.api_key = settings.OPENAI_API_KEY
+        # 429 などの再送は _call_api がリミッターを通して行うため、クライアントの再送は無効にする。
+        # 全レスポンスのレート制限ヘッダーはフックでリミッターに反映する
+        http_client = openai.DefaultAsyncHttpxClient(
+            event_hooks={"response": [_observe_response]}
+        )
+        aclient = instructor.from_openai(
+            AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY, max_retries=0, http_client=http_client
+            ),
+            mode=instructor.Mode.MD_JSON,
+        )
+        # 検証エラーによる再送を数えるため、送信のたびに試行回数を増やす
+        aclient.on("completion:kwargs", _count_attempt)
+    return aclient
+
+
+def warm_up(mode: str = "B") -> None:
+    """Load the API client, the spaCy pipeline and the Sudachi dictionary.
 
-# Read API key from .env or environment variables
-openai.api_key = settings.OPENAI_API_KEY
+    Meant to run in a background thread while the user is still choosing a
+    file, so the first analysis does not pay for these imports.
+    """
+    get_client()
+    get_tokenizer(mode)
+    get_sudachi()
+
+# 分析に使用するモデル名
+ANALYSIS_MODEL = "gpt-4o-mini"
+# API呼び出しに失敗した行に設定されるトピック
+ERROR_TOPIC = "分析エラー"
+
+# analyze_dataframe の実行中に API 呼び出しの結果を通知するリミッター
+_active_limiter: contextvars.ContextVar[AdaptiveConcurrencyLimiter | None] = (
+    contextvars.ContextVar("active_limiter", default=None)
+)
+
+# エンドポイントごとにプロセス全体で共有する RPM/TPM リミッター
+_rate_limiters: dict[str, TokenBucketRateLimiter] = {}
 
-# InstructorでOpenAIクライアントを初期化
-aclient = instructor.from_openai(
-    AsyncOpenAI(api_key=settings.OPENAI_API_KEY), mode=instructor.Mode.MD_JSON
+# 実行中の API 呼び出しの試行回数（instructor のフックから更新される）
+_call_attempts: contextvars.ContextVar[list[int] | None] = contextvars.ContextVar(
+    "call_attempts", default=None
 )
 
+T = TypeVar("T")
+
 
 # --- データモデル定義 ---
 class SurveyResponseAnalysis(BaseModel):
@@ -107,6 +185,29 @@ class ComprehensiveAnalysisResult(BaseModel):
     emotion_scores: EmotionScores
 
 
+class FusedAnalysis(BaseModel):
+    """Survey insight and emotion scores returned by a single completion."""
+
+    survey_analysis: SurveyResponseAnalysis
+    emotion_scores: EmotionScores
+
+
+class BatchItemAnalysis(BaseModel):
+    """Analysis of one response inside a multi-response completion."""
+
+    id: str = Field(description="入力で指定された回答ID。変更せずにそのまま返します。")
+    survey_analysis: SurveyResponseAnalysis
+    emotion_scores: EmotionScores
+
+
+class BatchAnalysis(BaseModel):
+    """Analyses of every response contained in a batched request."""
+
+    items: List[BatchItemAnalysis] = Field(
+        description="入力された全ての回答に対する分析結果。回答ごとに1件ずつ返します。"
+    )
+
+
 class ReportCommentary(BaseModel):
     """LLMによって生成されたレポートの解説文。"""
 
@@ -124,26 +225,355 @@ class ReportCommentary(BaseModel):
     )
 
 
-# --- spaCy日本語トークナイザ ---
-@lru_cache(maxsize=3)
-def get_tokenizer(mode: str = "B") -> spacy.Language:
-    """Return a spaCy pipeline with SudachiPy tokenizer.
+# --- API呼び出し ---
+# バッチ1件あたりに見込む出力トークン数（構造化結果と感情の理由）
+BATCH_OUTPUT_TOKENS_PER_ITEM = 200
+# 応答モデルごとに見込む出力トークン数（バッチは analyze_batch が件数分を指定する）
+COMPLETION_TOKEN_ESTIMATES: dict[type[BaseModel], int] = {
+    SurveyResponseAnalysis: 150,
+    EmotionScores: 150,
+    FusedAnalysis: 300,
+    BatchAnalysis: BATCH_OUTPUT_TOKENS_PER_ITEM,
+    ReportCommentary: 800,
+}
+
+
+# 再送の待ち時間（秒）の初期値と上限。retry-after ヘッダーがあればそちらを使う
+RETRY_INITIAL_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+
+
+def _exception_chain(exc: BaseException | None) -> Iterator[BaseException]:
+    """Yield ``exc`` and the exceptions it wraps (instructor wraps API errors)."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        exc = exc.__cause__ or exc.__context__
+
+
+def _is_rate_limited(exc: BaseException) -> bool:
+    """Return True if ``exc`` (or an exception it wraps) is an HTTP 429."""
+    import openai
+
+    return any(
+        isinstance(e, openai.RateLimitError) or getattr(e, "status_code", None) == 429
+        for e in _exception_chain(exc)
+    )
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Return True for errors the openai client would have retried itself.
+
+    These are rate limits, timeouts, conflicts, server errors and connection
+    errors.
+    """
+    import openai
+
+    for e in _exception_chain(exc):
+        if isinstance(e, openai.APIConnectionError):
+            return True
+        status = getattr(e, "status_code", None)
+        if status in (408, 409, 429) or (status is not None and status >= 500):
+            return True
+    return False
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    """Return the ``retry-after`` header of a rate-limit error in seconds."""
+    for e in _exception_chain(exc):
+        headers = getattr(getattr(e, "response", None), "headers", None) or {}
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _retry_delay(attempt: int, retry_after: float | None) -> float:
+    """Return seconds to wait before resending after failed ``attempt``."""
+    if retry_after is not None:
+        return retry_after
+    # openai クライアントと同じく指数的に延ばし、同時に失敗した呼び出しの再送をずらす
+    delay = min(RETRY_INITIAL_DELAY * 2**attempt, RETRY_MAX_DELAY)
+    return delay * random.uniform(0.75, 1.0)
+
+
+def _parse_reset(value: str | None) -> float | None:
+    """Return seconds of an ``x-ratelimit-reset-*`` header such as ``"6m0s"``."""
+    if not value:
+        return None
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    return sum(float(number) * units[unit] for number, unit in parts)
+
+
+def _header_int(headers, name: str) -> int | None:
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+async def _observe_response(response) -> None:
+    """Feed the rate-limit headers of every API response to the limiters.
+
+    Installed as an httpx response hook, so it also sees 429 responses and
+    requests re-sent by instructor. The remaining quota lowers the RPM/TPM
+    buckets, and once it runs out, new requests are held back until the
+    reported reset.
+    """
+    headers = response.headers
+    endpoint = "moderation" if response.request.url.path.endswith("/moderations") else "chat"
+    remaining_requests = _header_int(headers, "x-ratelimit-remaining-requests")
+    remaining_tokens = _header_int(headers, "x-ratelimit-remaining-tokens")
+    get_rate_limiter(endpoint).observe_remaining(remaining_requests, remaining_tokens)
+    limiter = _active_limiter.get()
+    if limiter is None:
+        return
+    resets = []
+    if remaining_requests == 0:
+        resets.append(_parse_reset(headers.get("x-ratelimit-reset-requests")))
+    if remaining_tokens == 0:
+        resets.append(_parse_reset(headers.get("x-ratelimit-reset-tokens")))
+    reset = max((r for r in resets if r), default=None)
+    if reset:
+        limiter.pause(reset)
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of model tokens in ``text``.
+
+    Japanese characters are counted as one token each and other characters as
+    a quarter token, which is close to the cl100k/o200k encodings for survey
+    answers and errs on the high side.
+    """
+    if not isinstance(text, str):
+        return 0
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def measure_prompt_inflation(texts: Iterable, mode: str = "B") -> dict:
+    """Measure how much space-joined pre-tokenization inflates prompt tokens.
+
+    Token counts use ``tiktoken`` with the encoding of ``ANALYSIS_MODEL`` when
+    it is installed and :func:`estimate_tokens` otherwise.
 
     Args:
-        mode: SudachiPy split mode ("A", "B", or "C").
+        texts: Responses to measure. Empty and non-text values are skipped.
+        mode: SudachiPy split mode used for pre-tokenization.
 
     Returns:
-        spaCy Language object with the specified tokenizer.
+        Dictionary with ``raw_tokens``, ``tokenized_tokens``, the ratio
+        ``inflation`` and the ``counter`` used.
     """
-    config = {
-        "nlp": {
-            "tokenizer": {
-                "@tokenizers": "spacy.ja.JapaneseTokenizer",
-                "split_mode": mode,
-            }
-        }
+    texts = [t for t in texts if isinstance(t, str) and t.strip()]
+    try:
+        import tiktoken
+    except ImportError:  # pragma: no cover - optional dependency
+        tiktoken = None
+    if tiktoken is not None:
+        encoding = tiktoken.encoding_for_model(ANALYSIS_MODEL)
+        count, counter = (lambda t: len(encoding.encode(t))), "tiktoken"
+    else:
+        count, counter = estimate_tokens, "estimate"
+    raw = sum(count(t) for t in texts)
+    tokenized = sum(count(t) for t in pretokenize_texts(texts, mode))
+    return {
+        "raw_tokens": raw,
+        "tokenized_tokens": tokenized,
+        "inflation": tokenized / raw if raw else 1.0,
+        "counter": counter,
     }
-    return spacy.blank("ja", config=config)
+
+
+@lru_cache(maxsize=32)
+def schema_tokens(response_model: type[BaseModel]) -> int:
+    """Return the estimated tokens of the JSON schema of ``response_model``."""
+    # スキーマは応答モデルごとに不変なので、リクエストごとに生成し直さない
+    return estimate_tokens(json.dumps(response_model.model_json_schema()))
+
+
+def estimate_request_tokens(
+    messages: list[dict],
+    response_model: type[BaseModel] | None = None,
+    completion_tokens: int | None = None,
+) -> int:
+    """Estimate prompt plus completion tokens of a chat request.
+
+    Args:
+        messages: Chat messages to send.
+        response_model: Pydantic model of the structured response. Its JSON
+            schema is included in the prompt by instructor.
+        completion_tokens: Expected completion size. Defaults to the entry in
+            ``COMPLETION_TOKEN_ESTIMATES`` for ``response_model``.
+    """
+    prompt = sum(estimate_tokens(m["content"]) + 4 for m in messages)
+    if response_model is not None:
+        prompt += schema_tokens(response_model)
+    if completion_tokens is None:
+        completion_tokens = COMPLETION_TOKEN_ESTIMATES.get(response_model, 300)
+    return prompt + completion_tokens
+
+
+def get_rate_limiter(endpoint: str = "chat") -> TokenBucketRateLimiter:
+    """Return the process-wide RPM/TPM limiter for an API endpoint.
+
+    Args:
+        endpoint: ``"chat"`` for chat completions or ``"moderation"``.
+    """
+    if endpoint not in _rate_limiters:
+        if endpoint == "moderation":
+            _rate_limiters[endpoint] = TokenBucketRateLimiter(
+                rpm=settings.MODERATION_RPM_LIMIT
+            )
+        else:
+            _rate_limiters[endpoint] = TokenBucketRateLimiter(
+                rpm=settings.RPM_LIMIT, tpm=settings.TPM_LIMIT
+            )
+    return _rate_limiters[endpoint]
+
+
+def _usage(result):
+    """Return the ``usage`` of the raw response of ``result``, if any."""
+    return getattr(getattr(result, "_raw_response", None), "usage", None)
+
+
+def _usage_tokens(result) -> int | None:
+    """Return total tokens reported in the raw response of ``result``."""
+    return getattr(_usage(result), "total_tokens", None)
+
+
+def _count_attempt(*args, **kwargs) -> None:
+    attempts = _call_attempts.get()
+    if attempts is not None:
+        attempts[0] += 1
+
+
+def _retries(attempts: list[int], resend: int) -> int:
+    # instructor による再質問の回数に、_call_api 自身の再送を1回分加える
+    return max(0, attempts[0] - 1) + (1 if resend else 0)
+
+
+def _failure_reason(exc: BaseException) -> str:
+    """Return a short label for the cause of a failed request."""
+    if _is_rate_limited(exc):
+        return "rate_limited"
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return f"http_{status}"
+    return type(exc).__name__
+
+
+# 応答モデルごとの API 呼び出しの種類（計測結果の分類に使う）
+CALL_TYPES: dict[type[BaseModel], str] = {
+    SurveyResponseAnalysis: "survey",
+    EmotionScores: "emotion",
+    FusedAnalysis: "fused",
+    BatchAnalysis: "batch",
+    ReportCommentary: "commentary",
+}
+
+
+async def _call_api(
+    make_request: Callable[[], Awaitable[T]],
+    endpoint: str = "chat",
+    tokens: int = 0,
+    call_type: str | None = None,
+) -> T:
+    """Send an OpenAI request within the rate limits and report its outcome.
+
+    Rate limits, server and connection errors are re-sent up to
+    ``settings.API_MAX_RETRIES`` times, each attempt drawing from the RPM/TPM
+    limiter again and reporting its outcome to the active concurrency
+    limiter. The latency, rate limiter wait, token usage, retries and failure
+    reason of every attempt are recorded in :func:`metrics.get_metrics`.
+
+    Args:
+        make_request: Zero-argument callable returning the request awaitable.
+            It is only invoked once the rate limiter grants capacity.
+        endpoint: Rate limiter bucket to draw from.
+        tokens: Estimated prompt plus completion tokens of the request.
+        call_type: Kind of request for the metrics. Defaults to ``endpoint``.
+    """
+    rate_limiter = get_rate_limiter(endpoint)
+    limiter = _active_limiter.get()
+    attempt = 0
+    while True:
+        wait_start = time.perf_counter()
+        await rate_limiter.acquire(tokens)
+        start = time.perf_counter()
+        attempts = [0]
+        attempts_token = _call_attempts.set(attempts)
+        try:
+            result = await make_request()
+        except Exception as e:
+            retry_after = _retry_after(e)
+            if limiter is not None:
+                limiter.record_failure(
+                    rate_limited=_is_rate_limited(e), retry_after=retry_after
+                )
+            get_metrics().record_call(
+                call_type or endpoint,
+                time.perf_counter() - start,
+                rate_limit_wait=start - wait_start,
+                retries=_retries(attempts, attempt),
+                failure=_failure_reason(e),
+            )
+            if attempt >= settings.API_MAX_RETRIES or not _is_retryable(e):
+                raise
+        else:
+            break
+        finally:
+            _call_attempts.reset(attempts_token)
+        await asyncio.sleep(_retry_delay(attempt, retry_after))
+        attempt += 1
+    latency = time.perf_counter() - start
+    if limiter is not None:
+        limiter.record_success(latency)
+    usage = _usage(result)
+    get_metrics().record_call(
+        call_type or endpoint,
+        latency,
+        rate_limit_wait=start - wait_start,
+        prompt_tokens=getattr(usage, "prompt_tokens", None) or 0,
+        completion_tokens=getattr(usage, "completion_tokens", None) or 0,
+        retries=_retries(attempts, attempt),
+    )
+    actual = _usage_tokens(result)
+    if actual is not None:
+        rate_limiter.reconcile(tokens, actual)
+    return result
+
+
+async def _chat(
+    response_model: type[T],
+    messages: list[dict],
+    completion_tokens: int | None = None,
+) -> T:
+    """Request a structured chat completion validated as ``response_model``."""
+    tokens = estimate_request_tokens(messages, response_model, completion_tokens)
+    return await _call_api(
+        lambda: get_client().chat.completions.create(
+            model=ANALYSIS_MODEL,
+            response_model=response_model,
+            messages=messages,
+            max_retries=2,
+        ),
+        "chat",
+        tokens,
+        CALL_TYPES.get(response_model, response_model.__name__),
+    )
+
+
+async def _moderate(inputs: str | list[str]):
+    """Send a moderation request for one text or a list of texts."""
+    return await _call_api(
+        lambda: get_client().moderations.create(input=inputs), "moderation"
+    )
 
 
 async def generate_report_commentary(summary_data: dict) -> ReportCommentary:
@@ -160,17 +590,15 @@ async def generate_report_commentary(summary_data: dict) -> ReportCommentary:
     """
 
     try:
-        commentary = await aclient.chat.completions.create(
-            model="gpt-4o-mini",
-            response_model=ReportCommentary,
-            messages=[
+        commentary = await _chat(
+            ReportCommentary,
+            [
                 {
                     "role": "system",
                     "content": "あなたは、データからインサイトを抽出し、分かりやすく解説する優秀なマーケティングアナリストです。",
                 },
                 {"role": "user", "content": context},
             ],
-            max_retries=2,
         )
         return commentary
     except Exception as e:
@@ -183,86 +611,7 @@ async def generate_report_commentary(summary_data: dict) -> ReportCommentary:
         )
 
 
-# --- コア分析関数 ---
-async def analyze_single_text(
-    text: str, mode: str = "B"
-) -> ComprehensiveAnalysisResult:
-    """Analyze a single text asynchronously.
-
-    Args:
-        text: Text to analyze.
-        mode: SudachiPy split mode to use for tokenization.
-
-    Returns:
-        ComprehensiveAnalysisResult containing structured analysis data.
-    """
-    if not isinstance(text, str) or not text.strip():
-        # 空または無効なテキストの場合、デフォルト値を返す
-        default_survey_analysis = SurveyResponseAnalysis(
-            sentiment="neutral",
-            key_topics=["無回答"],
-            verbatim_quote="N/A",
-            actionable_insight=False,
-        )
-        default_moderation_result = ModerationResult(
-            flagged=False,
-            categories=ModerationCategories(
-                hate=False,
-                hate_threatening=False,
-                self_harm=False,
-                sexual=False,
-                sexual_minors=False,
-                violence=False,
-                violence_graphic=False,
-            ),
-            category_scores=ModerationScores(
-                hate=0.0,
-                hate_threatening=0.0,
-                self_harm=0.0,
-                sexual=0.0,
-                sexual_minors=0.0,
-                violence=0.0,
-                violence_graphic=0.0,
-            ),
-        )
-        default_emotion_scores = EmotionScores(
-            joy=0.0,
-            sadness=0.0,
-            fear=0.0,
-            surprise=0.0,
-            anger=0.0,
-            disgust=0.0,
-            reason="N/A",
-        )
-        return ComprehensiveAnalysisResult(
-            survey_analysis=default_survey_analysis,
-            moderation_result=default_moderation_result,
-            emotion_scores=default_emotion_scores,
-        )
-
-    nlp = get_tokenizer(mode)
-    doc = nlp(text)
-    tokenized_text = " ".join([token.text for token in doc])
-
-    survey_analysis_task = aclient.chat.completions.create(
-        model="gpt-4o-mini",
-        response_model=SurveyResponseAnalysis,
-        messages=[
-            {
-                "role": "system",
-                "content": "あなたは優秀なマーケティングアナリストです。提供されたアンケートの回答を分析し、指定された形式で構造化してください。",
-            },
-            {"role": "user", "content": tokenized_text},
-        ],
-        max_retries=2,
-    )
-
-    moderation_task = aclient.moderations.create(input=text)
-
-    emotion_prompt = f"""
-あなたは感情分析の専門家です、文脈に注目して一次感情を抽出し、0から5の範囲で評価してください。
-
-【評価基準】
+EMOTION_CRITERIA = """【評価基準】
 0：感情が全く感じられない
 1：ごくわずかに感情が感じられる
 2：感情が弱めだが感じられる
@@ -275,7 +624,15 @@ async def analyze_single_text(
 2. 文脈性：表現の背景にある状況や文脈を十分に考慮する。
 3. 総合性：言語表現と非言語的要素を総合的に判断する。
 4. 直接性：直接的な表現と間接的な表現の強度を適切に比較評価する。
-5. 文化考慮：日本語特有の遠回しな表現や皮肉、婉曲表現の文化的背景を考慮する。
+5. 文化考慮：日本語特有の遠回しな表現や皮肉、婉曲表現の文化的背景を考慮する。"""
+
+
+def build_emotion_prompt(text: str) -> str:
+    """Return the user prompt for the emotion scoring request."""
+    return f"""
+あなたは感情分析の専門家です、文脈に注目して一次感情を抽出し、0から5の範囲で評価してください。
+
+{EMOTION_CRITERIA}
 
 分析対象の文章:
 {text}
@@ -290,155 +647,1190 @@ async def analyze_single_text(
 - 嫌悪: {{disgust}}
 感情全体の理由: {{reason}}
 """
-    emotion_task = aclient.chat.completions.create(
-        model="gpt-4o-mini",
-        response_model=EmotionScores,
-        messages=[
-            {"role": "system", "content": "あなたは感情分析の専門家です。"},
-            {"role": "user", "content": emotion_prompt},
-        ],
-        max_retries=2,
+
+
+def build_fused_prompt(text: str) -> str:
+    """Return the user prompt requesting survey and emotion analysis at once."""
+    return f"""
+以下のアンケート回答について、次の2つの分析を同時に行ってください。
+
+1. survey_analysis: 回答のセンチメント、主要トピック、代表的な一文、改善提案の有無を構造化してください。
+2. emotion_scores: 文脈に注目して一次感情を抽出し、0から5の範囲で評価し、感情全体の理由を添えてください。
+
+{EMOTION_CRITERIA}
+
+分析対象の文章:
+{text}
+"""
+
+
+def build_batch_prompt(items: list[tuple[int, str]]) -> str:
+    """Return the user prompt analyzing several responses keyed by row ID."""
+    payload = json.dumps(
+        [{"id": str(idx), "text": text} for idx, text in items],
+        ensure_ascii=False,
     )
+    return f"""
+以下はJSON形式のアンケート回答リストです。各回答について、次の2つの分析を行ってください。
 
-    try:
-        survey_analysis, moderation_response, emotion_scores = await asyncio.gather(
-            survey_analysis_task, moderation_task, emotion_task
+1. survey_analysis: 回答のセンチメント、主要トピック、代表的な一文、改善提案の有無を構造化してください。
+2. emotion_scores: 文脈に注目して一次感情を抽出し、0から5の範囲で評価し、感情全体の理由を添えてください。
+
+結果は items に回答ごとに1件ずつ格納し、id には入力の id をそのまま設定してください。
+回答を省略したり、複数の回答をまとめたりしないでください。
+
+{EMOTION_CRITERIA}
+
+回答リスト:
+{payload}
+"""
+
+
+SURVEY_SYSTEM_PROMPT = "あなたは優秀なマーケティングアナリストです。提供されたアンケートの回答を分析し、指定された形式で構造化してください。"
+EMOTION_SYSTEM_PROMPT = "あなたは感情分析の専門家です。"
+FUSED_SYSTEM_PROMPT = "あなたは優秀なマーケティングアナリストであり、感情分析の専門家です。提供されたアンケートの回答を分析し、指定された形式で構造化してください。"
+
+
+def build_batch_messages(items: list[tuple[int, str]]) -> list[dict]:
+    """Return chat messages for a multi-response batch request."""
+    return [
+        {"role": "system", "content": FUSED_SYSTEM_PROMPT},
+        {"role": "user", "content": build_batch_prompt(items)},
+    ]
+
+
+def build_survey_messages(tokenized_text: str) -> list[dict]:
+    """Return chat messages for the survey analysis request."""
+    return [
+        {"role": "system", "content": SURVEY_SYSTEM_PROMPT},
+        {"role": "user", "content": tokenized_text},
+    ]
+
+
+def build_emotion_messages(text: str) -> list[dict]:
+    """Return chat messages for the emotion scoring request."""
+    return [
+        {"role": "system", "content": EMOTION_SYSTEM_PROMPT},
+        {"role": "user", "content": build_emotion_prompt(text)},
+    ]
+
+
+def build_fused_messages(text: str) -> list[dict]:
+    """Return chat messages for the fused survey and emotion request."""
+    return [
+        {"role": "system", "content": FUSED_SYSTEM_PROMPT},
+        {"role": "user", "content": build_fused_prompt(text)},
+    ]
+
+
+# --- デフォルト結果 ---
+def _build_default_result(
+    key_topic: str, message: str, flagged: bool
+) -> ComprehensiveAnalysisResult:
+    default_survey_analysis = SurveyResponseAnalysis(
+        sentiment="neutral",
+        key_topics=[key_topic],
+        verbatim_quote=message,
+        actionable_insight=False,
+    )
+    default_moderation_result = ModerationResult(
+        flagged=flagged,
+        categories=ModerationCategories(
+            hate=False,
+            hate_threatening=False,
+            self_harm=False,
+            sexual=False,
+            sexual_minors=False,
+            violence=False,
+            violence_graphic=False,
+        ),
+        category_scores=ModerationScores(
+            hate=0.0,
+            hate_threatening=0.0,
+            self_harm=0.0,
+            sexual=0.0,
+            sexual_minors=0.0,
+            violence=0.0,
+            violence_graphic=0.0,
+        ),
+    )
+    default_emotion_scores = EmotionScores(
+        joy=0.0,
+        sadness=0.0,
+        fear=0.0,
+        surprise=0.0,
+        anger=0.0,
+        disgust=0.0,
+        reason=message,
+    )
+    return ComprehensiveAnalysisResult(
+        survey_analysis=default_survey_analysis,
+        moderation_result=default_moderation_result,
+        emotion_scores=default_emotion_scores,
+    )
+
+
+# デフォルト結果は一度だけ検証し、行ごとにはそのコピーを使う
+EMPTY_RESULT = _build_default_result("無回答", "N/A", flagged=False)
+_ERROR_TEMPLATE = _build_default_result(ERROR_TOPIC, "", flagged=True)
+
+
+def empty_result() -> ComprehensiveAnalysisResult:
+    """Return the result used for empty or non-text responses.
+
+    Each call returns a deep copy of ``EMPTY_RESULT``, so a row's result can
+    be modified without affecting the other empty rows.
+    """
+    return EMPTY_RESULT.model_copy(deep=True)
+
+
+def error_result(message: str) -> ComprehensiveAnalysisResult:
+    """Return the result used when the analysis of a response failed.
+
+    The result is copied from a prebuilt template without re-validation.
+
+    Args:
+        message: Error description stored in the quote and reason fields.
+    """
+    return _ERROR_TEMPLATE.model_copy(
+        update={
+            "survey_analysis": _ERROR_TEMPLATE.survey_analysis.model_copy(
+                update={"verbatim_quote": message}
+            ),
+            "emotion_scores": _ERROR_TEMPLATE.emotion_scores.model_copy(
+                update={"reason": message}
+            ),
+        }
+    )
+
+
+def to_moderation_result(result) -> ModerationResult:
+    """Convert one moderation result from the API into :class:`ModerationResult`.
+
+    Args:
+        result: Either an ``openai`` moderation result object or its raw JSON
+            dictionary as found in Batch API output files, where category
+            names use ``/`` and ``-`` separators (``"self-harm"``).
+    """
+    if isinstance(result, dict):
+        flagged = result["flagged"]
+        categories = result["categories"]
+        scores = result["category_scores"]
+    else:
+        flagged = result.flagged
+        categories = result.categories.model_dump()
+        scores = result.category_scores.model_dump()
+
+    def _normalize(values: dict) -> dict:
+        return {k.replace("/", "_").replace("-", "_"): v for k, v in values.items()}
+
+    return ModerationResult(
+        flagged=flagged,
+        categories=ModerationCategories(**_normalize(categories)),
+        category_scores=ModerationScores(**_normalize(scores)),
+    )
+
+
+# --- コア分析関数 ---
+async def analyze_single_text(
+    text: str,
+    mode: str = "B",
+    fused: bool | None = None,
+    tokenized_text: str | None = None,
+) -> ComprehensiveAnalysisResult:
+    """Analyze a single text asynchronously.
+
+    Args:
+        text: Text to analyze.
+        mode: SudachiPy split mode to use for tokenization.
+        fused: When True, request the survey analysis and the emotion scores
+            in a single completion using :class:`FusedAnalysis`. The original
+            text is then sent once without pre-tokenization. Defaults to
+            ``settings.FUSED_ANALYSIS``. Moderation is always a separate call.
+        tokenized_text: Survey prompt text produced by
+            :func:`pretokenize_texts`. When omitted, ``text`` is tokenized in
+            a worker thread, or sent as is if ``settings.PRETOKENIZE_PROMPTS``
+            is disabled.
+
+    Returns:
+        ComprehensiveAnalysisResult containing structured analysis data.
+    """
+    if not isinstance(text, str) or not text.strip():
+        # 空または無効なテキストの場合、デフォルト値を返す
+        return empty_result()
+
+    if fused is None:
+        fused = settings.FUSED_ANALYSIS
+
+    if not fused and tokenized_text is None:
+        if settings.PRETOKENIZE_PROMPTS:
+            # CPU負荷の高い分かち書きでイベントループを止めない
+            tokenized_text = await asyncio.to_thread(tokenize_for_prompt, text, mode)
+        else:
+            tokenized_text = text
+
+    moderation_task = _moderate(text)
+
+    if fused:
+        fused_task = _chat(FusedAnalysis, build_fused_messages(text))
+    else:
+        survey_analysis_task = _chat(
+            SurveyResponseAnalysis, build_survey_messages(tokenized_text)
         )
-        moderation_result = moderation_response.results[0]  # 最初の結果を使用
+        emotion_task = _chat(EmotionScores, build_emotion_messages(text))
+
+    try:
+        if fused:
+            fused_result, moderation_response = await asyncio.gather(
+                fused_task, moderation_task
+            )
+            survey_analysis = fused_result.survey_analysis
+            emotion_scores = fused_result.emotion_scores
+        else:
+            survey_analysis, moderation_response, emotion_scores = (
+                await asyncio.gather(
+                    survey_analysis_task, moderation_task, emotion_task
+                )
+            )
 
         return ComprehensiveAnalysisResult(
             survey_analysis=survey_analysis,
-            moderation_result=ModerationResult(
-                flagged=moderation_result.flagged,
-                categories=ModerationCategories(
-                    **moderation_result.categories.model_dump()
-                ),
-                category_scores=ModerationScores(
-                    **moderation_result.category_scores.model_dump()
-                ),
-            ),
+            # 最初の結果を使用
+            moderation_result=to_moderation_result(moderation_response.results[0]),
             emotion_scores=emotion_scores,
         )
     except Exception as e:
         print(f"APIリクエストエラー: {e}")
         # エラー時もデフォルト値を返す
-        default_survey_analysis = SurveyResponseAnalysis(
-            sentiment="neutral",
-            key_topics=["分析エラー"],
-            verbatim_quote=str(e),
-            actionable_insight=False,
-        )
-        default_moderation_result = ModerationResult(
-            flagged=True,
-            categories=ModerationCategories(
-                hate=False,
-                hate_threatening=False,
-                self_harm=False,
-                sexual=False,
-                sexual_minors=False,
-                violence=False,
-                violence_graphic=False,
-            ),
-            category_scores=ModerationScores(
-                hate=0.0,
-                hate_threatening=0.0,
-                self_harm=0.0,
-                sexual=0.0,
-                sexual_minors=0.0,
-                violence=0.0,
-                violence_graphic=0.0,
-            ),
-        )
-        default_emotion_scores = EmotionScores(
-            joy=0.0,
-            sadness=0.0,
-            fear=0.0,
-            surprise=0.0,
-            anger=0.0,
-            disgust=0.0,
-            reason=str(e),
+        return error_result(str(e))
+
+
+def iter_batches(
+    items: Iterable[tuple[int, str]],
+    max_items: int,
+    max_tokens: int,
+) -> Iterator[list[tuple[int, str]]]:
+    """Lazily group ``(row_id, text)`` pairs into token-bounded batches.
+
+    Args:
+        items: Row IDs and texts in dispatch order.
+        max_items: Maximum number of responses per batch.
+        max_tokens: Budget for the estimated prompt and completion tokens of
+            one batch, including the system prompt, instructions and schema
+            sent with every batch. A single response larger than the budget
+            still forms its own batch.
+
+    Yields:
+        Batches preserving the input order.
+    """
+    max_tokens -= estimate_request_tokens(build_batch_messages([]), BatchAnalysis, 0)
+    current: list[tuple[int, str]] = []
+    current_tokens = 0
+    for idx, text in items:
+        cost = estimate_tokens(text) + BATCH_OUTPUT_TOKENS_PER_ITEM
+        if current and (
+            len(current) >= max_items or current_tokens + cost > max_tokens
+        ):
+            yield current
+            current, current_tokens = [], 0
+        current.append((idx, text))
+        current_tokens += cost
+    if current:
+        yield current
+
+
+def plan_batches(
+    items: Iterable[tuple[int, str]],
+    max_items: int,
+    max_tokens: int,
+) -> list[list[tuple[int, str]]]:
+    """Return :func:`iter_batches` as a list."""
+    return list(iter_batches(items, max_items, max_tokens))
+
+
+async def analyze_batch(
+    items: list[tuple[int, str]],
+    mode: str = "B",
+    fused: bool | None = None,
+) -> dict[int, ComprehensiveAnalysisResult]:
+    """Analyze several responses with one completion and one moderation call.
+
+    Every requested row ID must come back in the completion. Rows that are
+    missing, as well as every row when the batched request fails, are left
+    out of the result so the caller can queue them as single-row work under
+    its concurrency limit (see :func:`analyze_texts`).
+
+    Args:
+        items: ``(row_id, text)`` pairs to analyze.
+        mode: SudachiPy split mode used for empty responses.
+        fused: Fused setting used for empty responses.
+
+    Returns:
+        Mapping of row ID to its analysis result, for the rows that were
+        analyzed.
+    """
+    results: dict[int, ComprehensiveAnalysisResult] = {}
+    valid = [(idx, text) for idx, text in items if isinstance(text, str) and text.strip()]
+    # 空の回答はAPIを呼ばずにデフォルト値を返す
+    for idx, text in items:
+        if not (isinstance(text, str) and text.strip()):
+            results[idx] = await analyze_single_text(text, mode, fused=fused)
+
+    if valid:
+        try:
+            batch_result, moderation_response = await asyncio.gather(
+                _chat(
+                    BatchAnalysis,
+                    build_batch_messages(valid),
+                    completion_tokens=BATCH_OUTPUT_TOKENS_PER_ITEM * len(valid),
+                ),
+                _moderate([text for _, text in valid]),
+            )
+            by_id = {item.id.strip(): item for item in batch_result.items}
+            for (idx, _), moderation_result in zip(valid, moderation_response.results):
+                item = by_id.get(str(idx))
+                if item is None:
+                    continue
+                results[idx] = ComprehensiveAnalysisResult(
+                    survey_analysis=item.survey_analysis,
+                    moderation_result=to_moderation_result(moderation_result),
+                    emotion_scores=item.emotion_scores,
+                )
+        except Exception as e:
+            print(f"バッチAPIリクエストエラー: {e}")
+    return results
+
+
+# --- 結果キャッシュ ---
+def normalize_text(text: str) -> str:
+    """Return ``text`` NFKC-normalized with collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def group_duplicates(texts: list) -> dict[int, list[int]]:
+    """Group row indices whose texts are identical after normalization.
+
+    Returns:
+        Mapping of each group's first (representative) index to all indices
+        in the group, in row order. Empty and non-text values form one group.
+    """
+    members: dict[int, list[int]] = {}
+    first_index: dict[str, int] = {}
+    for idx, text in enumerate(texts):
+        key = normalize_text(text) if isinstance(text, str) else ""
+        rep = first_index.setdefault(key, idx)
+        members.setdefault(rep, []).append(idx)
+    return members
+
+
+@lru_cache(maxsize=1)
+def prompt_version() -> str:
+    """Return a fingerprint of the prompts and result schema.
+
+    Any change to a prompt or to the Pydantic models yields a new version so
+    stale cache entries are never returned.
+    """
+    digest = hashlib.sha256()
+    for part in (
+        SURVEY_SYSTEM_PROMPT,
+        EMOTION_SYSTEM_PROMPT,
+        FUSED_SYSTEM_PROMPT,
+        build_emotion_prompt(""),
+        build_fused_prompt(""),
+        build_batch_prompt([]),
+        json.dumps(ComprehensiveAnalysisResult.model_json_schema(), sort_keys=True),
+    ):
+        digest.update(part.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def result_cache_key(
+    text: str, mode: str = "B", fused: bool = False, batched: bool = False
+) -> str:
+    """Return the cache key for analyzing ``text`` with the given settings.
+
+    Results of the multi-response prompt (``batched``) and of the single-row
+    prompts are stored under different keys.
+    """
+    return make_cache_key(
+        normalize_text(text),
+        ANALYSIS_MODEL,
+        prompt_version(),
+        mode if settings.PRETOKENIZE_PROMPTS else "raw",
+        "fused" if fused else "split",
+        "batch" if batched else "single",
+    )
+
+
+def open_result_cache() -> ResultCache | None:
+    """Open the cache configured by ``settings.RESULT_CACHE_PATH`` if any."""
+    if not settings.RESULT_CACHE_PATH:
+        return None
+    return ResultCache(
+        settings.RESULT_CACHE_PATH,
+        max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+        max_age_days=settings.RESULT_CACHE_MAX_AGE_DAYS,
+    )
+
+
+def is_error_result(result: ComprehensiveAnalysisResult) -> bool:
+    """Return True if ``result`` is the fallback produced by a failed request."""
+    return result.survey_analysis.key_topics == [ERROR_TOPIC]
+
+
+def create_limiter(initial: int | None = None) -> AdaptiveConcurrencyLimiter:
+    """Return a concurrency limiter configured from ``settings``.
+
+    Args:
+        initial: Starting concurrency. Defaults to
+            ``settings.MAX_CONCURRENT_TASKS``.
+    """
+    if initial is None:
+        initial = settings.MAX_CONCURRENT_TASKS
+    if not settings.ADAPTIVE_CONCURRENCY:
+        return AdaptiveConcurrencyLimiter(initial, min_limit=initial, max_limit=initial)
+    return AdaptiveConcurrencyLimiter(
+        initial,
+        min_limit=settings.MIN_CONCURRENT_TASKS,
+        max_limit=max(initial, settings.MAX_CONCURRENCY_LIMIT),
+    )
+
+
+class ResultColumns:
+    """Preallocated, typed column arrays receiving results as they arrive.
+
+    Columns are named ``analysis_*``, ``moderation_*`` (with the categories
+    and category scores flattened, e.g. ``moderation_categories_hate``) and
+    ``emotion_*``, each preceded by ``prefix``. Booleans and scores are stored
+    in NumPy ``bool``/``float`` arrays; strings and topic lists in ``object``
+    arrays.
+    """
+
+    def __init__(self, size: int, prefix: str = "") -> None:
+        self.size = size
+        self.prefix = prefix
+        self.arrays: dict[str, np.ndarray] = {}
+        # (配列, 結果からの属性パス) の組を事前に作っておく
+        self._targets: list[tuple[np.ndarray, tuple[str, ...]]] = []
+        for column, path, dtype in _RESULT_COLUMN_SPECS:
+            if dtype is object:
+                array = np.empty(size, dtype=object)
+            else:
+                array = np.zeros(size, dtype=dtype)
+            self.arrays[prefix + column] = array
+            self._targets.append((array, path))
+
+    def set(self, idx: int, result: ComprehensiveAnalysisResult) -> None:
+        """Write ``result`` into row ``idx`` of every column.
+
+        Lists are copied, so rows sharing one result object (duplicates and
+        empty responses) do not share their topic-list cells.
+        """
+        for array, path in self._targets:
+            value = result
+            for attr in path:
+                value = getattr(value, attr)
+            array[idx] = list(value) if isinstance(value, list) else value
+
+    def frame(self) -> pd.DataFrame:
+        """Return the result columns as a DataFrame indexed from 0."""
+        return pd.DataFrame(self.arrays, copy=False)
+
+    def join(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return ``df`` (re-indexed from 0) with the result columns appended.
+
+        The input DataFrame is not modified.
+        """
+        return pd.concat([df.reset_index(drop=True), self.frame()], axis=1)
+
+
+def _column_dtype(annotation) -> type:
+    if annotation is bool:
+        return bool
+    if annotation is float:
+        return np.float64
+    return object
+
+
+_RESULT_COLUMN_SPECS: list[tuple[str, tuple[str, ...], type]] = [
+    *(
+        (f"analysis_{name}", ("survey_analysis", name), _column_dtype(field.annotation))
+        for name, field in SurveyResponseAnalysis.model_fields.items()
+    ),
+    ("moderation_flagged", ("moderation_result", "flagged"), bool),
+    *(
+        (f"moderation_categories_{name}", ("moderation_result", "categories", name), bool)
+        for name in ModerationCategories.model_fields
+    ),
+    *(
+        (
+            f"moderation_category_scores_{name}",
+            ("moderation_result", "category_scores", name),
+            np.float64,
         )
-        return ComprehensiveAnalysisResult(
-            survey_analysis=default_survey_analysis,
-            moderation_result=default_moderation_result,
-            emotion_scores=default_emotion_scores,
+        for name in ModerationScores.model_fields
+    ),
+    *(
+        (f"emotion_{name}", ("emotion_scores", name), _column_dtype(field.annotation))
+        for name, field in EmotionScores.model_fields.items()
+    ),
+]
+
+
+RESULT_COLUMN_NAMES = [column for column, _, _ in _RESULT_COLUMN_SPECS]
+# 類似回答の統合を有効にした場合に追加する列（同じ番号の行は同じ分析結果を共有する）
+DUPLICATE_CLUSTER_COLUMN = "analysis_duplicate_cluster"
+
+
+def result_column_prefix(column_name: str) -> str:
+    """Return the prefix of result columns when several columns are analyzed."""
+    return f"{column_name}_"
+
+
+def column_results(df_analyzed: pd.DataFrame, column_name: str) -> pd.DataFrame:
+    """Return one analyzed column of a multi-column result with plain names.
+
+    The returned DataFrame contains ``column_name`` and its result columns
+    with the ``<column_name>_`` prefix removed, so it can be passed to
+    :func:`summarize_results` like a single-column result.
+    """
+    prefix = result_column_prefix(column_name)
+    names = {prefix + name: name for name in RESULT_COLUMN_NAMES}
+    present = [name for name in names if name in df_analyzed.columns]
+    return df_analyzed[[column_name, *present]].rename(columns=names)
+
+
+def build_result_frame(
+    df: pd.DataFrame, results: list[ComprehensiveAnalysisResult]
+) -> pd.DataFrame:
+    """Append analysis results to ``df`` as prefixed columns.
+
+    Args:
+        df: Source DataFrame whose rows correspond to ``results``. It is not
+            modified.
+        results: One analysis result per row of ``df``.
+
+    Returns:
+        New DataFrame with the :class:`ResultColumns` columns appended.
+    """
+    columns = ResultColumns(len(results))
+    for idx, result in enumerate(results):
+        columns.set(idx, result)
+    return columns.join(df)
+
+
+# --- 前回の分析結果の再利用 ---
+def text_hash(text: str) -> str:
+    """Return the content hash that identifies a response across runs."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def _previous_topics(df_previous: pd.DataFrame, column: str) -> list[list[str]] | None:
+    # Parquet ではリスト列、Excel では "_1", "_2" ... の列に分割されている
+    if column in df_previous.columns:
+        return [
+            [str(t) for t in x] if isinstance(x, (list, tuple, np.ndarray)) else []
+            for x in df_previous[column]
+        ]
+    pattern = re.compile(rf"^{re.escape(column)}_(\d+)$")
+    numbered = sorted(
+        (int(m.group(1)), c)
+        for c in df_previous.columns
+        if (m := pattern.match(str(c)))
+    )
+    if not numbered:
+        return None
+    values = zip(*(df_previous[c].tolist() for _, c in numbered))
+    return [[t for t in row if isinstance(t, str) and t] for row in values]
+
+
+def previous_results(
+    df_previous: pd.DataFrame, column_name: str
+) -> dict[str, ComprehensiveAnalysisResult]:
+    """Rebuild the results of a previously exported analysis, by text hash.
+
+    ``df_previous`` is the content of a file written by
+    :func:`exporting.save_analysis` (Excel or Parquet), from a single- or
+    multi-column run. Rows with empty text, error results or values that no
+    longer validate against the current models are left out so that they are
+    analyzed again.
+
+    Args:
+        df_previous: Previously analyzed rows.
+        column_name: Text column whose results should be reused.
+
+    Returns:
+        Mapping of :func:`text_hash` to the stored result.
+    """
+    prefix = result_column_prefix(column_name)
+    if prefix + "analysis_sentiment" not in df_previous.columns:
+        prefix = ""
+    if column_name not in df_previous.columns:
+        return {}
+    topics = _previous_topics(df_previous, prefix + "analysis_key_topics")
+    specs = [spec for spec in _RESULT_COLUMN_SPECS if spec[0] != "analysis_key_topics"]
+    if topics is None or any(prefix + c not in df_previous.columns for c, _, _ in specs):
+        return {}
+    columns = [df_previous[prefix + c].tolist() for c, _, _ in specs]
+
+    results: dict[str, ComprehensiveAnalysisResult] = {}
+    for i, text in enumerate(df_previous[column_name].tolist()):
+        if not isinstance(text, str) or not text.strip():
+            continue
+        data: dict = {"survey_analysis": {"key_topics": topics[i]}}
+        for (_, path, dtype), values in zip(specs, columns):
+            value = values[i]
+            # Excel に保存した空文字列は欠損値として読み込まれる
+            if dtype is object and not isinstance(value, str) and pd.isna(value):
+                value = ""
+            target = data
+            for attr in path[:-1]:
+                target = target.setdefault(attr, {})
+            target[path[-1]] = value
+        try:
+            result = ComprehensiveAnalysisResult.model_validate(data)
+        except ValueError:
+            continue
+        if not is_error_result(result):
+            results[text_hash(text)] = result
+    return results
+
+
+async def analyze_texts(
+    texts_to_analyze: list,
+    mode: str = "B",
+    progress_callback=None,
+    max_concurrent_tasks: int | None = None,
+    fused: bool | None = None,
+    batch_size: int | None = None,
+    cache: ResultCache | None = None,
+    dedup: bool = True,
+    run_report: dict | None = None,
+    limiter: AdaptiveConcurrencyLimiter | None = None,
+    on_result: Callable[[int, ComprehensiveAnalysisResult], None] | None = None,
+    known_results: Mapping[str, ComprehensiveAnalysisResult] | None = None,
+    near_dedup: bool | None = None,
+    cluster_ids: list[int] | None = None,
+) -> list[ComprehensiveAnalysisResult]:
+    """Analyze a list of texts in parallel.
+
+    Args:
+        texts_to_analyze: Responses to analyze. Non-text values receive the
+            empty-response result.
+        mode: SudachiPy split mode. When ``settings.PRETOKENIZE_PROMPTS`` is
+            enabled, all texts dispatched one row per request are tokenized in
+            bulk with :func:`pretokenize_texts` (in
+            ``settings.TOKENIZER_PROCESSES`` worker processes) before the
+            first request is sent.
+        progress_callback: Optional callback receiving progress percentage.
+        max_concurrent_tasks: Initial number of analysis tasks to run
+            concurrently. Defaults to ``settings.MAX_CONCURRENT_TASKS``. When
+            ``settings.ADAPTIVE_CONCURRENCY`` is enabled the limit then adapts
+            between ``settings.MIN_CONCURRENT_TASKS`` and
+            ``settings.MAX_CONCURRENCY_LIMIT``; otherwise it stays fixed.
+        fused: Use a single completion per row for the survey and emotion
+            analyses. Defaults to ``settings.FUSED_ANALYSIS``.
+        batch_size: Maximum number of responses packed into one completion.
+            Values above 1 enable :func:`analyze_batch`, with batches further
+            limited by ``settings.BATCH_MAX_TOKENS``. Defaults to
+            ``settings.BATCH_SIZE``.
+        cache: Result cache consulted before any request is sent. Successful
+            results are written back to it. When omitted, the cache configured
+            by ``settings.RESULT_CACHE_PATH`` is used if set.
+        dedup: Analyze each distinct normalized text only once and copy its
+            result to every row with the same text.
+        run_report: Optional dictionary updated in place with run statistics
+            such as the number of unique texts, the dedup ratio and the
+            concurrency trajectory.
+        limiter: Concurrency limiter shared with other runs. When omitted a
+            new one is created from ``max_concurrent_tasks``.
+        on_result: Optional callback invoked with ``(row, result)`` for every
+            row as soon as its result is known.
+        known_results: Results of an earlier run keyed by :func:`text_hash`,
+            e.g. from :func:`previous_results`. Matching texts reuse them and
+            are neither looked up in the cache nor sent to the API.
+        near_dedup: Also merge texts that still need a request and are near
+            duplicates of each other (see
+            :func:`near_duplicates.cluster_near_duplicates`), analyzing one
+            representative per cluster. Defaults to ``settings.NEAR_DEDUP``.
+        cluster_ids: Optional list whose contents are replaced with one ID per
+            text. Texts with the same ID share the result of one
+            representative.
+
+    Returns:
+        One analysis result per input text, in input order.
+    """
+    if max_concurrent_tasks is None:
+        max_concurrent_tasks = settings.MAX_CONCURRENT_TASKS
+
+    if batch_size is None:
+        batch_size = settings.BATCH_SIZE
+
+    if fused is None:
+        fused = settings.FUSED_ANALYSIS
+
+    if near_dedup is None:
+        near_dedup = settings.NEAR_DEDUP
+
+    completed_results = [None] * len(texts_to_analyze)
+
+    def deliver(rep: int) -> None:
+        if on_result is not None:
+            for idx in members[rep]:
+                on_result(idx, completed_results[rep])
+
+    # 同一テキストの行をまとめ、代表行だけを分析対象にする
+    if dedup:
+        members = group_duplicates(texts_to_analyze)
+    else:
+        members = {idx: [idx] for idx in range(len(texts_to_analyze))}
+    pending = [(idx, texts_to_analyze[idx]) for idx in members]
+
+    # 前回の分析結果に同じ内容の回答があれば再利用する
+    reused = 0
+    if known_results:
+        for idx, text in pending:
+            if isinstance(text, str) and text.strip():
+                result = known_results.get(text_hash(text))
+                if result is not None:
+                    completed_results[idx] = result
+                    reused += 1
+                    deliver(idx)
+        pending = [
+            (idx, text) for idx, text in pending if completed_results[idx] is None
+        ]
+
+    # キャッシュ済みの結果を先に埋める
+    metrics = get_metrics()
+    owns_cache = cache is None
+    if owns_cache:
+        cache = open_result_cache()
+    try:
+        if cache is not None:
+            # バッチ実行でも1件ずつ再分析した回答は単体用のキーで保存されるため両方を探す
+            modes = (True, False) if batch_size > 1 else (False,)
+            cache_keys = {
+                idx: [result_cache_key(text, mode, fused, batched) for batched in modes]
+                for idx, text in pending
+                if isinstance(text, str) and text.strip()
+            }
+            cached = cache.get_many(key for keys in cache_keys.values() for key in keys)
+            for idx, keys in cache_keys.items():
+                for key in keys:
+                    if key not in cached:
+                        continue
+                    try:
+                        completed_results[idx] = (
+                            ComprehensiveAnalysisResult.model_validate_json(cached[key])
+                        )
+                        break
+                    except ValueError:
+                        pass
+            pending = [
+                (idx, text) for idx, text in pending if completed_results[idx] is None
+            ]
+            for idx in cache_keys:
+                if completed_results[idx] is not None:
+                    deliver(idx)
+            hits = sum(completed_results[idx] is not None for idx in cache_keys)
+            metrics.record_cache(hits, len(cache_keys) - hits)
+
+        # 表記ゆれ程度しか違わない未分析の回答をまとめ、代表だけを送信する
+        unique_texts = len(members)
+        if near_dedup and len(pending) > 1:
+            with metrics.time_stage("near_dedup"):
+                representatives = await asyncio.to_thread(
+                    cluster_near_duplicates,
+                    [text for _, text in pending],
+                    threshold=settings.NEAR_DEDUP_THRESHOLD,
+                    ngram=settings.NEAR_DEDUP_NGRAM,
+                    processes=settings.TOKENIZER_PROCESSES,
+                )
+            for (idx, _), position in zip(pending, representatives):
+                rep = pending[position][0]
+                if rep != idx:
+                    members[rep].extend(members.pop(idx))
+            pending = [(idx, text) for idx, text in pending if idx in members]
+
+        # 1件ずつ送る回答は、送信前に列全体をまとめて分かち書きしておく
+        prompt_texts: dict[int, str] = {}
+        if pending and not fused and batch_size <= 1 and settings.PRETOKENIZE_PROMPTS:
+            with metrics.time_stage("pretokenize"):
+                tokenized = await asyncio.to_thread(
+                    pretokenize_texts,
+                    [text for _, text in pending],
+                    mode,
+                    settings.TOKENIZER_PROCESSES,
+                )
+            prompt_texts = {idx: text for (idx, _), text in zip(pending, tokenized)}
+
+        if limiter is None:
+            limiter = create_limiter(max_concurrent_tasks)
+        limiter_token = _active_limiter.set(limiter)
+
+        def store(results: Iterable, batched: bool) -> None:
+            # 完了した単位ごとに書き込み、中断した実行の結果も次回に使えるようにする
+            if cache is None:
+                return
+            entries = {}
+            for idx, result in results:
+                text = texts_to_analyze[idx]
+                if isinstance(text, str) and text.strip() and not is_error_result(result):
+                    entries[result_cache_key(text, mode, fused, batched)] = (
+                        result.model_dump_json()
+                    )
+            cache.set_many(entries)
+
+        async def handle(unit: list[tuple[int, str]]) -> None:
+            nonlocal finished
+            wait_start = time.perf_counter()
+            async with limiter:
+                # 同時実行数の空きを待った時間（キューでの待ち時間）
+                metrics.record_wait("concurrency_slot", time.perf_counter() - wait_start)
+                if len(unit) > 1:
+                    batch_results = await analyze_batch(unit, mode, fused=fused)
+                    results = batch_results.items()
+                    missing = [item for item in unit if item[0] not in batch_results]
+                else:
+                    missing = []
+                    idx, text = unit[0]
+                    result = await analyze_single_text(
+                        text, mode, fused=fused, tokenized_text=prompt_texts.pop(idx, None)
+                    )
+                    results = [(idx, result)]
+            # 結果を格納して進捗を更新
+            store(results, batched=len(unit) > 1)
+            for idx, result in results:
+                completed_results[idx] = result
+                finished += len(members[idx])
+                deliver(idx)
+            if progress_callback:
+                progress_callback(finished / total * 100)
+            # バッチ結果に含まれなかった回答は、1件ずつ同時実行数の枠を取り直して再分析する
+            if missing:
+                print(f"バッチ結果に含まれないID {len(missing)} 件を個別に再分析します。")
+                await asyncio.gather(*(handle([item]) for item in missing))
+
+        if batch_size > 1:
+            units = iter_batches(
+                pending,
+                max_items=batch_size,
+                max_tokens=settings.BATCH_MAX_TOKENS,
+            )
+        else:
+            units = ([item] for item in pending)
+
+        total = len(texts_to_analyze)
+        finished = total - sum(len(members[idx]) for idx, _ in pending)
+        if progress_callback and finished:
+            progress_callback(finished / total * 100)
+
+        # 同時実行数の上限と同数のワーカーがキューから順に処理する
+        try:
+            await run_worker_pool(units, handle, worker_count=limiter.max_limit)
+        finally:
+            _active_limiter.reset(limiter_token)
+
+    finally:
+        # 例外や中断で終わった場合も自分で開いたキャッシュは閉じる
+        if owns_cache and cache is not None:
+            cache.close()
+
+    # 代表行の結果を同じテキストの全行に展開
+    if cluster_ids is not None:
+        cluster_ids[:] = [0] * total
+    for cluster_id, (rep, rows) in enumerate(sorted(members.items())):
+        for idx in rows:
+            completed_results[idx] = completed_results[rep]
+            if cluster_ids is not None:
+                cluster_ids[idx] = cluster_id
+
+    if run_report is not None:
+        run_report.update(
+            {
+                "rows": total,
+                "unique_texts": unique_texts,
+                "dedup_ratio": 1 - unique_texts / total if total else 0.0,
+                "near_duplicates": unique_texts - len(members),
+                "reused": reused,
+                "cache_hits": len(members) - len(pending) - reused,
+                "dispatched": len(pending),
+                "concurrency_final": int(limiter.limit),
+                "concurrency_trajectory": list(limiter.trajectory),
+            }
         )
 
+    return completed_results
+
 
 async def analyze_dataframe(
     df: pd.DataFrame,
-    column_name: str,
+    column_name: str | list[str],
     mode: str = "B",
     progress_callback=None,
     max_concurrent_tasks: int | None = None,
+    fused: bool | None = None,
+    batch_size: int | None = None,
+    cache: ResultCache | None = None,
+    dedup: bool = True,
+    run_report: dict | None = None,
+    limiter: AdaptiveConcurrencyLimiter | None = None,
+    previous: pd.DataFrame | None = None,
+    near_dedup: bool | None = None,
 ) -> pd.DataFrame:
-    """Analyze a DataFrame column in parallel and append results.
+    """Analyze one or more DataFrame columns in parallel and append results.
+
+    Rows of all columns are scheduled together in one :func:`analyze_texts`
+    run, sharing its limiter, cache and duplicate detection.
 
     Args:
         df: Source DataFrame.
-        column_name: Name of the column containing text responses.
+        column_name: Name of the column containing text responses, or a list
+            of such columns. With a list, result columns are prefixed with
+            the column name (e.g. ``改善点_analysis_sentiment``); see
+            :func:`column_results`.
         mode: SudachiPy split mode.
         progress_callback: Optional callback receiving progress percentage.
-        max_concurrent_tasks: Maximum number of analysis tasks to run
-            concurrently. Defaults to ``settings.MAX_CONCURRENT_TASKS``.
+        max_concurrent_tasks: Initial concurrency; see :func:`analyze_texts`.
+        fused: Use a single completion per row for the survey and emotion
+            analyses. Defaults to ``settings.FUSED_ANALYSIS``.
+        batch_size: Maximum number of responses packed into one completion.
+            Defaults to ``settings.BATCH_SIZE``.
+        cache: Result cache; see :func:`analyze_texts`.
+        dedup: Analyze each distinct normalized text only once.
+        run_report: Optional dictionary updated in place with run statistics.
+        limiter: Concurrency limiter shared with other runs.
+        previous: Previously exported analysis (see
+            :func:`loading.load_previous_analysis`). Rows whose text matches
+            an analyzed row of it by content hash reuse that result, so only
+            new or changed responses are sent to the API.
+        near_dedup: Analyze one representative per cluster of near-duplicate
+            responses; see :func:`analyze_texts`. Defaults to
+            ``settings.NEAR_DEDUP``. When enabled, each text column gets a
+            ``analysis_duplicate_cluster`` column (prefixed like the other
+            result columns) holding the cluster ID of its rows.
 
     Returns:
-        DataFrame with analysis results concatenated.
+        New DataFrame with analysis results appended; ``df`` is not modified.
     """
-    texts_to_analyze = df[column_name].tolist()
+    if isinstance(column_name, str):
+        text_columns = [column_name]
+        result_columns = [ResultColumns(len(df))]
+    else:
+        text_columns = list(column_name)
+        result_columns = [
+            ResultColumns(len(df), prefix=result_column_prefix(col))
+            for col in text_columns
+        ]
+    texts = []
+    for col in text_columns:
+        texts.extend(df[col].tolist())
+    if near_dedup is None:
+        near_dedup = settings.NEAR_DEDUP
+    cluster_ids: list[int] = []
+    known_results: dict[str, ComprehensiveAnalysisResult] = {}
+    if previous is not None:
+        for col in text_columns:
+            # 数万行の検証はイベントループを止めないよう別スレッドで行う
+            known_results.update(await asyncio.to_thread(previous_results, previous, col))
+
+    def on_result(idx: int, result: ComprehensiveAnalysisResult) -> None:
+        # 列を縦に連結した位置から、列と行の位置に戻す
+        col_idx, row = divmod(idx, len(df))
+        result_columns[col_idx].set(row, result)
+
+    await analyze_texts(
+        texts,
+        mode,
+        progress_callback=progress_callback,
+        max_concurrent_tasks=max_concurrent_tasks,
+        fused=fused,
+        batch_size=batch_size,
+        cache=cache,
+        dedup=dedup,
+        run_report=run_report,
+        limiter=limiter,
+        on_result=on_result,
+        known_results=known_results,
+        near_dedup=near_dedup,
+        cluster_ids=cluster_ids,
+    )
+    frames = [columns.frame() for columns in result_columns]
+    if near_dedup:
+        for i, (frame, columns) in enumerate(zip(frames, result_columns)):
+            frame[columns.prefix + DUPLICATE_CLUSTER_COLUMN] = np.asarray(
+                cluster_ids[i * len(df) : (i + 1) * len(df)], dtype=np.int64
+            )
+    return pd.concat([df.reset_index(drop=True), *frames], axis=1)
 
-    if max_concurrent_tasks is None:
-        max_concurrent_tasks = settings.MAX_CONCURRENT_TASKS
 
-    semaphore = asyncio.Semaphore(max_concurrent_tasks)
+async def analyze_dataframe_streaming(
+    df: pd.DataFrame,
+    column_name: str,
+    checkpoint_path: str,
+    mode: str = "B",
+    chunk_size: int = 1000,
+    progress_callback=None,
+    max_concurrent_tasks: int | None = None,
+    fused: bool | None = None,
+    batch_size: int | None = None,
+    cache: ResultCache | None = None,
+    limiter: AdaptiveConcurrencyLimiter | None = None,
+) -> AsyncIterator[pd.DataFrame]:
+    """Analyze a column chunk by chunk, appending results to a checkpoint.
+
+    Each chunk is analyzed with :func:`analyze_texts`, written to the
+    checkpoint file and then yielded, so only one chunk of results is held in
+    memory. Rows already present in the checkpoint are skipped, which lets an
+    interrupted job resume where it stopped. Failed rows (error results) are
+    not written, and rows whose text changed since they were stored are
+    analyzed again. Use :func:`load_checkpoint` to build
+    the complete result afterwards.
 
-    async def sem_task(idx: int, text: str):
-        async with semaphore:
-            result = await analyze_single_text(text, mode)
-        return idx, result
+    Args:
+        df: Source DataFrame.
+        column_name: Name of the column containing text responses.
+        checkpoint_path: JSONL checkpoint file, created if missing.
+        mode: SudachiPy split mode.
+        chunk_size: Number of rows analyzed and written per chunk.
+        progress_callback: Optional callback receiving overall progress.
+        max_concurrent_tasks: Initial concurrency for the shared limiter.
+        fused: Use a single completion per row.
+        batch_size: Maximum number of responses per completion.
+        cache: Result cache shared by all chunks.
+        limiter: Concurrency limiter shared by all chunks.
+
+    Yields:
+        Result DataFrames of newly analyzed rows, indexed by row position.
+    """
+    store = CheckpointStore(checkpoint_path)
+    store.open(column_name, len(df))
+    hashes = [cell_hash(text) for text in df[column_name]]
+    done, stale = store.completed_rows(hashes)
+    if stale:
+        print(f"チェックポイント保存後に内容が変わった {len(stale)} 行を再分析します。")
+    total = len(df)
+    finished = len(done)
+
+    if limiter is None:
+        limiter = create_limiter(max_concurrent_tasks)
+    owns_cache = cache is None
+    if owns_cache:
+        cache = open_result_cache()
 
-    tasks = [
-        asyncio.create_task(sem_task(idx, text))
-        for idx, text in enumerate(texts_to_analyze)
-    ]
+    try:
+        for start in range(0, total, chunk_size):
+            positions = [
+                pos
+                for pos in range(start, min(start + chunk_size, total))
+                if pos not in done
+            ]
+            if not positions:
+                continue
+            chunk = df.iloc[positions]
+            results = await analyze_texts(
+                chunk[column_name].tolist(),
+                mode,
+                fused=fused,
+                batch_size=batch_size,
+                cache=cache,
+                limiter=limiter,
+            )
+            # 失敗した行は書き込まず、再開時にもう一度分析する
+            store.append(
+                (pos, hashes[pos], result.model_dump_json())
+                for pos, result in zip(positions, results)
+                if not is_error_result(result)
+            )
+            finished += len(positions)
+            if progress_callback:
+                progress_callback(finished / total * 100)
+            frame = build_result_frame(chunk.copy(), results)
+            frame.index = positions
+            yield frame
+    finally:
+        if owns_cache and cache is not None:
+            cache.close()
+
+
+def load_checkpoint(
+    df: pd.DataFrame, column_name: str, checkpoint_path: str
+) -> pd.DataFrame:
+    """Build the complete result DataFrame from a checkpoint file.
+
+    Rows missing from the checkpoint (an unfinished job or failed rows) or
+    whose text no longer matches the stored hash receive the error result, so that the
+    output always has one row per input row.
+    """
+    store = CheckpointStore(checkpoint_path)
+    store.open(column_name, len(df))
+    results: list[ComprehensiveAnalysisResult | None] = [None] * len(df)
+    hashes = [cell_hash(text) for text in df[column_name]]
+    for pos, value in store.valid_results(hashes).items():
+        results[pos] = ComprehensiveAnalysisResult.model_validate_json(value)
+    missing = error_result("チェックポイントに結果がありません")
+    return build_result_frame(df, [r or missing for r in results])
+
+
+# --- 集計関数 ---
+SENTIMENT_ORDER = ["positive", "neutral", "negative", "mixed"]
+MODERATION_CATEGORIES = list(ModerationCategories.model_fields)
+EMOTION_TYPES = [
+    name for name, field in EmotionScores.model_fields.items() if field.annotation is float
+]
+TOP_TOPICS = 15
 
-    completed_results = [None] * len(texts_to_analyze)
-    total = len(tasks)
-    finished = 0
-
-    # タスクが完了するたびに結果を格納して進捗を更新
-    for coro in asyncio.as_completed(tasks):
-        idx, result = await coro
-        completed_results[idx] = result
-        finished += 1
-        if progress_callback:
-            progress_callback(finished / total * 100)
 
-    # 結果をDataFrameに変換
-    survey_analysis_results = []
-    moderation_results = []
-    emotion_results = []
+def aggregate_results(df_analyzed: pd.DataFrame) -> dict:
+    """Aggregate the result columns of an analysis in vectorized passes.
 
-    for res in completed_results:
-        survey_analysis_results.append(res.survey_analysis.model_dump())
-        moderation_results.append(res.moderation_result.model_dump())
-        emotion_results.append(res.emotion_scores.model_dump())
+    Args:
+        df_analyzed: DataFrame with the single-column result columns (see
+            :func:`column_results` for multi-column results).
 
-    survey_df = pd.DataFrame(survey_analysis_results)
-    moderation_df = pd.DataFrame(moderation_results)
-    emotion_df = pd.DataFrame(emotion_results)
+    Returns:
+        Dictionary with ``sentiment_counts``, ``topic_counts`` (top
+        ``TOP_TOPICS``), ``moderation_summary`` (flagged rows per category)
+        and ``emotion_avg`` (mean score per emotion). Missing moderation or
+        emotion columns count as 0.
+    """
+    # センチメント比率
+    sentiment_counts = (
+        df_analyzed["analysis_sentiment"]
+        .value_counts()
+        .reindex(SENTIMENT_ORDER, fill_value=0)
+    )
 
-    # 列名を調整
-    survey_df.columns = [f"analysis_{col}" for col in survey_df.columns]
-    moderation_df.columns = [f"moderation_{col}" for col in moderation_df.columns]
-    emotion_df.columns = [f"emotion_{col}" for col in emotion_df.columns]
+    # トピックの出現頻度。リスト（Parquet から読み込んだ場合はタプルや配列）だけを
+    # 1回のループで連結し、Counter で数える（文字列や欠損値は数えない）
+    all_topics: list = []
+    extend = all_topics.extend
+    for topics in df_analyzed["analysis_key_topics"].tolist():
+        if type(topics) is list or isinstance(topics, (tuple, np.ndarray)):
+            extend(topics)
+    top_topics = Counter(all_topics).most_common(TOP_TOPICS)
+    topic_counts = pd.Series(dict(top_topics), name="count", dtype="int64")
+
+    # モデレーションは件数の合計、感情スコアは平均を列ごとではなくまとめて計算する
+    moderation_columns = {
+        f"moderation_categories_{cat}": cat for cat in MODERATION_CATEGORIES
+    }
+    emotion_columns = {f"emotion_{emo}": emo for emo in EMOTION_TYPES}
+    sums = df_analyzed[
+        [c for c in moderation_columns if c in df_analyzed.columns]
+    ].sum()
+    means = df_analyzed[[c for c in emotion_columns if c in df_analyzed.columns]].mean()
 
-    # 元のDataFrameと結合
-    df.reset_index(drop=True, inplace=True)
-    return pd.concat([df, survey_df, moderation_df, emotion_df], axis=1)
+    return {
+        "sentiment_counts": sentiment_counts,
+        "topic_counts": topic_counts,
+        "moderation_summary": {
+            cat: sums.get(col, 0) for col, cat in moderation_columns.items()
+        },
+        "emotion_avg": {emo: means.get(col, 0.0) for col, emo in emotion_columns.items()},
+    }
 
 
-# --- 集計関数 ---
 async def summarize_results(
     df_analyzed: pd.DataFrame,
     column_name: str,
@@ -452,89 +1844,43 @@ async def summarize_results(
     if "analysis_sentiment" not in df_analyzed.columns:
         return None, None
 
-    # センチメント比率
-    sentiment_counts = (
-        df_analyzed["analysis_sentiment"]
-        .value_counts()
-        .reindex(["positive", "neutral", "negative", "mixed"], fill_value=0)
-    )
+    summary = aggregate_results(df_analyzed)
 
-    # 全トピックのリストを作成
-    all_topics = []
-    for topics in df_analyzed["analysis_key_topics"]:
-        if isinstance(topics, list):
-            all_topics.extend(topics)
-
-    # トピックの出現頻度
-    topic_counts = pd.Series(all_topics).value_counts()
-
-    # モデレーション結果の集計
-    moderation_summary = {}
-    moderation_categories = [
-        "hate",
-        "hate_threatening",
-        "self_harm",
-        "sexual",
-        "sexual_minors",
-        "violence",
-        "violence_graphic",
-    ]
-    for cat in moderation_categories:
-        col_name = f"moderation_categories_{cat}"
-        if col_name in df_analyzed.columns:
-            moderation_summary[cat] = df_analyzed[col_name].sum()
-        else:
-            moderation_summary[cat] = 0  # 列がない場合は0
-
-    # 感情スコアの平均
-    emotion_avg = {}
-    emotion_types = ["joy", "sadness", "fear", "surprise", "anger", "disgust"]
-    for emo in emotion_types:
-        col_name = f"emotion_{emo}"
-        if col_name in df_analyzed.columns:
-            emotion_avg[emo] = df_analyzed[col_name].mean()
-        else:
-            emotion_avg[emo] = 0.0  # 列がない場合は0
+    # ワードクラウド用の単語頻度を3種類集計（各回答の分かち書きは1回だけ）
+    texts = df_analyzed[column_name]
+    with get_metrics().time_stage("wordcloud_tokenize"):
+        wordcloud_words = await asyncio.to_thread(
+            frequencies_by_slice,
+            texts.astype(str).where(texts.notna()).tolist(),
+            df_analyzed["analysis_sentiment"].tolist(),
+        )
 
-    # ワードクラウド用の単語リストを3種類生成
-    all_texts = df_analyzed[column_name].dropna().astype(str).tolist()
-    words_all = tokenize_texts(all_texts)
+    summary["analysis_target"] = f"「{column_name}」列の回答"
 
-    pos_texts = (
-        df_analyzed[df_analyzed["analysis_sentiment"].isin(["positive", "neutral"])][
-            column_name
-        ]
-        .dropna()
-        .astype(str)
-        .tolist()
-    )
-    words_pos = tokenize_texts(pos_texts)
+    commentary = await generate_report_commentary(summary)
+    summary.update(commentary.model_dump())
 
-    neg_texts = (
-        df_analyzed[df_analyzed["analysis_sentiment"].isin(["negative", "neutral"])][
-            column_name
-        ]
-        .dropna()
-        .astype(str)
-        .tolist()
-    )
-    words_neg = tokenize_texts(neg_texts)
+    return summary, wordcloud_words
 
-    wordcloud_words = {
-        "all": words_all,
-        "positive": words_pos,
-        "negative": words_neg,
-    }
 
-    summary = {
-        "sentiment_counts": sentiment_counts,
-        "topic_counts": topic_counts.head(15),
-        "moderation_summary": moderation_summary,
-        "emotion_avg": emotion_avg,
-        "analysis_target": f"「{column_name}」列の回答",
-    }
+async def summarize_columns(
+    df_analyzed: pd.DataFrame, column_names: list[str]
+) -> dict[str, tuple]:
+    """Summarize each column of a multi-column analysis concurrently.
 
-    commentary = await generate_report_commentary(summary)
-    summary.update(commentary.model_dump())
+    Args:
+        df_analyzed: Result of :func:`analyze_dataframe` called with a list
+            of columns.
+        column_names: Analyzed columns.
 
-    return summary, wordcloud_words
+    Returns:
+        Mapping of column name to the ``(summary, wordcloud_words)`` pair of
+        :func:`summarize_results`.
+    """
+    results = await asyncio.gather(
+        *(
+            summarize_results(column_results(df_analyzed, col), col)
+            for col in column_names
+        )
+    )
+    return dict(zip(column_names, results))
@@ -0,0 +1,430 @@
+"""Offline analysis through OpenAI Batch API JSONL files.
+
+Large overnight runs do not need interactive latency. This module splits the
+work into three steps:
+
+1. :func:`export_batch_job` serializes every survey, emotion (or fused) and
+   moderation request of a DataFrame column into Batch API JSONL files plus a
+   ``manifest.json`` describing the job.
+2. :func:`submit_batch_job` and :func:`collect_batch_results` hand the files
+   to a backend and download the result files once they are complete. The
+   :class:`LocalBatchBackend` is a file-drop stand-in for testing;
+   :class:`OpenAIBatchBackend` talks to the real Batch API.
+3. :func:`ingest_batch_results` validates every result line against the
+   existing Pydantic models and returns the same columns as
+   :func:`analysis.analyze_dataframe`.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import shutil
+from pathlib import Path
+
+import pandas as pd
+from pydantic import BaseModel, ValidationError
+
+from analysis import (
+    ANALYSIS_MODEL,
+    ComprehensiveAnalysisResult,
+    EmotionScores,
+    FusedAnalysis,
+    SurveyResponseAnalysis,
+    build_emotion_messages,
+    build_fused_messages,
+    build_result_frame,
+    build_survey_messages,
+    empty_result,
+    error_result,
+    group_duplicates,
+    pretokenize_texts,
+    prompt_version,
+    to_moderation_result,
+)
+from checkpoint import cell_hash
+from config import settings
+
+CHAT_ENDPOINT = "/v1/chat/completions"
+MODERATION_ENDPOINT = "/v1/moderations"
+MANIFEST_NAME = "manifest.json"
+# Batch API の1ファイルあたりのリクエスト数上限
+MAX_REQUESTS_PER_FILE = 50_000
+
+_RESPONSE_MODELS: dict[str, type[BaseModel]] = {
+    "survey": SurveyResponseAnalysis,
+    "emotion": EmotionScores,
+    "fused": FusedAnalysis,
+}
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def _chat_request(custom_id: str, kind: str, messages: list[dict]) -> dict:
+    model = _RESPONSE_MODELS[kind]
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": CHAT_ENDPOINT,
+        "body": {
+            "model": ANALYSIS_MODEL,
+            "messages": messages,
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": model.__name__,
+                    "schema": model.model_json_schema(),
+                },
+            },
+        },
+    }
+
+
+def _write_jsonl_parts(
+    job_dir: Path, prefix: str, requests: list[dict], max_per_file: int
+) -> list[str]:
+    names = []
+    for part, start in enumerate(range(0, len(requests), max_per_file)):
+        name = f"{prefix}_{part:03d}.jsonl"
+        with open(job_dir / name, "w", encoding="utf-8") as f:
+            for request in requests[start : start + max_per_file]:
+                f.write(json.dumps(request, ensure_ascii=False) + "\n")
+        names.append(name)
+    return names
+
+
+def export_batch_job(
+    df: pd.DataFrame,
+    column_name: str,
+    job_dir: str | Path,
+    mode: str = "B",
+    fused: bool | None = None,
+    dedup: bool = True,
+    max_requests_per_file: int = MAX_REQUESTS_PER_FILE,
+) -> Path:
+    """Write Batch API request files for every response in a column.
+
+    Args:
+        df: Source DataFrame.
+        column_name: Column containing the text responses.
+        job_dir: Directory receiving the JSONL files and the manifest.
+        mode: SudachiPy split mode for the survey prompt.
+        fused: Request survey and emotion analysis in one completion.
+            Defaults to ``settings.FUSED_ANALYSIS``.
+        dedup: Only write one set of requests per distinct normalized text.
+        max_requests_per_file: Maximum number of lines per JSONL file.
+
+    Returns:
+        Path of the written ``manifest.json``.
+    """
+    if fused is None:
+        fused = settings.FUSED_ANALYSIS
+    job_dir = Path(job_dir)
+    job_dir.mkdir(parents=True, exist_ok=True)
+
+    texts = df[column_name].tolist()
+    if dedup:
+        members = group_duplicates(texts)
+    else:
+        members = {idx: [idx] for idx in range(len(texts))}
+
+    prompt_texts: dict[int, str] = {}
+    if not fused:
+        if settings.PRETOKENIZE_PROMPTS:
+            tokenized = pretokenize_texts(
+                [texts[idx] for idx in members], mode, settings.TOKENIZER_PROCESSES
+            )
+        else:
+            tokenized = [texts[idx] for idx in members]
+        prompt_texts = dict(zip(members, tokenized))
+
+    chat_requests: list[dict] = []
+    moderation_requests: list[dict] = []
+    for idx in members:
+        text = texts[idx]
+        if not isinstance(text, str) or not text.strip():
+            continue
+        if fused:
+            chat_requests.append(
+                _chat_request(f"fused-{idx}", "fused", build_fused_messages(text))
+            )
+        else:
+            chat_requests.append(
+                _chat_request(
+                    f"survey-{idx}",
+                    "survey",
+                    build_survey_messages(prompt_texts[idx]),
+                )
+            )
+            chat_requests.append(
+                _chat_request(f"emotion-{idx}", "emotion", build_emotion_messages(text))
+            )
+        moderation_requests.append(
+            {
+                "custom_id": f"moderation-{idx}",
+                "method": "POST",
+                "url": MODERATION_ENDPOINT,
+                "body": {"input": text},
+            }
+        )
+
+    manifest = {
+        "column_name": column_name,
+        "rows": len(texts),
+        "mode": mode,
+        "fused": fused,
+        "model": ANALYSIS_MODEL,
+        "prompt_version": prompt_version(),
+        "members": {str(rep): rows for rep, rows in members.items()},
+        # 取り込み時に入力の編集・並べ替えを検出するための各行のハッシュ
+        "hashes": [cell_hash(text) for text in texts],
+        "inputs": {
+            CHAT_ENDPOINT: _write_jsonl_parts(
+                job_dir, "chat_requests", chat_requests, max_requests_per_file
+            ),
+            MODERATION_ENDPOINT: _write_jsonl_parts(
+                job_dir, "moderation_requests", moderation_requests, max_requests_per_file
+            ),
+        },
+        "jobs": {},
+        "outputs": [],
+    }
+    manifest_path = job_dir / MANIFEST_NAME
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(
+        f"バッチジョブを '{job_dir}' に書き出しました "
+        f"(チャット {len(chat_requests)} 件, モデレーション {len(moderation_requests)} 件)。"
+    )
+    return manifest_path
+
+
+# --- Backends -----------------------------------------------------------------
+
+
+class LocalBatchBackend:
+    """File-drop stand-in for the Batch API.
+
+    Submitted files are copied to ``<root>/inbox/<job_id>.jsonl``. A job is
+    complete once a result file appears at ``<root>/outbox/<job_id>.jsonl``,
+    written by hand or by a test double in the Batch API output format.
+    """
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self.inbox = self.root / "inbox"
+        self.outbox = self.root / "outbox"
+        self.inbox.mkdir(parents=True, exist_ok=True)
+        self.outbox.mkdir(parents=True, exist_ok=True)
+
+    def submit(self, input_path: Path, endpoint: str) -> str:
+        job_id = f"{endpoint.strip('/').replace('/', '_')}-{Path(input_path).stem}"
+        shutil.copyfile(input_path, self.inbox / f"{job_id}.jsonl")
+        return job_id
+
+    def download(self, job_id: str, output_path: Path) -> bool:
+        result_path = self.outbox / f"{job_id}.jsonl"
+        if not result_path.exists():
+            return False
+        shutil.copyfile(result_path, output_path)
+        return True
+
+
+class OpenAIBatchBackend:
+    """Backend submitting files to the OpenAI Batch API."""
+
+    def __init__(self, client=None, completion_window: str = "24h") -> None:
+        if client is None:
+            from openai import OpenAI
+
+            client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, input_path: Path, endpoint: str) -> str:
+        with open(input_path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=endpoint,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def download(self, job_id: str, output_path: Path) -> bool:
+        batch = self.client.batches.retrieve(job_id)
+        if batch.status != "completed" or not batch.output_file_id:
+            return False
+        content = self.client.files.content(batch.output_file_id)
+        content.write_to_file(output_path)
+        return True
+
+
+def _load_manifest(job_dir: Path) -> dict:
+    with open(job_dir / MANIFEST_NAME, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(job_dir: Path, manifest: dict) -> None:
+    with open(job_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def submit_batch_job(job_dir: str | Path, backend) -> dict[str, str]:
+    """Submit every request file of a job not yet submitted.
+
+    Returns:
+        Mapping of input file name to backend job ID.
+    """
+    job_dir = Path(job_dir)
+    manifest = _load_manifest(job_dir)
+    for endpoint, names in manifest["inputs"].items():
+        for name in names:
+            if name not in manifest["jobs"]:
+                manifest["jobs"][name] = backend.submit(job_dir / name, endpoint)
+    _save_manifest(job_dir, manifest)
+    return manifest["jobs"]
+
+
+def collect_batch_results(job_dir: str | Path, backend) -> bool:
+    """Download finished result files.
+
+    Returns:
+        True once the results of every submitted file are available.
+    """
+    job_dir = Path(job_dir)
+    manifest = _load_manifest(job_dir)
+    for name, job_id in manifest["jobs"].items():
+        output_name = f"results_{name}"
+        if output_name in manifest["outputs"]:
+            continue
+        if backend.download(job_id, job_dir / output_name):
+            manifest["outputs"].append(output_name)
+    _save_manifest(job_dir, manifest)
+    submitted = sum(len(names) for names in manifest["inputs"].values())
+    return len(manifest["outputs"]) == submitted
+
+
+# --- Ingestion ------------------------------------------------------------------
+
+
+def _row_of(line: dict) -> int | None:
+    """Return the row ID in the ``custom_id`` of a line, or None if malformed."""
+    custom_id = line.get("custom_id")
+    if not isinstance(custom_id, str):
+        return None
+    row = custom_id.rpartition("-")[2]
+    return int(row) if row.isdigit() else None
+
+
+def _parse_line(line: dict) -> tuple[str, str, int, object]:
+    """Return ``(kind, error, row, payload)`` for one Batch API output line."""
+    kind, _, row = line["custom_id"].partition("-")
+    response = line.get("response") or {}
+    if line.get("error") or response.get("status_code") != 200:
+        error = line.get("error") or response.get("body", {}).get("error")
+        return kind, str(error or "バッチリクエストが失敗しました"), int(row), None
+
+    body = response["body"]
+    if kind == "moderation":
+        return kind, "", int(row), to_moderation_result(body["results"][0])
+    content = body["choices"][0]["message"]["content"] or ""
+    # 念のため Markdown のコードブロックで囲まれた JSON にも対応する
+    content = _FENCE_RE.sub("", content.strip())
+    return kind, "", int(row), _RESPONSE_MODELS[kind].model_validate_json(content)
+
+
+def ingest_batch_results(df: pd.DataFrame, job_dir: str | Path) -> pd.DataFrame:
+    """Build analysis columns from downloaded Batch API result files.
+
+    Every line is validated against the Pydantic models. Rows whose requests
+    failed, are missing or do not validate receive the standard error result,
+    as do rows whose text changed since the export, so that they are picked
+    up again by a re-analysis.
+
+    Args:
+        df: The DataFrame that was passed to :func:`export_batch_job`.
+        job_dir: Directory of the job.
+
+    Returns:
+        DataFrame with the same result columns as ``analyze_dataframe``.
+
+    Raises:
+        ValueError: If the row count differs from the export or the prompts
+            changed since the export.
+    """
+    job_dir = Path(job_dir)
+    manifest = _load_manifest(job_dir)
+    if len(df) != manifest["rows"]:
+        raise ValueError(
+            f"行数がバッチジョブと一致しません (ジョブ: {manifest['rows']}, 入力: {len(df)})"
+        )
+    if manifest["prompt_version"] != prompt_version():
+        raise ValueError(
+            "プロンプトがバッチジョブの書き出し後に変更されています "
+            f"(ジョブ: {manifest['prompt_version']}, 現在: {prompt_version()})"
+        )
+    texts = df[manifest["column_name"]].tolist()
+    stale = {
+        idx
+        for idx, (text, stored) in enumerate(zip(texts, manifest["hashes"]))
+        if cell_hash(text) != stored
+    }
+    if stale:
+        print(
+            f"バッチジョブの書き出し後に内容が変わった {len(stale)} 行は"
+            "分析エラーとして扱います。再分析してください。"
+        )
+
+    parts: dict[int, dict[str, object]] = {}
+    errors: dict[int, str] = {}
+    for output_name in manifest["outputs"]:
+        with open(job_dir / output_name, encoding="utf-8") as f:
+            for raw in f:
+                if not raw.strip():
+                    continue
+                line = json.loads(raw)
+                try:
+                    kind, error, row, payload = _parse_line(line)
+                except (KeyError, IndexError, ValueError, ValidationError) as e:
+                    row = _row_of(line)
+                    if row is None:
+                        # どの行の結果か分からないため読み飛ばす（該当行は結果なしになる）
+                        print(
+                            f"custom_id を解釈できない結果をスキップします: "
+                            f"{line.get('custom_id')!r} ({output_name})"
+                        )
+                        continue
+                    errors[row] = f"結果の検証に失敗しました: {e}"
+                    continue
+                if error:
+                    errors[row] = error
+                else:
+                    parts.setdefault(row, {})[kind] = payload
+
+    results: list[ComprehensiveAnalysisResult | None] = [None] * len(texts)
+    for rep_key, rows in manifest["members"].items():
+        rep = int(rep_key)
+        text = texts[rep]
+        got = parts.get(rep, {})
+        if not isinstance(text, str) or not text.strip():
+            result = empty_result()
+        elif "fused" in got and "moderation" in got:
+            result = ComprehensiveAnalysisResult(
+                survey_analysis=got["fused"].survey_analysis,
+                moderation_result=got["moderation"],
+                emotion_scores=got["fused"].emotion_scores,
+            )
+        elif {"survey", "emotion", "moderation"} <= got.keys():
+            result = ComprehensiveAnalysisResult(
+                survey_analysis=got["survey"],
+                moderation_result=got["moderation"],
+                emotion_scores=got["emotion"],
+            )
+        else:
+            result = error_result(errors.get(rep, "バッチ結果が見つかりません"))
+        for idx in rows:
+            results[idx] = result
+    stale_result = error_result("入力がバッチジョブの書き出し時から変更されています")
+    for idx in stale:
+        results[idx] = stale_result
+    return build_result_frame(df, results)
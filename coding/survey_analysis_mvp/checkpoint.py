@@ -0,0 +1,119 @@
+"""Append-only JSONL checkpoint for resumable analysis runs.
+
+The first line of the file holds job metadata (analyzed column and number of
+rows). Every following line stores one analyzed row as
+``{"row": <position>, "hash": <text hash>, "result": <json string>}``. Lines
+are flushed as they are written so a crash loses at most the chunk in
+progress; a truncated final line is ignored on resume.
+
+The hash of the analyzed text (see :func:`cell_hash`) lets a resumed job
+detect rows edited since they were written: only results whose hash matches
+the current text are reused, the other rows are analyzed again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+
+def cell_hash(text) -> str:
+    """Return the hash identifying the content of one analyzed cell."""
+    # 空欄 (NaN/None) は空文字列と同じく未回答として扱う
+    value = text if isinstance(text, str) else ""
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+
+
+class CheckpointStore:
+    """Reader/writer for a single checkpoint file."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    def open(self, column_name: str, rows: int) -> None:
+        """Create the checkpoint or verify that it belongs to the same job.
+
+        Raises:
+            ValueError: If an existing checkpoint was written for a different
+                column or number of rows.
+        """
+        header = {"column_name": column_name, "rows": rows}
+        if self.path.exists() and self.path.stat().st_size > 0:
+            with open(self.path, encoding="utf-8") as f:
+                existing = json.loads(f.readline())
+            if existing != header:
+                raise ValueError(
+                    f"チェックポイント '{self.path}' は別のジョブのものです: {existing}"
+                )
+            # 中断で改行が欠けた最終行の後ろに追記しないよう改行を補う
+            with open(self.path, "rb+") as f:
+                f.seek(-1, 2)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+
+    def iter_results(self) -> Iterator[tuple[int, str, str]]:
+        """Yield ``(row, text_hash, result_json)`` stored in the checkpoint."""
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            f.readline()  # ヘッダー行
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 書き込み途中で中断された最終行
+                    continue
+                yield record["row"], record["hash"], record["result"]
+
+    def valid_results(self, hashes: Sequence[str]) -> dict[int, str]:
+        """Return the stored results whose text hash matches ``hashes[row]``.
+
+        Args:
+            hashes: :func:`cell_hash` of the current text of every row.
+
+        Returns:
+            Mapping of row position to result JSON. When a row was written
+            more than once, the last matching result wins.
+        """
+        return {
+            row: result
+            for row, stored_hash, result in self.iter_results()
+            if row < len(hashes) and stored_hash == hashes[row]
+        }
+
+    def completed_rows(self, hashes: Sequence[str]) -> tuple[set[int], set[int]]:
+        """Return the stored row positions without keeping their results.
+
+        Args:
+            hashes: :func:`cell_hash` of the current text of every row.
+
+        Returns:
+            ``(done, stale)``: rows stored with a hash matching ``hashes[row]``,
+            and rows stored only with a hash of an earlier text.
+        """
+        done: set[int] = set()
+        stored: set[int] = set()
+        for row, stored_hash, _ in self.iter_results():
+            stored.add(row)
+            if row < len(hashes) and stored_hash == hashes[row]:
+                done.add(row)
+        return done, stored - done
+
+    def append(self, records: Iterable[tuple[int, str, str]]) -> None:
+        """Append ``(row, text_hash, result_json)`` records and flush them."""
+        with open(self.path, "a", encoding="utf-8") as f:
+            for row, hash_, result in records:
+                f.write(
+                    json.dumps(
+                        {"row": row, "hash": hash_, "result": result},
+                        ensure_ascii=False,
+                    )
+                    + "\n"
+                )
+            f.flush()
@@ -0,0 +1,325 @@
+"""Headless command-line entry point for batch analysis.
+
+Every combination of input file and sheet forms one job that analyzes all
+target columns in a single run. All jobs run concurrently in one event loop
+and share a single concurrency limiter and result cache, so the total number
+of in-flight API requests stays within one budget. Each job writes its
+analyzed Excel (or Parquet) file and, per column, a summary PDF and word
+clouds to the output directory. Metrics of all API calls of the run
+(the registry is reset when :func:`run_jobs` starts) are written there as
+``metrics.json`` and ``metrics.prom`` (Prometheus text format).
+
+Example::
+
+    python cli.py 営業部.xlsx 開発部.xlsx --column 改善点 --column 良い点 \\
+        --output-dir output/batch --max-concurrency 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from analysis import (
+    analyze_dataframe,
+    create_limiter,
+    open_result_cache,
+    summarize_columns,
+    summarize_results,
+)
+from concurrency import AdaptiveConcurrencyLimiter
+from config import settings
+from exporting import require_pyarrow, safe_file_name, save_analysis
+from metrics import get_metrics
+from loading import (
+    EXCEL_SUFFIXES,
+    load_columns,
+    load_previous_analysis,
+    restore_input_columns,
+)
+from result_cache import ResultCache
+
+WORDCLOUD_KINDS = ("all", "positive", "negative")
+
+
+@dataclass
+class Job:
+    """The text columns of one sheet to analyze.
+
+    Attributes:
+        name: Base name of the output files. Defaults to the file stem plus
+            the sheet name; :func:`build_jobs` makes it unique per run.
+    """
+
+    path: Path
+    sheet: str | int
+    columns: list[str]
+    outputs: list[Path] = field(default_factory=list)
+    name: str = ""
+
+    def __post_init__(self) -> None:
+        if not self.name:
+            sheet = "" if self.sheet == 0 else f"_{self.sheet}"
+            self.name = safe_file_name(f"{self.path.stem}{sheet}")
+
+
+def build_jobs(paths: list[str], sheets: list[str], columns: list[str]) -> list[Job]:
+    """Return one job per file and sheet, each covering all ``columns``.
+
+    Without ``sheets`` the first sheet of each file is used. CSV and
+    Parquet files have no sheets and always form a single job. Jobs whose
+    output names would collide (``a/survey.xlsx`` and ``b/survey.csv``) get
+    a numbered suffix in input order.
+    """
+    jobs = []
+    for path in map(Path, paths):
+        is_excel = path.suffix.lower() in (*EXCEL_SUFFIXES, ".xls")
+        for sheet in (sheets if is_excel else []) or [0]:
+            jobs.append(Job(path, sheet, list(columns)))
+
+    # 別フォルダの同名ファイルなどの出力が上書きし合わないよう連番を付ける
+    # （大文字小文字を区別しないファイルシステムでも衝突しないよう比較する）
+    used: set[str] = set()
+    for job in jobs:
+        base, number = job.name, 1
+        while job.name.lower() in used:
+            number += 1
+            job.name = f"{base}_{number}"
+        if job.name != base:
+            print(f"出力名 '{base}' が重複するため、{job.path} の出力名を '{job.name}' にします。")
+        used.add(job.name.lower())
+    return jobs
+
+
+async def run_job(
+    job: Job,
+    output_dir: Path,
+    limiter: AdaptiveConcurrencyLimiter,
+    cache: ResultCache | None,
+    render_lock: asyncio.Lock,
+    wordclouds: list[str],
+    pdf: bool = True,
+    output_format: str = "xlsx",
+    previous_dir: Path | None = None,
+) -> dict:
+    """Analyze one job and write its artifacts.
+
+    When ``previous_dir`` holds this job's result file from an earlier run,
+    only responses that are new or changed since then are analyzed.
+
+    Returns:
+        The run report of :func:`analysis.analyze_dataframe`.
+    """
+    # 分析対象の列だけを読み込む（存在しない列は ValueError）
+    df = await asyncio.to_thread(load_columns, job.path, job.columns, job.sheet)
+
+    previous = None
+    if previous_dir is not None:
+        candidates = [
+            previous_dir / f"{job.name}{suffix}" for suffix in (".xlsx", ".parquet")
+        ]
+        previous_path = next((path for path in candidates if path.exists()), None)
+        if previous_path is not None:
+            previous = await asyncio.to_thread(
+                load_previous_analysis, previous_path, job.columns
+            )
+
+    run_report: dict = {}
+    single = len(job.columns) == 1
+    df_analyzed = await analyze_dataframe(
+        df,
+        job.columns[0] if single else job.columns,
+        cache=cache,
+        limiter=limiter,
+        run_report=run_report,
+        previous=previous,
+    )
+    result_path = output_dir / f"{job.name}.{output_format}"
+    # 分析しなかった列（ID・部署など）も入力ファイルから読み直して一緒に保存する
+    df_output = await asyncio.to_thread(
+        restore_input_columns, df_analyzed, job.path, job.sheet
+    )
+    await asyncio.to_thread(save_analysis, df_output, str(result_path))
+    job.outputs.append(result_path)
+
+    if not pdf and not wordclouds:
+        return run_report
+    if single:
+        summaries = {
+            job.columns[0]: await summarize_results(df_analyzed, job.columns[0])
+        }
+    else:
+        summaries = await summarize_columns(df_analyzed, job.columns)
+
+    from reporting import generate_pdf_reports, generate_wordcloud
+
+    # matplotlib はスレッドセーフではないため描画は1ジョブずつ行う
+    async with render_lock:
+        reports = []
+        for column, (summary_data, wordcloud_words) in summaries.items():
+            if summary_data is None:
+                continue
+            stem = f"{job.name}_{safe_file_name(column)}"
+            if pdf:
+                pdf_path = output_dir / f"{stem}.pdf"
+                reports.append((summary_data, str(pdf_path)))
+                job.outputs.append(pdf_path)
+            for kind in wordclouds:
+                wc_path = output_dir / f"{stem}_wordcloud_{kind}.png"
+                await asyncio.to_thread(
+                    generate_wordcloud, wordcloud_words[kind], str(wc_path)
+                )
+                job.outputs.append(wc_path)
+        # 全列のグラフをプロセスプールでまとめて描画する
+        if reports:
+            await asyncio.to_thread(generate_pdf_reports, reports)
+    return run_report
+
+
+async def run_jobs(
+    jobs: list[Job],
+    output_dir: Path,
+    max_concurrency: int | None = None,
+    wordclouds: list[str] | None = None,
+    pdf: bool = True,
+    output_format: str = "xlsx",
+    previous_dir: Path | None = None,
+) -> list[BaseException | dict]:
+    """Run all jobs concurrently under one concurrency limiter and cache.
+
+    Returns:
+        For each job, its run report or the exception it raised.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    # 同じプロセスで続けて実行しても計測結果が混ざらないよう実行ごとに集計し直す
+    get_metrics().reset()
+    limiter = create_limiter(max_concurrency)
+    cache = open_result_cache()
+    render_lock = asyncio.Lock()
+    try:
+        return await asyncio.gather(
+            *(
+                run_job(
+                    job,
+                    output_dir,
+                    limiter,
+                    cache,
+                    render_lock,
+                    wordclouds or [],
+                    pdf,
+                    output_format,
+                    previous_dir,
+                )
+                for job in jobs
+            ),
+            return_exceptions=True,
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="アンケートの自由回答をGUIなしで一括分析します。"
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="分析するファイル（Excel / CSV / Parquet）"
+    )
+    parser.add_argument(
+        "--column", "-c", action="append", required=True, help="分析対象の列（複数指定可）"
+    )
+    parser.add_argument(
+        "--sheet", "-s", action="append", default=[], help="Excelのシート名（複数指定可、省略時は先頭シート）"
+    )
+    parser.add_argument(
+        "--output-dir", "-o", default="output", help="成果物の出力先フォルダ"
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=settings.MAX_CONCURRENT_TASKS,
+        help="全ジョブ共通のAPI同時実行数（初期値）",
+    )
+    parser.add_argument(
+        "--wordcloud",
+        action="append",
+        choices=WORDCLOUD_KINDS,
+        default=[],
+        help="生成するワードクラウドの種類（複数指定可）",
+    )
+    parser.add_argument("--no-pdf", action="store_true", help="PDFレポートを生成しない")
+    parser.add_argument(
+        "--format",
+        choices=("xlsx", "parquet"),
+        default="xlsx",
+        help="分析結果ファイルの形式（parquet はトピックをリスト列のまま保存）",
+    )
+    parser.add_argument(
+        "--previous-dir",
+        help="前回の出力先フォルダ。同名の分析結果があれば新規・変更された回答だけを分析する",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    if not settings.OPENAI_API_KEY:
+        print("エラー: OPENAI_API_KEYが設定されていません。")
+        return 2
+
+    if args.format == "parquet":
+        # 分析を終えてから保存で失敗しないよう、先に確認する
+        try:
+            require_pyarrow()
+        except RuntimeError as e:
+            print(f"エラー: {e}")
+            return 2
+
+    jobs = build_jobs(args.inputs, args.sheet, args.column)
+    results = asyncio.run(
+        run_jobs(
+            jobs,
+            Path(args.output_dir),
+            max_concurrency=args.max_concurrency,
+            wordclouds=args.wordcloud,
+            pdf=not args.no_pdf,
+            output_format=args.format,
+            previous_dir=Path(args.previous_dir) if args.previous_dir else None,
+        )
+    )
+
+    failed = 0
+    for job, result in zip(jobs, results):
+        if isinstance(result, BaseException):
+            failed += 1
+            print(f"[失敗] {job.name}: {result}")
+        else:
+            print(
+                f"[完了] {job.name}: {result.get('rows', 0)} 行"
+                f"（API送信 {result.get('dispatched', 0)} 件、"
+                f"前回結果の再利用 {result.get('reused', 0)} 件、"
+                f"類似回答の統合 {result.get('near_duplicates', 0)} 件）"
+            )
+            for path in job.outputs:
+                print(f"    {path}")
+
+    metrics = get_metrics()
+    output_dir = Path(args.output_dir)
+    metrics.to_json(output_dir / "metrics.json")
+    metrics.to_prometheus_file(output_dir / "metrics.prom")
+    totals = metrics.snapshot()["totals"]
+    print(
+        f"[計測] API呼び出し {totals['requests']} 件（失敗 {totals['failures']} 件、"
+        f"再送 {totals['retries']} 件）、トークン 入力 {totals['prompt_tokens']} / "
+        f"出力 {totals['completion_tokens']}、推定コスト ${totals['cost_usd']:.4f}"
+    )
+    print(f"    {output_dir / 'metrics.json'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""Adaptive concurrency control for OpenAI API requests.
+
+:class:`AdaptiveConcurrencyLimiter` is a drop-in replacement for
+``asyncio.Semaphore`` whose limit follows an AIMD (additive increase,
+multiplicative decrease) policy: it grows while requests succeed with healthy
+latency and shrinks when rate limits or errors are observed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import weakref
+from collections import deque
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD-controlled concurrency limiter usable as an async context manager.
+
+    Attributes:
+        limit: Current (fractional) concurrency limit.
+        trajectory: ``(elapsed_seconds, limit)`` pairs recorded whenever the
+            integer limit changes, for tuning and run reports.
+    """
+
+    def __init__(
+        self,
+        initial: int = 5,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        error_rate_threshold: float = 0.2,
+        window: int = 20,
+    ) -> None:
+        """Create a limiter.
+
+        Args:
+            initial: Starting concurrency.
+            min_limit: Lower bound for the limit.
+            max_limit: Upper bound for the limit.
+            increase_step: Amount added to the limit after a full window of
+                healthy requests (the limit grows by ``step / limit`` per
+                success).
+            decrease_factor: Multiplier applied on rate limits or errors.
+            latency_tolerance: A success slower than this multiple of the
+                baseline latency does not raise the limit.
+            error_rate_threshold: Error rate over the recent window above
+                which the limit is decreased.
+            window: Number of recent outcomes used for the error rate.
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.error_rate_threshold = error_rate_threshold
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._baseline_latency: float | None = None
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = float("-inf")
+        self._conditions: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Condition
+        ] = weakref.WeakKeyDictionary()
+        self._start = time.monotonic()
+        self.trajectory: list[tuple[float, int]] = [(0.0, int(self.limit))]
+
+    @property
+    def in_flight(self) -> int:
+        """Number of holders currently inside the limiter."""
+        return self._in_flight
+
+    def _get_condition(self) -> asyncio.Condition:
+        # asyncio.Condition は最初に使われたイベントループに結び付くため、
+        # asyncio.run のたびに新しいループで使われてもよいようループごとに生成する
+        loop = asyncio.get_running_loop()
+        condition = self._conditions.get(loop)
+        if condition is None:
+            condition = self._conditions[loop] = asyncio.Condition()
+        return condition
+
+    async def acquire(self) -> None:
+        """Wait until a slot is available under the current limit."""
+        condition = self._get_condition()
+        async with condition:
+            while True:
+                delay = self._paused_until - time.monotonic()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(condition.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self._in_flight < int(self.limit):
+                    break
+                await condition.wait()
+            self._in_flight += 1
+
+    async def release(self) -> None:
+        """Release a slot acquired with :meth:`acquire`."""
+        condition = self._get_condition()
+        async with condition:
+            self._in_flight -= 1
+            condition.notify_all()
+
+    async def __aenter__(self) -> "AdaptiveConcurrencyLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.release()
+
+    # Feedback -------------------------------------------------------------
+    def record_success(self, latency: float) -> None:
+        """Report a successful request and its latency in seconds."""
+        self._outcomes.append(True)
+        if self._baseline_latency is None:
+            self._baseline_latency = latency
+        else:
+            # 指数移動平均でベースラインを緩やかに追従させる
+            self._baseline_latency = 0.9 * self._baseline_latency + 0.1 * latency
+        if latency > self._baseline_latency * self.latency_tolerance:
+            return
+        self._set_limit(self.limit + self.increase_step / self.limit)
+
+    def record_failure(
+        self, rate_limited: bool = False, retry_after: float | None = None
+    ) -> None:
+        """Report a failed request.
+
+        Args:
+            rate_limited: True for HTTP 429 / rate-limit errors, which always
+                trigger a decrease.
+            retry_after: Seconds suggested by the server before retrying. New
+                requests are held back for that long.
+        """
+        self._outcomes.append(False)
+        now = time.monotonic()
+        if retry_after:
+            self.pause(retry_after)
+        errors = self._outcomes.count(False)
+        error_rate = errors / len(self._outcomes)
+        if not rate_limited and error_rate <= self.error_rate_threshold:
+            return
+        # 同時に失敗した複数リクエストで何度も縮小しないよう、
+        # 直近の縮小から基準レイテンシ分は再縮小しない
+        cooldown = self._baseline_latency or 1.0
+        if now - self._last_decrease < cooldown:
+            return
+        self._last_decrease = now
+        self._set_limit(self.limit * self.decrease_factor)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back new requests for ``seconds`` without changing the limit."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _set_limit(self, value: float) -> None:
+        previous = int(self.limit)
+        self.limit = min(max(value, float(self.min_limit)), float(self.max_limit))
+        if int(self.limit) != previous:
+            # 待機中のタスクは次の release() で新しい上限を再評価する
+            self.trajectory.append(
+                (round(time.monotonic() - self._start, 3), int(self.limit))
+            )
+
+
+async def run_worker_pool(
+    items: Iterable[T],
+    handle: Callable[[T], Awaitable[None]],
+    worker_count: int,
+    queue_size: int | None = None,
+) -> None:
+    """Process ``items`` with a fixed number of consumer coroutines.
+
+    A producer pulls from ``items`` lazily and feeds a bounded
+    ``asyncio.Queue``; ``worker_count`` consumers call ``handle`` for each
+    item. Memory and scheduler overhead therefore scale with the number of
+    workers instead of the number of items.
+
+    Args:
+        items: Work items, consumed lazily in order.
+        handle: Coroutine function processing one item.
+        worker_count: Number of consumer coroutines.
+        queue_size: Maximum number of queued items. Defaults to twice the
+            number of workers.
+
+    Raises:
+        Exception: The first exception raised by ``handle``; all other
+            workers are cancelled.
+    """
+    worker_count = max(1, worker_count)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or worker_count * 2)
+    stop = object()
+
+    async def producer() -> None:
+        for item in items:
+            await queue.put(item)
+        for _ in range(worker_count):
+            await queue.put(stop)
+
+    async def worker() -> None:
+        while True:
+            item = await queue.get()
+            if item is stop:
+                return
+            await handle(item)
+
+    tasks = [asyncio.create_task(producer())]
+    tasks += [asyncio.create_task(worker()) for _ in range(worker_count)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # 例外で中断した場合に残りのタスクを放置しない
+        for task in tasks:
+            task.cancel()
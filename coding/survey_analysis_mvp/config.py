@@ -1,12 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
-# Google Cloud Secret Managerクライアントをインポート
-# pip install google-cloud-secret-manager
-try:
-    from google.cloud import secretmanager
-except ImportError:  # pragma: no cover - optional dependency
-    secretmanager = None
 
 class AppSettings(BaseSettings):
     # .envファイルからの読み込みを有効にする
@@ -19,6 +13,38 @@ class AppSettings(BaseSettings):
     # .envファイルまたはSecret Managerから取得する値
     OPENAI_API_KEY: Optional[str] = None
     MAX_CONCURRENT_TASKS: int = 5
+    # 成功率とレイテンシに応じて同時実行数を自動調整する (AIMD)
+    ADAPTIVE_CONCURRENCY: bool = True
+    MIN_CONCURRENT_TASKS: int = 1
+    MAX_CONCURRENCY_LIMIT: int = 50
+    # OpenAI APIの1分あたりのリクエスト数/トークン数の上限（未設定なら制限しない）
+    RPM_LIMIT: Optional[int] = None
+    TPM_LIMIT: Optional[int] = None
+    MODERATION_RPM_LIMIT: Optional[int] = None
+    # レート制限(429)・サーバーエラー・接続エラー時に再送する回数（openai クライアント自体は再送しない）
+    API_MAX_RETRIES: int = 2
+    # Trueの場合、アンケート分析と感情分析を1回のAPI呼び出しで取得する
+    FUSED_ANALYSIS: bool = False
+    # 1回のAPI呼び出しにまとめる回答数の上限（1の場合はバッチ化しない）
+    BATCH_SIZE: int = 1
+    # 1バッチあたりの推定トークン数（システムプロンプトとスキーマを含む入力+出力）の上限
+    BATCH_MAX_TOKENS: int = 6000
+    # Trueの場合、アンケート分析のプロンプトにSudachiで分かち書きした回答を送る（Falseなら原文のまま）
+    PRETOKENIZE_PROMPTS: bool = True
+    # 分かち書きの並列プロセス数（未設定の場合はCPUコア数）
+    TOKENIZER_PROCESSES: Optional[int] = None
+    # Trueの場合、表記ゆれや一語違い程度の類似回答（MinHash/LSHで判定）は代表の1件だけを分析して結果を共有する
+    NEAR_DEDUP: bool = False
+    # 類似回答とみなす文字n-gramのJaccard係数の下限と、n-gramの文字数
+    NEAR_DEDUP_THRESHOLD: float = 0.8
+    NEAR_DEDUP_NGRAM: int = 2
+    # コスト見積もりに使う100万トークンあたりの料金（米ドル、初期値は gpt-4o-mini）
+    PROMPT_PRICE_PER_MTOK: float = 0.15
+    COMPLETION_PRICE_PER_MTOK: float = 0.60
+    # 分析結果キャッシュ(SQLite)のパス。未設定の場合はキャッシュを使わない
+    RESULT_CACHE_PATH: Optional[str] = None
+    RESULT_CACHE_MAX_ENTRIES: int = 500_000
+    RESULT_CACHE_MAX_AGE_DAYS: float = 90.0
 
     def __init__(self, **values):
         super().__init__(**values)
@@ -27,7 +53,11 @@ class AppSettings(BaseSettings):
 
     def _load_secrets_from_gcp(self):
         """本番環境の場合、GCP Secret Managerから機密情報を読み込む"""
-        if secretmanager is None:
+        # Google Cloud Secret Managerクライアントは本番環境でのみ読み込む
+        # pip install google-cloud-secret-manager
+        try:
+            from google.cloud import secretmanager
+        except ImportError:  # pragma: no cover - optional dependency
             raise RuntimeError(
                 "google-cloud-secret-manager is required to load secrets from GCP"
             )
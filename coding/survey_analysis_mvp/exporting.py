@@ -0,0 +1,161 @@
+"""Writing analysis results to files, shared by the GUI and the CLI.
+
+Excel files are written with openpyxl's write-only workbook in row chunks,
+so the writer keeps constant memory regardless of the number of rows.
+Parquet files keep ``analysis_key_topics`` as a native list column.
+
+This module has no Tk dependency so it can be used in headless runs.
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import pandas as pd
+
+KEY_TOPICS_SUFFIX = "analysis_key_topics"
+# Arrow が1つの型として保存できる object 列の推定型（それ以外は文字列にする）
+ARROW_OBJECT_TYPES = (
+    "string",
+    "empty",
+    "boolean",
+    "integer",
+    "floating",
+    "mixed-integer-float",
+    "decimal",
+    "datetime",
+    "date",
+)
+# 1回に Python オブジェクトへ変換する行数（書き込み中のメモリ使用量の上限になる）
+EXCEL_CHUNK_ROWS = 10_000
+# Excel の1シートの上限（見出し行を含む行数と列数）
+EXCEL_MAX_ROWS = 1_048_576
+EXCEL_MAX_COLUMNS = 16_384
+
+
+def safe_file_name(name: str) -> str:
+    """Return ``name`` with characters invalid in file names replaced by ``_``."""
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", name)
+
+
+def _key_topic_columns(df: pd.DataFrame) -> list[str]:
+    # 複数列分析の "列名_analysis_key_topics" も対象にする
+    return [c for c in df.columns if str(c).endswith(KEY_TOPICS_SUFFIX)]
+
+
+def expand_key_topic_columns(
+    df: pd.DataFrame, column: str = KEY_TOPICS_SUFFIX
+) -> pd.DataFrame:
+    """Convert list-based key topics column into separate columns."""
+    if column not in df.columns:
+        return df
+    # 行ごとに Series を作らず、リストのリストから1回で DataFrame を構築する
+    topics = [x if isinstance(x, list) else [] for x in df[column]]
+    topics_expanded = pd.DataFrame(topics, index=df.index)
+    if topics_expanded.empty:
+        return df.drop(columns=[column])
+    topics_expanded.columns = [
+        f"{column}_{i+1}" for i in range(len(topics_expanded.columns))
+    ]
+    return pd.concat([df.drop(columns=[column]), topics_expanded], axis=1)
+
+
+def _excel_values(column: pd.Series) -> list:
+    # 欠損値は空セルにし、リストなど Excel に書けない値は文字列にする
+    values = column.astype(object).where(column.notna(), None)
+    if column.dtype == object:
+        return [str(v) if isinstance(v, (list, tuple, dict, set)) else v for v in values]
+    return values.tolist()
+
+
+def write_excel(
+    df: pd.DataFrame, path: str | Path, chunk_rows: int = EXCEL_CHUNK_ROWS
+) -> None:
+    """Write ``df`` to a single-sheet ``.xlsx`` file without the index.
+
+    Rows are converted and appended ``chunk_rows`` at a time to a write-only
+    workbook, which streams them to disk instead of keeping cell objects.
+
+    Raises:
+        ValueError: If ``df`` with its header row does not fit in one Excel
+            sheet (``EXCEL_MAX_ROWS`` rows, ``EXCEL_MAX_COLUMNS`` columns).
+    """
+    # 上限を超えると書き込み専用ブックは壊れたファイルを作るため、書き込む前に確認する
+    rows, columns = len(df) + 1, len(df.columns)
+    if rows > EXCEL_MAX_ROWS or columns > EXCEL_MAX_COLUMNS:
+        raise ValueError(
+            f"This sheet is too large! Your sheet size is: {rows}, {columns} "
+            f"Max sheet size is: {EXCEL_MAX_ROWS}, {EXCEL_MAX_COLUMNS}"
+        )
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append([str(c) for c in df.columns])
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start : start + chunk_rows]
+        columns = [_excel_values(chunk[c]) for c in chunk.columns]
+        for row in zip(*columns):
+            sheet.append(row)
+    workbook.save(path)
+
+
+def save_analysis_excel(df_analyzed: pd.DataFrame, path: str | Path) -> None:
+    """Save analyzed rows to Excel with the key topics split into columns.
+
+    Every ``*analysis_key_topics`` column is expanded, including the
+    prefixed columns of a multi-column analysis.
+    """
+    for column in _key_topic_columns(df_analyzed):
+        df_analyzed = expand_key_topic_columns(df_analyzed, column)
+    write_excel(df_analyzed, path)
+
+
+def require_pyarrow() -> None:
+    """Raise a readable error if ``pyarrow`` (needed for Parquet) is missing.
+
+    Raises:
+        RuntimeError: If ``pyarrow`` cannot be imported.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError(
+            "Parquet 形式の読み書きには pyarrow が必要です。"
+            "`pip install pyarrow` でインストールしてください。"
+        ) from e
+
+
+def save_analysis_parquet(df_analyzed: pd.DataFrame, path: str | Path) -> None:
+    """Save analyzed rows to Parquet, keeping key topics as list columns.
+
+    Object columns holding values of several types (e.g. numbers and text
+    in an input column) are stored as text, since Arrow columns need a
+    single type.
+
+    Raises:
+        RuntimeError: If ``pyarrow`` is not installed.
+    """
+    require_pyarrow()
+    df = df_analyzed.copy()
+    topic_columns = _key_topic_columns(df)
+    for column in df.columns:
+        series = df[column]
+        if column in topic_columns:
+            df[column] = [x if isinstance(x, list) else [] for x in series]
+        elif (
+            series.dtype == object
+            and pd.api.types.infer_dtype(series, skipna=True) not in ARROW_OBJECT_TYPES
+        ):
+            df[column] = series.where(series.isna(), series.astype(str))
+    df.columns = [str(c) for c in df.columns]
+    df.to_parquet(path, index=False)
+
+
+def save_analysis(df_analyzed: pd.DataFrame, path: str | Path) -> None:
+    """Save analyzed rows as Parquet or Excel depending on the file suffix."""
+    if Path(path).suffix.lower() == ".parquet":
+        save_analysis_parquet(df_analyzed, path)
+    else:
+        save_analysis_excel(df_analyzed, path)
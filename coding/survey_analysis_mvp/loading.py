@@ -0,0 +1,230 @@
+"""Reading survey responses from Excel, CSV and Parquet files.
+
+Loading happens in two steps so the GUI stays responsive on large exports:
+:func:`list_columns` reads only the header, and :func:`load_columns` reads
+just the columns chosen for analysis. The remaining input columns (IDs,
+departments, dates, ...) are read again only when the result is saved, by
+:func:`restore_input_columns`. ``.xlsx`` files are streamed row by
+row with openpyxl in read-only mode, so cells of other columns are never
+converted into pandas objects. Both functions block and are meant to run in
+a worker thread.
+
+This module has no Tk dependency so it can be used in headless runs.
+"""
+
+from __future__ import annotations
+
+import re
+from operator import itemgetter
+from pathlib import Path
+from typing import Sequence
+
+import pandas as pd
+
+from analysis import DUPLICATE_CLUSTER_COLUMN, RESULT_COLUMN_NAMES
+from exporting import KEY_TOPICS_SUFFIX, require_pyarrow
+
+EXCEL_SUFFIXES = (".xlsx", ".xlsm")
+SUPPORTED_SUFFIXES = (*EXCEL_SUFFIXES, ".xls", ".csv", ".parquet")
+# Excel から書き出した CSV は Shift_JIS (cp932) のことが多いため順に試す
+CSV_ENCODINGS = ("utf-8-sig", "cp932")
+
+
+def _suffix(path: str | Path) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix not in SUPPORTED_SUFFIXES:
+        raise ValueError(f"対応していないファイル形式です: {suffix or path}")
+    return suffix
+
+
+def _header_names(values: Sequence) -> list[str]:
+    # pandas.read_excel と同じく空の見出しは "Unnamed: n"、重複は "列名.1" とする
+    names: list[str] = []
+    seen: dict[str, int] = {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is None or value == "" else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+
+def _open_worksheet(path: str | Path, sheet: str | int):
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    worksheet = workbook.worksheets[sheet] if isinstance(sheet, int) else workbook[sheet]
+    return workbook, worksheet
+
+
+def _read_header(worksheet) -> list[str]:
+    return _header_names(next(worksheet.iter_rows(max_row=1, values_only=True), ()))
+
+
+def _read_csv(path: str | Path, **kwargs) -> pd.DataFrame:
+    for encoding in CSV_ENCODINGS[:-1]:
+        try:
+            return pd.read_csv(path, encoding=encoding, **kwargs)
+        except UnicodeDecodeError:
+            continue
+    return pd.read_csv(path, encoding=CSV_ENCODINGS[-1], **kwargs)
+
+
+def list_columns(path: str | Path, sheet: str | int = 0) -> list[str]:
+    """Return the column names of a survey file without reading its rows.
+
+    Args:
+        path: ``.xlsx``/``.xlsm``/``.xls``, ``.csv`` or ``.parquet`` file.
+        sheet: Sheet name or index for Excel files.
+    """
+    suffix = _suffix(path)
+    if suffix in EXCEL_SUFFIXES:
+        workbook, worksheet = _open_worksheet(path, sheet)
+        try:
+            return _read_header(worksheet)
+        finally:
+            workbook.close()
+    if suffix == ".csv":
+        return [str(c) for c in _read_csv(path, nrows=0).columns]
+    if suffix == ".parquet":
+        require_pyarrow()
+        import pyarrow.parquet as pq
+
+        return list(pq.read_schema(path).names)
+    return [str(c) for c in pd.read_excel(path, sheet_name=sheet, nrows=0).columns]
+
+
+def _stream_excel_columns(
+    path: str | Path, columns: list[str], sheet: str | int
+) -> pd.DataFrame:
+    workbook, worksheet = _open_worksheet(path, sheet)
+    try:
+        names = _read_header(worksheet)
+        missing = [c for c in columns if c not in names]
+        if missing:
+            raise ValueError(f"列が見つかりません: {', '.join(missing)}")
+        indices = [names.index(c) for c in columns]
+        pick = itemgetter(*indices)
+        # 読み取り専用モードでは必要な列の範囲だけセルを生成する（不足分は None で埋まる）。
+        # 他の列にだけ値がある末尾の行も回答者として残すため、行の範囲は選択した列の
+        # 内容ではなくシートの使用範囲（dimension）で決める
+        rows = worksheet.iter_rows(
+            min_row=2,
+            max_row=worksheet.max_row,
+            max_col=max(indices) + 1,
+            values_only=True,
+        )
+        if len(indices) == 1:
+            data = [(pick(row),) for row in rows]
+        else:
+            data = [pick(row) for row in rows]
+    finally:
+        workbook.close()
+    return pd.DataFrame(data, columns=columns)
+
+
+def load_columns(
+    path: str | Path, columns: Sequence[str], sheet: str | int = 0
+) -> pd.DataFrame:
+    """Read only ``columns`` of a survey file.
+
+    Args:
+        path: ``.xlsx``/``.xlsm``/``.xls``, ``.csv`` or ``.parquet`` file.
+        columns: Column names as returned by :func:`list_columns`.
+        sheet: Sheet name or index for Excel files.
+
+    Returns:
+        DataFrame with ``columns`` in the given order and a default index.
+
+    Raises:
+        ValueError: If a column does not exist or the format is unsupported.
+        RuntimeError: If a Parquet file is given and ``pyarrow`` is missing.
+    """
+    columns = list(columns)
+    suffix = _suffix(path)
+    if suffix in EXCEL_SUFFIXES:
+        return _stream_excel_columns(path, columns, sheet)
+
+    available = list_columns(path, sheet)
+    missing = [c for c in columns if c not in available]
+    if missing:
+        raise ValueError(f"列が見つかりません: {', '.join(missing)}")
+    if suffix == ".csv":
+        df = _read_csv(path, usecols=lambda c: str(c) in columns)
+    elif suffix == ".parquet":
+        df = pd.read_parquet(path, columns=columns)
+    else:
+        df = pd.read_excel(path, sheet_name=sheet, usecols=lambda c: str(c) in columns)
+    df.columns = [str(c) for c in df.columns]
+    return df[columns].reset_index(drop=True)
+
+
+# 分析で追加される結果列の名前（複数列の分析では "<列名>_" が前に付く）
+RESULT_COLUMNS = (*RESULT_COLUMN_NAMES, DUPLICATE_CLUSTER_COLUMN)
+# Excel ではトピックの一覧が "analysis_key_topics_1", "_2", ... の列に分けて保存される
+_KEY_TOPIC_COLUMN = re.compile(rf"(?:^|_){KEY_TOPICS_SUFFIX}_\d+$")
+
+
+def is_result_column(name: str) -> bool:
+    """Return True if ``name`` is a result column added by the analysis."""
+    if _KEY_TOPIC_COLUMN.search(name):
+        return True
+    return any(name == c or name.endswith(f"_{c}") for c in RESULT_COLUMNS)
+
+
+def restore_input_columns(
+    df_analyzed: pd.DataFrame, path: str | Path, sheet: str | int = 0
+) -> pd.DataFrame:
+    """Add the input columns that were not analyzed back to an analysis.
+
+    The columns are re-read from the source file and placed in their
+    original order, followed by the result columns. Result columns of an
+    earlier analysis contained in the input are not carried over; other
+    columns are kept even if their names resemble result columns.
+
+    Args:
+        df_analyzed: Result of analyzing columns loaded with
+            :func:`load_columns` from ``path``.
+        path: The analyzed file.
+        sheet: Sheet name or index for Excel files.
+
+    Returns:
+        DataFrame with the rows of ``df_analyzed`` in input order.
+    """
+    available = list_columns(path, sheet)
+    others = [
+        c for c in available if c not in df_analyzed.columns and not is_result_column(c)
+    ]
+    if not others:
+        return df_analyzed
+    df_input = load_columns(path, others, sheet)
+    merged = pd.concat([df_input, df_analyzed.reset_index(drop=True)], axis=1)
+    order = [c for c in available if c in merged.columns]
+    return merged[order + [c for c in merged.columns if c not in order]]
+
+
+def load_previous_analysis(
+    path: str | Path, column_names: Sequence[str]
+) -> pd.DataFrame:
+    """Read a previously exported analysis for incremental re-analysis.
+
+    Only the text columns in ``column_names`` and the result columns are
+    read; other input columns are skipped.
+
+    Args:
+        path: File written by :func:`exporting.save_analysis`.
+        column_names: Text columns analyzed in the new run. Those missing from
+            the file are ignored.
+
+    Raises:
+        RuntimeError: If ``path`` is a Parquet file and ``pyarrow`` is missing.
+    """
+    available = list_columns(path)
+    wanted = [
+        c
+        for c in available
+        if c in column_names or is_result_column(c)
+    ]
+    return load_columns(path, wanted)
@@ -1,6 +1,5 @@
 from tkinter import filedialog, messagebox
 import customtkinter as ctk
-import pandas as pd
 import asyncio
 import os
 import threading
@@ -11,26 +10,32 @@ import sys
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from analysis import analyze_dataframe, summarize_results
-from reporting import generate_pdf_report, generate_wordcloud
+import analysis
+from analysis import analyze_dataframe, summarize_columns, summarize_results
 from config import settings
+from exporting import safe_file_name, save_analysis
+from metrics import get_metrics
+from loading import (
+    list_columns,
+    load_columns,
+    load_previous_analysis,
+    restore_input_columns,
+)
 
 
-def expand_key_topic_columns(
-    df: pd.DataFrame, column: str = "analysis_key_topics"
-) -> pd.DataFrame:
-    """Convert list-based key topics column into separate columns."""
-    if column not in df.columns:
-        return df
-    topics_expanded = (
-        df[column].apply(lambda x: x if isinstance(x, list) else []).apply(pd.Series)
-    )
-    if topics_expanded.empty:
-        return df.drop(columns=[column])
-    topics_expanded.columns = [
-        f"{column}_{i+1}" for i in range(len(topics_expanded.columns))
-    ]
-    return pd.concat([df.drop(columns=[column]), topics_expanded], axis=1)
+def warm_up_dependencies() -> None:
+    """Load heavy modules in the background while the window is shown.
+
+    ``reporting`` (fpdf) and the OpenAI/spaCy/Sudachi dependencies of
+    ``analysis`` are imported lazily; this warms them up before the user
+    starts an analysis or saves a report.
+    """
+    try:
+        import reporting  # noqa: F401
+
+        analysis.warm_up()
+    except Exception as e:
+        print(f"依存ライブラリの事前読み込みに失敗しました: {e}")
 
 
 class App(ctk.CTk):
@@ -42,15 +47,24 @@ class App(ctk.CTk):
         ctk.set_appearance_mode("System")
         ctk.set_default_color_theme("blue")
 
+        # 入力ファイルは列名だけ先に読み、分析時に選択した列だけを読み込む
+        self.input_path = None
+        self.input_columns = []
         self.df = None
+        # 前回の分析結果ファイル（指定時は新規・変更された回答だけを分析する）
+        self.previous_path = None
         self.df_analyzed = None
-        self.summary_data = None
+        # 列名 -> (summary_data, wordcloud_words)
+        self.summaries = {}
         self.wc_all_var = ctk.BooleanVar(value=True)
         self.wc_pos_var = ctk.BooleanVar(value=False)
         self.wc_neg_var = ctk.BooleanVar(value=False)
         self.analysis_queue = queue.Queue()
         self.check_queue()
 
+        # ファイル選択中に重いライブラリを読み込んでおく
+        threading.Thread(target=warm_up_dependencies, daemon=True).start()
+
         # --- メインフレーム ---
         self.main_frame = ctk.CTkFrame(self)
         self.main_frame.pack(padx=20, pady=20, fill="both", expand=True)
@@ -60,18 +74,28 @@ class App(ctk.CTk):
         file_frame.pack(pady=10, padx=10, fill="x")
 
         self.load_button = ctk.CTkButton(
-            file_frame, text="Excelファイルを選択", command=self.load_file
+            file_frame, text="ファイルを選択", command=self.load_file
         )
         self.load_button.pack(side="left", padx=10, pady=10)
 
         self.file_label = ctk.CTkLabel(file_frame, text="ファイルが選択されていません")
         self.file_label.pack(side="left", padx=10)
 
+        self.previous_button = ctk.CTkButton(
+            file_frame, text="前回の分析結果を選択", command=self.select_previous
+        )
+        self.previous_button.pack(side="left", padx=10, pady=10)
+
+        self.previous_label = ctk.CTkLabel(file_frame, text="前回の結果: なし")
+        self.previous_label.pack(side="left", padx=10)
+
         # --- 列選択フレーム ---
         column_frame = ctk.CTkFrame(self.main_frame)
         column_frame.pack(pady=10, padx=10, fill="x")
 
-        ctk.CTkLabel(column_frame, text="分析対象の列:").pack(side="left", padx=10)
+        ctk.CTkLabel(column_frame, text="分析対象の列 (カンマ区切りで複数可):").pack(
+            side="left", padx=10
+        )
         self.column_selector = ctk.CTkComboBox(
             column_frame, state="disabled", values=[]
         )
@@ -146,6 +170,14 @@ class App(ctk.CTk):
         )
         self.save_wordcloud_button.pack(side="left", padx=10, pady=10, expand=True)
 
+        self.save_metrics_button = ctk.CTkButton(
+            save_frame,
+            text="計測結果を保存",
+            command=self.save_metrics,
+            state="disabled",
+        )
+        self.save_metrics_button.pack(side="left", padx=10, pady=10, expand=True)
+
         # --- APIキーチェック ---
         if not settings.OPENAI_API_KEY:
             messagebox.showerror(
@@ -155,32 +187,68 @@ class App(ctk.CTk):
 
     def load_file(self):
         file_path = filedialog.askopenfilename(
-            filetypes=[("Excel files", "*.xlsx *.xls")]
+            filetypes=[
+                ("アンケートファイル", "*.xlsx *.xlsm *.xls *.csv *.parquet"),
+                ("Excel files", "*.xlsx *.xlsm *.xls"),
+                ("CSV files", "*.csv"),
+                ("Parquet files", "*.parquet"),
+            ]
         )
         if not file_path:
             return
 
+        # 大きなファイルでも画面が固まらないよう列名の取得もワーカースレッドで行う
+        self.load_button.configure(state="disabled")
+        self.status_label.configure(text="読み込み中...")
+        threading.Thread(
+            target=self.list_columns_in_background, args=(file_path,), daemon=True
+        ).start()
+
+    def select_previous(self):
+        """Choose a previously saved analysis; cancelling clears it."""
+        path = filedialog.askopenfilename(
+            filetypes=[("分析結果ファイル", "*.xlsx *.parquet")]
+        )
+        self.previous_path = path or None
+        name = os.path.basename(path) if path else "なし"
+        self.previous_label.configure(text=f"前回の結果: {name}")
+
+    def list_columns_in_background(self, file_path: str) -> None:
         try:
-            self.df = pd.read_excel(file_path)
-            self.file_label.configure(text=os.path.basename(file_path))
-            self.column_selector.configure(
-                values=self.df.columns.tolist(), state="normal"
-            )
-            self.column_selector.set(self.df.columns[0])
-            self.run_button.configure(state="normal")
-            self.reset_results()
+            columns = list_columns(file_path)
+            self.analysis_queue.put({"input_path": file_path, "columns": columns})
         except Exception as e:
+            self.analysis_queue.put({"input_path": file_path, "load_error": str(e)})
+
+    def on_columns_listed(self, message: dict) -> None:
+        self.load_button.configure(state="normal")
+        if "load_error" in message:
+            self.status_label.configure(text="準備完了")
             messagebox.showerror(
-                "読み込みエラー", f"ファイルの読み込みに失敗しました:\n{e}"
+                "読み込みエラー",
+                f"ファイルの読み込みに失敗しました:\n{message['load_error']}",
             )
+            return
+        if not message["columns"]:
+            self.status_label.configure(text="準備完了")
+            messagebox.showerror("読み込みエラー", "列が見つかりません。")
+            return
+        self.input_path = message["input_path"]
+        self.input_columns = message["columns"]
+        self.df = None
+        self.file_label.configure(text=os.path.basename(self.input_path))
+        self.column_selector.configure(values=self.input_columns, state="normal")
+        self.column_selector.set(self.input_columns[0])
+        self.run_button.configure(state="normal")
+        self.reset_results()
 
     def reset_results(self):
         self.df_analyzed = None
-        self.summary_data = None
-        self.wordcloud_words = None
+        self.summaries = {}
         self.save_excel_button.configure(state="disabled")
         self.save_pdf_button.configure(state="disabled")
         self.save_wordcloud_button.configure(state="disabled")
+        self.save_metrics_button.configure(state="disabled")
         self.progress_bar.set(0)
         self.status_label.configure(text="準備完了")
 
@@ -203,14 +271,39 @@ class App(ctk.CTk):
             message = self.analysis_queue.get_nowait()
             if isinstance(message, float):
                 self.update_progress(message)
-            elif isinstance(message, dict) and "summary" in message:
+            elif isinstance(message, dict) and "input_path" in message:
+                self.on_columns_listed(message)
+            elif isinstance(message, dict) and "saved_path" in message:
+                self.on_saved(message)
+            elif isinstance(message, dict) and "summaries" in message:
                 self.df_analyzed = message["df_analyzed"]
-                self.summary_data = message["summary"]
-                self.wordcloud_words = message["wordcloud_words"]
-                messagebox.showinfo("完了", "分析が完了しました。結果を保存できます。")
+                self.summaries = {
+                    column: result
+                    for column, result in message["summaries"].items()
+                    if result[0] is not None
+                }
+                run_report = message.get("run_report") or {}
+                detail = ""
+                if run_report.get("rows"):
+                    detail = (
+                        f"\n\n回答数: {run_report['rows']} / "
+                        f"ユニーク回答数: {run_report['unique_texts']} "
+                        f"(重複除去率 {run_report['dedup_ratio']:.1%})"
+                    )
+                if run_report.get("reused"):
+                    detail += f"\n前回の分析結果を再利用: {run_report['reused']} 件"
+                if run_report.get("near_duplicates"):
+                    detail += (
+                        f"\n類似回答として統合: {run_report['near_duplicates']} 件"
+                    )
+
+                messagebox.showinfo(
+                    "完了", f"分析が完了しました。結果を保存できます。{detail}"
+                )
                 self.save_excel_button.configure(state="normal")
                 self.save_pdf_button.configure(state="normal")
                 self.save_wordcloud_button.configure(state="normal")
+                self.save_metrics_button.configure(state="normal")
                 self.run_button.configure(state="normal")
                 self.load_button.configure(state="normal")
             elif isinstance(message, str) and message.startswith("ERROR"):
@@ -223,50 +316,75 @@ class App(ctk.CTk):
             self.after(100, self.check_queue)
 
     def run_analysis_wrapper(self):
-        if self.df is None:
+        if self.input_path is None:
             messagebox.showerror("エラー", "ファイルが選択されていません。")
             return
 
-        column = self.column_selector.get()
-        if not column:
+        columns = [c.strip() for c in self.column_selector.get().split(",") if c.strip()]
+        if not columns:
             messagebox.showerror("エラー", "分析対象の列を選択してください。")
             return
+        missing = [c for c in columns if c not in self.input_columns]
+        if missing:
+            messagebox.showerror("エラー", f"列が見つかりません: {', '.join(missing)}")
+            return
 
         self.reset_results()
         self.run_button.configure(state="disabled")
         self.load_button.configure(state="disabled")
 
         thread = threading.Thread(
-            target=self.run_analysis_in_background, args=(column,)
+            target=self.run_analysis_in_background, args=(columns,)
         )
         thread.daemon = True
         thread.start()
 
-    def run_analysis_in_background(self, column: str):
-        """Execute analysis asynchronously inside a worker thread."""
+    def run_analysis_in_background(self, columns: list[str]):
+        """Execute analysis asynchronously inside a worker thread.
+
+        Several columns are analyzed in one run with namespaced result
+        columns and summarized per column.
+        """
 
         def progress_callback_for_thread(value: float):
             self.analysis_queue.put(value)
 
         async def run():
             try:
+                # 計測結果は実行ごとに集計し直す
+                get_metrics().reset()
+                # 選択した列だけを読み込む（同じ列での再実行時は読み込み済みのデータを使う）
+                if self.df is None or list(self.df.columns) != columns:
+                    self.df = await asyncio.to_thread(
+                        load_columns, self.input_path, columns
+                    )
+                previous = None
+                if self.previous_path:
+                    previous = await asyncio.to_thread(
+                        load_previous_analysis, self.previous_path, columns
+                    )
+                run_report = {}
                 df_analyzed = await analyze_dataframe(
                     self.df,
-                    column,
+                    columns[0] if len(columns) == 1 else columns,
                     progress_callback=progress_callback_for_thread,
                     max_concurrent_tasks=settings.MAX_CONCURRENT_TASKS,
+                    run_report=run_report,
+                    previous=previous,
                 )
                 progress_callback_for_thread(100.0)
 
-                summary_data, wordcloud_words = await summarize_results(
-                    df_analyzed,
-                    column,
-                )
+                if len(columns) == 1:
+                    summaries = {
+                        columns[0]: await summarize_results(df_analyzed, columns[0])
+                    }
+                else:
+                    summaries = await summarize_columns(df_analyzed, columns)
                 self.analysis_queue.put(
                     {
                         "df_analyzed": df_analyzed,
-                        "summary": summary_data,
-                        "wordcloud_words": wordcloud_words,
+                        "summaries": summaries,
+                        "run_report": run_report,
                     }
                 )
             except Exception as e:
@@ -278,20 +396,69 @@ class App(ctk.CTk):
         if self.df_analyzed is None:
             return
         path = filedialog.asksaveasfilename(
-            defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")]
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx"), ("Parquet files", "*.parquet")],
         )
-        if path:
-            try:
-                df_to_save = expand_key_topic_columns(self.df_analyzed)
-                df_to_save.to_excel(path, index=False)
-                messagebox.showinfo("成功", f"分析結果を {path} に保存しました。")
-            except Exception as e:
-                messagebox.showerror(
-                    "保存エラー", f"Excelファイルの保存に失敗しました:\n{e}"
-                )
+        if not path:
+            return
+        # 大量の行の書き込みで画面が固まらないようワーカースレッドで保存する
+        self.save_excel_button.configure(state="disabled")
+        self.status_label.configure(text="保存中...")
+        threading.Thread(
+            target=self.save_in_background,
+            args=(self.df_analyzed, self.input_path, path),
+            daemon=True,
+        ).start()
+
+    def save_in_background(self, df_analyzed, input_path: str, path: str) -> None:
+        try:
+            # 分析しなかった列（ID・部署など）も入力ファイルから読み直して一緒に保存する
+            save_analysis(restore_input_columns(df_analyzed, input_path), path)
+            self.analysis_queue.put({"saved_path": path})
+        except Exception as e:
+            self.analysis_queue.put({"saved_path": path, "save_error": str(e)})
+
+    def on_saved(self, message: dict) -> None:
+        self.save_excel_button.configure(state="normal")
+        self.status_label.configure(text="完了")
+        if "save_error" in message:
+            messagebox.showerror(
+                "保存エラー", f"ファイルの保存に失敗しました:\n{message['save_error']}"
+            )
+        else:
+            messagebox.showinfo("成功", f"分析結果を {message['saved_path']} に保存しました。")
+
+    def save_metrics(self):
+        """Write the API call metrics of the last analysis as JSON and Prometheus text."""
+        path = filedialog.asksaveasfilename(
+            defaultextension=".json", filetypes=[("JSON files", "*.json")]
+        )
+        if not path:
+            return
+        prom_path = f"{os.path.splitext(path)[0]}.prom"
+        try:
+            metrics = get_metrics()
+            metrics.to_json(path)
+            metrics.to_prometheus_file(prom_path)
+            messagebox.showinfo("成功", f"計測結果を保存しました。\n{path}\n{prom_path}")
+        except Exception as e:
+            messagebox.showerror("保存エラー", f"計測結果の保存に失敗しました:\n{e}")
+
+    def _output_paths(self, base_name: str, suffix: str) -> dict[str, str]:
+        """Return an output path per analyzed column.
+
+        With several columns the column name, with characters invalid in
+        file names replaced, is appended to ``base_name``.
+        """
+        if len(self.summaries) == 1:
+            return {column: f"{base_name}{suffix}" for column in self.summaries}
+        return {
+            column: f"{base_name}_{safe_file_name(column)}{suffix}"
+            for column in self.summaries
+        }
 
     def save_pdf(self):
-        if self.summary_data is None:
+        if not self.summaries:
             messagebox.showerror("エラー", "分析データがありません。先に分析を実行してください。")
             return
         path = filedialog.asksaveasfilename(
@@ -299,22 +466,32 @@ class App(ctk.CTk):
         )
         if path:
             try:
-                # --- デバッグ情報出力 ---
-                print("--- summary_data for PDF generation ---")
-                for key, value in self.summary_data.items():
-                    print(f"{key}: ({type(value)}) {value}")
-                print("-----------------------------------------")
-                # --- デバッグ情報出力ここまで ---
-
-                generate_pdf_report(self.summary_data, path)
-                messagebox.showinfo("成功", f"PDFレポートを {path} に保存しました。")
+                from reporting import generate_pdf_reports
+
+                paths = self._output_paths(os.path.splitext(path)[0], ".pdf")
+                reports = []
+                for column, output_path in paths.items():
+                    summary_data = self.summaries[column][0]
+                    # --- デバッグ情報出力 ---
+                    print("--- summary_data for PDF generation ---")
+                    for key, value in summary_data.items():
+                        print(f"{key}: ({type(value)}) {value}")
+                    print("-----------------------------------------")
+                    # --- デバッグ情報出力ここまで ---
+
+                    reports.append((summary_data, output_path))
+                # 複数列のレポートはグラフをプロセスプールで並行して描画する
+                generate_pdf_reports(reports)
+                messagebox.showinfo(
+                    "成功", "PDFレポートを保存しました。\n" + "\n".join(paths.values())
+                )
             except Exception as e:
                 import traceback
                 traceback.print_exc()
                 messagebox.showerror("PDF保存エラー", f"PDFの保存に失敗しました:\n{e}")
 
     def save_wordcloud(self):
-        if self.wordcloud_words is None:
+        if not self.summaries:
             messagebox.showerror("エラー", "分析データがありません。先に分析を実行してください。")
             return
 
@@ -340,20 +517,25 @@ class App(ctk.CTk):
         saved_files = []
 
         try:
-            if generate_all:
-                output_path = f"{base_name}_all.png"
-                generate_wordcloud(self.wordcloud_words['all'], output_path, exclude_words)
-                saved_files.append(output_path)
-
-            if generate_pos:
-                output_path = f"{base_name}_positive.png"
-                generate_wordcloud(self.wordcloud_words['positive'], output_path, exclude_words)
-                saved_files.append(output_path)
-
-            if generate_neg:
-                output_path = f"{base_name}_negative.png"
-                generate_wordcloud(self.wordcloud_words['negative'], output_path, exclude_words)
-                saved_files.append(output_path)
+            from reporting import generate_wordcloud
+
+            for column, prefix in self._output_paths(base_name, "").items():
+                wordcloud_words = self.summaries[column][1]
+
+                if generate_all:
+                    output_path = f"{prefix}_all.png"
+                    generate_wordcloud(wordcloud_words['all'], output_path, exclude_words)
+                    saved_files.append(output_path)
+
+                if generate_pos:
+                    output_path = f"{prefix}_positive.png"
+                    generate_wordcloud(wordcloud_words['positive'], output_path, exclude_words)
+                    saved_files.append(output_path)
+
+                if generate_neg:
+                    output_path = f"{prefix}_negative.png"
+                    generate_wordcloud(wordcloud_words['negative'], output_path, exclude_words)
+                    saved_files.append(output_path)
 
             if saved_files:
                 messagebox.showinfo("成功", f"ワードクラウドを保存しました。\n" + "\n".join(saved_files))
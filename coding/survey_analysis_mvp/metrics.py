@@ -0,0 +1,291 @@
+"""Per-call metrics of OpenAI requests for run reports and monitoring.
+
+Every request sent by :mod:`analysis` is recorded in the process-wide
+:class:`MetricsRegistry` returned by :func:`get_metrics`, grouped by call
+type (``survey``, ``emotion``, ``fused``, ``batch``, ``commentary`` and
+``moderation``): its latency, the time it waited for the RPM/TPM rate
+limiter, prompt and completion tokens reported in ``usage``, re-asks after
+validation errors and the reason of failures. The time spent waiting for a
+concurrency slot, result cache hits and the duration of CPU-bound stages such
+as tokenization are recorded as well, so a slow run can be attributed to
+queueing, API latency or local processing.
+
+:meth:`MetricsRegistry.snapshot` returns the aggregates, with p50/p95/p99
+latencies, as a JSON-serializable run report and
+:meth:`MetricsRegistry.to_prometheus` renders them in the Prometheus text
+exposition format.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+from config import settings
+
+# Prometheus のヒストグラムのバケット境界（秒）
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_PREFIX = "survey_analysis"
+
+
+class Distribution:
+    """Observed durations in seconds, summarized as quantiles or buckets."""
+
+    def __init__(self) -> None:
+        # 数百万件でもメモリを抑えられるよう float の配列で保持する
+        self._values = array("d")
+
+    def observe(self, seconds: float) -> None:
+        """Record one duration."""
+        self._values.append(seconds)
+
+    @property
+    def count(self) -> int:
+        return len(self._values)
+
+    @property
+    def total(self) -> float:
+        return float(sum(self._values))
+
+    def summary(self) -> dict:
+        """Return count, sum, mean, p50/p95/p99 and max in seconds."""
+        if not self._values:
+            return {"count": 0, "sum": 0.0}
+        values = np.frombuffer(self._values, dtype=np.float64)
+        summary = {
+            "count": len(values),
+            "sum": float(values.sum()),
+            "mean": float(values.mean()),
+        }
+        for q, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+            summary[f"p{round(q * 100)}"] = float(value)
+        summary["max"] = float(values.max())
+        return summary
+
+    def buckets(self, bounds: tuple[float, ...] = LATENCY_BUCKETS) -> list[int]:
+        """Return cumulative counts of durations ``<=`` each bound."""
+        values = np.sort(np.frombuffer(self._values, dtype=np.float64))
+        return np.searchsorted(values, bounds, side="right").tolist()
+
+
+@dataclass
+class CallStats:
+    """Aggregates of the requests of one call type."""
+
+    requests: int = 0
+    retries: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    failures: Counter = field(default_factory=Counter)
+    latency: Distribution = field(default_factory=Distribution)
+    rate_limit_wait: Distribution = field(default_factory=Distribution)
+
+
+class MetricsRegistry:
+    """Collects request, wait, cache and stage metrics of a run.
+
+    Args:
+        prompt_price: USD per million prompt tokens, used for cost estimates.
+        completion_price: USD per million completion tokens.
+    """
+
+    def __init__(self, prompt_price: float = 0.0, completion_price: float = 0.0) -> None:
+        self.prompt_price = prompt_price
+        self.completion_price = completion_price
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard everything recorded so far."""
+        self.calls: dict[str, CallStats] = {}
+        self.waits: dict[str, Distribution] = {}
+        self.stages: dict[str, Distribution] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.started = time.time()
+
+    # 記録 -----------------------------------------------------------------
+    def record_call(
+        self,
+        call_type: str,
+        latency: float,
+        rate_limit_wait: float = 0.0,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        retries: int = 0,
+        failure: str | None = None,
+    ) -> None:
+        """Record one API request.
+
+        Args:
+            call_type: Kind of request, e.g. ``"survey"`` or ``"moderation"``.
+            latency: Seconds from sending the request to its outcome.
+            rate_limit_wait: Seconds spent waiting for the rate limiter.
+            prompt_tokens: Prompt tokens reported in ``usage``.
+            completion_tokens: Completion tokens reported in ``usage``.
+            retries: Attempts beyond the first one.
+            failure: Reason of the failure, or None if it succeeded.
+        """
+        stats = self.calls.setdefault(call_type, CallStats())
+        stats.requests += 1
+        stats.retries += retries
+        stats.prompt_tokens += prompt_tokens
+        stats.completion_tokens += completion_tokens
+        stats.latency.observe(latency)
+        stats.rate_limit_wait.observe(rate_limit_wait)
+        if failure is not None:
+            stats.failures[failure] += 1
+
+    def record_wait(self, name: str, seconds: float) -> None:
+        """Record time spent waiting in a queue, e.g. for a concurrency slot."""
+        self.waits.setdefault(name, Distribution()).observe(seconds)
+
+    def record_stage(self, name: str, seconds: float) -> None:
+        """Record the duration of a local processing stage."""
+        self.stages.setdefault(name, Distribution()).observe(seconds)
+
+    @contextmanager
+    def time_stage(self, name: str) -> Iterator[None]:
+        """Context manager recording the duration of its body as a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - start)
+
+    def record_cache(self, hits: int, misses: int) -> None:
+        """Record result cache lookups."""
+        self.cache_hits += hits
+        self.cache_misses += misses
+
+    # 出力 -----------------------------------------------------------------
+    def cost(self, stats: CallStats) -> float:
+        """Return the estimated cost in USD of the tokens in ``stats``."""
+        return (
+            stats.prompt_tokens * self.prompt_price
+            + stats.completion_tokens * self.completion_price
+        ) / 1_000_000
+
+    def snapshot(self) -> dict:
+        """Return all aggregates as a JSON-serializable dictionary."""
+        calls = {}
+        for call_type, stats in sorted(self.calls.items()):
+            calls[call_type] = {
+                "requests": stats.requests,
+                "failures": dict(stats.failures),
+                "retries": stats.retries,
+                "prompt_tokens": stats.prompt_tokens,
+                "completion_tokens": stats.completion_tokens,
+                "cost_usd": self.cost(stats),
+                "latency": stats.latency.summary(),
+                "rate_limit_wait": stats.rate_limit_wait.summary(),
+            }
+        totals = {
+            key: sum(c[key] for c in calls.values())
+            for key in ("requests", "retries", "prompt_tokens", "completion_tokens")
+        }
+        totals["failures"] = sum(sum(c["failures"].values()) for c in calls.values())
+        totals["cost_usd"] = sum(c["cost_usd"] for c in calls.values())
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "elapsed": time.time() - self.started,
+            "calls": calls,
+            "totals": totals,
+            "waits": {name: d.summary() for name, d in sorted(self.waits.items())},
+            "stages": {name: d.summary() for name, d in sorted(self.stages.items())},
+            "result_cache": {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_ratio": self.cache_hits / lookups if lookups else 0.0,
+            },
+        }
+
+    def to_json(self, path: str | Path) -> None:
+        """Write :meth:`snapshot` to ``path`` as UTF-8 JSON."""
+        Path(path).write_text(
+            json.dumps(self.snapshot(), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+
+    def to_prometheus(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        lines: list[str] = []
+
+        def header(name: str, kind: str, help_text: str) -> str:
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+            return f"{METRIC_PREFIX}_{name}"
+
+        def histogram(name: str, label: str, distribution: Distribution) -> None:
+            for bound, count in zip(LATENCY_BUCKETS, distribution.buckets()):
+                lines.append(f'{name}_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{label},le="+Inf"}} {distribution.count}')
+            lines.append(f"{name}_sum{{{label}}} {distribution.total}")
+            lines.append(f"{name}_count{{{label}}} {distribution.count}")
+
+        calls = sorted(self.calls.items())
+        name = header("api_requests_total", "counter", "OpenAI API requests.")
+        for call_type, stats in calls:
+            lines.append(f'{name}{{call_type="{call_type}"}} {stats.requests}')
+        name = header("api_failures_total", "counter", "Failed OpenAI API requests.")
+        for call_type, stats in calls:
+            for reason, count in sorted(stats.failures.items()):
+                lines.append(
+                    f'{name}{{call_type="{call_type}",reason="{reason}"}} {count}'
+                )
+        name = header("api_retries_total", "counter", "Re-sent OpenAI API requests.")
+        for call_type, stats in calls:
+            lines.append(f'{name}{{call_type="{call_type}"}} {stats.retries}')
+        name = header("api_tokens_total", "counter", "Tokens reported in usage.")
+        for call_type, stats in calls:
+            for kind in ("prompt", "completion"):
+                count = getattr(stats, f"{kind}_tokens")
+                lines.append(f'{name}{{call_type="{call_type}",kind="{kind}"}} {count}')
+        name = header("api_cost_usd_total", "counter", "Estimated API cost in USD.")
+        for call_type, stats in calls:
+            lines.append(f'{name}{{call_type="{call_type}"}} {self.cost(stats)}')
+        name = header(
+            "api_request_duration_seconds", "histogram", "OpenAI API request latency."
+        )
+        for call_type, stats in calls:
+            histogram(name, f'call_type="{call_type}"', stats.latency)
+        name = header(
+            "api_rate_limit_wait_seconds", "histogram", "Wait for the RPM/TPM limiter."
+        )
+        for call_type, stats in calls:
+            histogram(name, f'call_type="{call_type}"', stats.rate_limit_wait)
+        name = header("wait_seconds", "histogram", "Wait in local queues.")
+        for queue, distribution in sorted(self.waits.items()):
+            histogram(name, f'queue="{queue}"', distribution)
+        name = header("stage_seconds", "histogram", "Duration of local stages.")
+        for stage, distribution in sorted(self.stages.items()):
+            histogram(name, f'stage="{stage}"', distribution)
+        name = header("result_cache_lookups_total", "counter", "Result cache lookups.")
+        lines.append(f'{name}{{result="hit"}} {self.cache_hits}')
+        lines.append(f'{name}{{result="miss"}} {self.cache_misses}')
+        return "\n".join(lines) + "\n"
+
+    def to_prometheus_file(self, path: str | Path) -> None:
+        """Write :meth:`to_prometheus` to ``path``."""
+        Path(path).write_text(self.to_prometheus(), encoding="utf-8")
+
+
+_registry: MetricsRegistry | None = None
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide registry, priced with the configured rates."""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry(
+            prompt_price=settings.PROMPT_PRICE_PER_MTOK,
+            completion_price=settings.COMPLETION_PRICE_PER_MTOK,
+        )
+    return _registry
@@ -0,0 +1,182 @@
+"""Near-duplicate clustering of survey responses with MinHash and LSH.
+
+Free-text columns contain many answers that differ only in punctuation,
+notation or a single word (「特にありません」 vs 「特にありません。」).
+:func:`cluster_near_duplicates` assigns each response to a cluster whose
+representative has a character n-gram Jaccard similarity of at least the
+given threshold, so only representatives need to be analyzed.
+
+Responses are first reduced to Sudachi normalized forms without symbols and
+whitespace. Each one gets a MinHash signature over its character n-grams,
+and an LSH index over signature bands yields candidate representatives, whose
+similarity is estimated from the share of matching signature values.
+Clustering is greedy in input order: a response either joins the most
+similar representative or becomes a new one, so every member is close to
+its representative. Buckets hold at most ``MAX_BUCKET_SIZE``
+representatives, which keeps the cost linear in the number of responses.
+"""
+
+from __future__ import annotations
+
+import zlib
+from collections import defaultdict
+from typing import Sequence
+
+import numpy as np
+
+from parallel import map_chunks
+from wc_tokenizer import map_morphemes
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NGRAM = 2
+NUM_PERM = 128
+# 類似度がしきい値ちょうどの組が LSH の候補になる確率の下限
+MIN_CANDIDATE_PROBABILITY = 0.99
+# Sudachi の品詞のうち照合前に取り除くもの
+IGNORED_POS = ("補助記号", "空白")
+# LSH のバケットに登録する代表の上限（似た回答が多くても1件あたりの照合回数を抑える）
+MAX_BUCKET_SIZE = 8
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+# 1回にまとめて計算する n-gram 数（NUM_PERM 倍の uint64 配列が作られる）
+_HASH_BLOCK = 20_000
+
+
+def _normalized_form(morphemes) -> str:
+    return "".join(
+        m.normalized_form()
+        for m in morphemes
+        if m.part_of_speech()[0] not in IGNORED_POS
+    )
+
+
+def _normalize_chunk(texts: list) -> list[str]:
+    # 空欄や文字列以外は空文字列として扱う（Sudachi は空文字列に形態素を返さない）
+    texts = [text if isinstance(text, str) and text.strip() else "" for text in texts]
+    return map_morphemes(texts, _normalized_form)
+
+
+def normalize_for_matching(texts: Sequence, processes: int | None = None) -> list[str]:
+    """Return the Sudachi normalized form of each text without symbols.
+
+    Empty and non-text values become ``""``. Large inputs are sharded across
+    ``processes`` worker processes.
+    """
+    return map_chunks(_normalize_chunk, texts, processes=processes)
+
+
+def shingles(text: str, ngram: int = DEFAULT_NGRAM) -> set[str]:
+    """Return the character n-grams of ``text`` (the text itself if shorter)."""
+    if len(text) <= ngram:
+        return {text} if text else set()
+    return {text[i : i + ngram] for i in range(len(text) - ngram + 1)}
+
+
+def _permutations(num_perm: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    # 31ビットの係数と32ビットのハッシュ値なら a * h + b < 2**63 で uint64 が溢れない
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash_signatures(
+    shingle_sets: Sequence[set[str]], num_perm: int = NUM_PERM, seed: int = 1
+) -> np.ndarray:
+    """Return one MinHash signature row per non-empty set of shingles.
+
+    Returns:
+        ``uint64`` array of shape ``(len(shingle_sets), num_perm)``.
+    """
+    a, b = _permutations(num_perm, seed)
+    signatures = np.empty((len(shingle_sets), num_perm), dtype=np.uint64)
+    start = 0
+    while start < len(shingle_sets):
+        # 複数の回答の n-gram を連結し、回答ごとの最小値を reduceat で求める
+        stop, size = start, 0
+        while stop < len(shingle_sets) and (size < _HASH_BLOCK or stop == start):
+            size += len(shingle_sets[stop])
+            stop += 1
+        block = shingle_sets[start:stop]
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for shingle_set in block for s in shingle_set),
+            dtype=np.uint64,
+            count=size,
+        ) % _MERSENNE_PRIME
+        offsets = np.cumsum([0] + [len(s) for s in block[:-1]])
+        values = (hashes[:, None] * a + b) % _MERSENNE_PRIME
+        signatures[start:stop] = np.minimum.reduceat(values, offsets, axis=0)
+        start = stop
+    return signatures
+
+
+def lsh_bands(threshold: float, num_perm: int = NUM_PERM) -> tuple[int, int]:
+    """Return ``(bands, rows)`` for an LSH index at ``threshold``.
+
+    Uses the most rows per band (fewest false candidates) for which a pair at
+    exactly ``threshold`` still becomes a candidate with probability
+    ``MIN_CANDIDATE_PROBABILITY``.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold**rows) ** bands >= MIN_CANDIDATE_PROBABILITY:
+            best = (bands, rows)
+    return best
+
+
+def _band_keys(signatures: np.ndarray, bands: int, rows: int) -> np.ndarray:
+    # 各バンドの値を1つの整数にまとめ、辞書のキーにする（桁あふれは無視してよい）
+    a, _ = _permutations(rows, seed=2)
+    banded = signatures[:, : bands * rows].reshape(len(signatures), bands, rows)
+    return (banded * a).sum(axis=2, dtype=np.uint64)
+
+
+def cluster_near_duplicates(
+    texts: Sequence,
+    threshold: float = DEFAULT_THRESHOLD,
+    ngram: int = DEFAULT_NGRAM,
+    num_perm: int = NUM_PERM,
+    processes: int | None = None,
+) -> list[int]:
+    """Cluster texts whose character n-gram Jaccard similarity is high.
+
+    Args:
+        texts: Responses in order. Empty and non-text values never join a
+            cluster.
+        threshold: Minimum Jaccard similarity to a cluster's representative.
+        ngram: Length of the character n-grams.
+        num_perm: Number of MinHash permutations.
+        processes: Worker processes for the Sudachi normalization.
+
+    Returns:
+        For each text, the position of its cluster representative in
+        ``texts``; representatives map to themselves.
+    """
+    normalized = normalize_for_matching(texts, processes)
+    shingle_sets = [shingles(text, ngram) for text in normalized]
+    indexed = [i for i, s in enumerate(shingle_sets) if s]
+    signatures = minhash_signatures([shingle_sets[i] for i in indexed], num_perm)
+    bands, rows = lsh_bands(threshold, num_perm)
+
+    representatives = list(range(len(texts)))
+    band_keys = _band_keys(signatures, bands, rows).tolist()
+    buckets: list[dict[int, list[int]]] = [defaultdict(list) for _ in range(bands)]
+    for k, (keys, i) in enumerate(zip(band_keys, indexed)):
+        candidates = np.fromiter(
+            {c for bucket, key in zip(buckets, keys) for c in bucket.get(key, ())},
+            dtype=np.intp,
+        )
+        if len(candidates):
+            # 署名の一致率は Jaccard 係数の推定値（同率なら先に現れた代表を選ぶ）
+            candidates.sort()
+            agreement = (signatures[candidates] == signatures[k]).mean(axis=1)
+            best = int(agreement.argmax())
+            if agreement[best] >= threshold:
+                representatives[i] = indexed[candidates[best]]
+                continue
+        # 代表だけを索引に登録し、クラスタが連鎖的に広がらないようにする
+        for index, key in zip(buckets, keys):
+            bucket = index[key]
+            if len(bucket) < MAX_BUCKET_SIZE:
+                bucket.append(k)
+    return representatives
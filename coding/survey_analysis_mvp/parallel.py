@@ -0,0 +1,128 @@
+"""Order-preserving, chunked fan-out of CPU-bound work to a process pool.
+
+Sudachi tokenization is pure Python and holds the GIL, so large columns are
+split into chunks that are processed by separate worker processes. Each worker
+keeps its own tokenizer (created lazily and cached per process), and results
+are returned in input order. Small inputs are processed serially because
+starting the pool would cost more than it saves.
+
+Pools never use the ``fork`` start method: they are often created from worker
+threads (``asyncio.to_thread``, concurrent CLI jobs) while another thread holds
+a tokenizer lock, and a forked child would inherit that lock held forever.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from typing import Callable, Iterator, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# これより少ない件数はプロセスを起動せずに直列で処理する
+DEFAULT_MIN_PARALLEL_ITEMS = 2000
+DEFAULT_CHUNK_SIZE = 500
+# fork は他スレッドが保持中のロックを子プロセスに引き継いでしまうため使わない
+_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def resolve_processes(processes: int | None) -> int:
+    """Return the worker count, defaulting to the number of CPUs."""
+    if processes is None:
+        processes = os.cpu_count() or 1
+    return max(1, processes)
+
+
+def process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Return a process pool whose workers are not forked from this process."""
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context(_START_METHOD)
+    )
+
+
+def _chunk_results(
+    func: Callable[[list[T]], R],
+    items: Sequence[T],
+    processes: int | None,
+    chunk_size: int,
+    min_parallel_items: int,
+) -> Iterator[R]:
+    # 件数が少なければ全体を1チャンクとして直列に処理する
+    items = list(items)
+    processes = resolve_processes(processes)
+    if processes == 1 or len(items) < min_parallel_items:
+        yield func(items)
+        return
+
+    chunk_size = max(1, chunk_size)
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+    with process_pool(min(processes, len(chunks))) as executor:
+        # map() は入力順に結果を返す
+        yield from executor.map(func, chunks)
+
+
+def map_chunks(
+    func: Callable[[list[T]], list[R]],
+    items: Sequence[T],
+    processes: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    min_parallel_items: int = DEFAULT_MIN_PARALLEL_ITEMS,
+) -> list[R]:
+    """Apply ``func`` to consecutive chunks of ``items`` and concatenate.
+
+    Use :func:`map_reduce_chunks` when ``func`` summarizes a chunk instead of
+    returning one result per item.
+
+    Args:
+        func: Picklable, module-level function mapping a chunk to one result
+            per item.
+        items: Inputs in order.
+        processes: Number of worker processes. Defaults to the CPU count;
+            ``1`` always runs serially.
+        chunk_size: Items sent to a worker per task. Larger chunks reduce IPC
+            overhead.
+        min_parallel_items: Inputs smaller than this run serially.
+
+    Returns:
+        Results of ``func`` in the order of ``items``.
+    """
+    results: list[R] = []
+    for chunk_result in _chunk_results(
+        func, items, processes, chunk_size, min_parallel_items
+    ):
+        results.extend(chunk_result)
+    return results
+
+
+def map_reduce_chunks(
+    func: Callable[[list[T]], R],
+    combine: Callable[[R, R], R],
+    items: Sequence[T],
+    processes: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    min_parallel_items: int = DEFAULT_MIN_PARALLEL_ITEMS,
+) -> R:
+    """Summarize consecutive chunks of ``items`` and combine the summaries.
+
+    Args:
+        func: Picklable, module-level function mapping a chunk to one
+            summary (e.g. token counts). It must accept an empty chunk.
+        combine: Merges two summaries, in input order; runs in the calling
+            process.
+        items: Inputs in order.
+        processes: Number of worker processes, as in :func:`map_chunks`.
+        chunk_size: Items sent to a worker per task.
+        min_parallel_items: Inputs smaller than this are summarized serially
+            as a single chunk.
+
+    Returns:
+        The combined summary of all chunks.
+    """
+    return reduce(
+        combine, _chunk_results(func, items, processes, chunk_size, min_parallel_items)
+    )
@@ -0,0 +1,96 @@
+"""Sudachi word segmentation of survey responses for the analysis prompt.
+
+The survey analysis prompt receives each response as space-separated Sudachi
+tokens. :func:`pretokenize_texts` segments a whole column with ``nlp.pipe``
+before any request is dispatched, sharding large inputs across worker
+processes, so the CPU-bound work never runs on the event loop.
+"""
+
+from __future__ import annotations
+
+import threading
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, Sequence
+
+from parallel import DEFAULT_CHUNK_SIZE, DEFAULT_MIN_PARALLEL_ITEMS, map_chunks
+
+if TYPE_CHECKING:
+    import spacy
+
+# Sudachi のトークナイザは複数スレッドから同時に使えないため排他する
+_TOKENIZER_LOCK = threading.Lock()
+
+# --- spaCy日本語トークナイザ ---
+@lru_cache(maxsize=3)
+def get_tokenizer(mode: str = "B") -> spacy.Language:
+    """Return a spaCy pipeline with SudachiPy tokenizer.
+
+    Args:
+        mode: SudachiPy split mode ("A", "B", or "C").
+
+    Returns:
+        spaCy Language object with the specified tokenizer.
+    """
+    # spaCy の読み込みは重いため、初めて必要になった時点で行う
+    import spacy
+
+    config = {
+        "nlp": {
+            "tokenizer": {
+                "@tokenizers": "spacy.ja.JapaneseTokenizer",
+                "split_mode": mode,
+            }
+        }
+    }
+    return spacy.blank("ja", config=config)
+
+
+def tokenize_for_prompt(text: str, mode: str = "B") -> str:
+    """Return ``text`` split into space-separated Sudachi tokens."""
+    nlp = get_tokenizer(mode)
+    with _TOKENIZER_LOCK:
+        doc = nlp(text)
+    return " ".join([token.text for token in doc])
+
+
+def _tokenize_chunk(texts: list, mode: str) -> list:
+    # ワーカープロセスごとにトークナイザを1つだけ生成する (lru_cache)
+    nlp = get_tokenizer(mode)
+    valid = [(i, t) for i, t in enumerate(texts) if isinstance(t, str) and t.strip()]
+    tokenized = list(texts)
+    with _TOKENIZER_LOCK:
+        docs = nlp.pipe(t for _, t in valid)
+        for (i, _), doc in zip(valid, docs):
+            tokenized[i] = " ".join([token.text for token in doc])
+    return tokenized
+
+
+def pretokenize_texts(
+    texts: Sequence,
+    mode: str = "B",
+    processes: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    min_parallel_items: int = DEFAULT_MIN_PARALLEL_ITEMS,
+) -> list:
+    """Tokenize a column of responses for the survey prompt in bulk.
+
+    Args:
+        texts: Responses in row order. Empty and non-text values are returned
+            unchanged.
+        mode: SudachiPy split mode.
+        processes: Worker processes for large inputs. Defaults to the CPU
+            count; ``1`` tokenizes in the calling process.
+        chunk_size: Responses sent to a worker per task.
+        min_parallel_items: Inputs smaller than this are tokenized in the
+            calling process.
+
+    Returns:
+        Space-separated token strings in the order of ``texts``.
+    """
+    return map_chunks(
+        partial(_tokenize_chunk, mode=mode),
+        texts,
+        processes=processes,
+        chunk_size=chunk_size,
+        min_parallel_items=min_parallel_items,
+    )
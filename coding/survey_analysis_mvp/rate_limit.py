@@ -0,0 +1,125 @@
+"""Token-bucket scheduling for requests-per-minute and tokens-per-minute quotas.
+
+A :class:`TokenBucketRateLimiter` holds two buckets, one for requests and one
+for tokens, that refill continuously at ``rpm / 60`` and ``tpm / 60`` per
+second. Callers reserve their estimated token usage up front and wait until
+both buckets can cover it, so requests queue instead of failing with 429.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import weakref
+from typing import Callable
+
+
+class TokenBucketRateLimiter:
+    """Shared RPM/TPM limiter for asynchronous API calls.
+
+    Attributes:
+        waited_seconds: Total time callers spent waiting for capacity.
+    """
+
+    def __init__(
+        self,
+        rpm: int | None = None,
+        tpm: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create a limiter.
+
+        Args:
+            rpm: Requests per minute budget. ``None`` disables the request
+                bucket.
+            tpm: Tokens per minute budget. ``None`` disables the token bucket.
+            clock: Monotonic clock, replaceable for tests.
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self._clock = clock
+        self._requests = float(rpm or 0)
+        self._tokens = float(tpm or 0)
+        self._updated = clock()
+        # asyncio.Lock は最初に使われたイベントループに結び付くため、ループごとに作る
+        self._locks: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Lock
+        ] = weakref.WeakKeyDictionary()
+        self.waited_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        """True if at least one budget is configured."""
+        return bool(self.rpm or self.tpm)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(float(self.rpm), self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(float(self.tpm), self._tokens + elapsed * self.tpm / 60)
+
+    def _delay_for(self, tokens: int) -> float:
+        """Return seconds until ``tokens`` and one request are available."""
+        delay = 0.0
+        if self.rpm and self._requests < 1:
+            delay = max(delay, (1 - self._requests) * 60 / self.rpm)
+        if self.tpm:
+            # 上限を超える見積もりは上限いっぱいまで待てば通す
+            needed = min(tokens, self.tpm)
+            if self._tokens < needed:
+                delay = max(delay, (needed - self._tokens) * 60 / self.tpm)
+        return delay
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """Reserve one request and ``tokens`` tokens, waiting if necessary.
+
+        Args:
+            tokens: Estimated prompt plus completion tokens of the request.
+
+        Returns:
+            Seconds spent waiting.
+        """
+        if not self.enabled:
+            return 0.0
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        waited = 0.0
+        # ロックで先着順に処理し、後続のリクエストが追い越さないようにする
+        async with lock:
+            while True:
+                self._refill()
+                delay = self._delay_for(tokens)
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+                waited += delay
+            if self.rpm:
+                self._requests -= 1
+            if self.tpm:
+                self._tokens -= min(tokens, self.tpm)
+        self.waited_seconds += waited
+        return waited
+
+    def observe_remaining(
+        self, requests: int | None = None, tokens: int | None = None
+    ) -> None:
+        """Lower the buckets to the remaining quota reported by the server.
+
+        The ``x-ratelimit-remaining-*`` headers account for every client
+        sharing the API key, so the local buckets never hold more than that.
+        """
+        self._refill()
+        if self.rpm and requests is not None:
+            self._requests = min(self._requests, float(requests))
+        if self.tpm and tokens is not None:
+            self._tokens = min(self._tokens, float(tokens))
+
+    def reconcile(self, estimated: int, actual: int) -> None:
+        """Correct the token bucket once the real usage of a request is known."""
+        if self.tpm and actual >= 0:
+            self._tokens = min(float(self.tpm), self._tokens + estimated - actual)
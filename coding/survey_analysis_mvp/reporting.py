@@ -2,23 +2,23 @@
 
 from __future__ import annotations
 
-import tempfile
-import base64
 import io
 import os
 import re
 import asyncio
+import copy
+from collections import Counter
+from concurrent.futures import Executor, Future
 from pathlib import Path
 from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, Mapping
 
-import matplotlib as mpl
-import matplotlib.pyplot as plt
 import pandas as pd
-from fpdf import FPDF, HTMLMixin
-from jinja2 import Environment, FileSystemLoader
-from wordcloud import WordCloud
+from fpdf import FPDF
 
-from wc_tokenizer import tokenize_texts
+from parallel import process_pool, resolve_processes
+from wc_tokenizer import SENTIMENT_SLICES, frequencies_by_slice
 
 from analysis import (
     ReportCommentary,
@@ -46,6 +46,10 @@ _FONT_CONFIGURED = False
 
 def set_japanese_font() -> bool:
     """Configure matplotlib to use bundled Japanese fonts only once."""
+    # matplotlib はグラフを描く時点で読み込む（起動時間短縮のため）
+    import matplotlib as mpl
+    import matplotlib.font_manager
+
     global _FONT_CONFIGURED
     if _FONT_CONFIGURED:
         return True
@@ -69,12 +73,22 @@ def set_japanese_font() -> bool:
 # --- Chart generation -------------------------------------------------------
 
 
-def create_sentiment_pie_chart_base64(sentiment_counts: pd.Series) -> str:
-    """Return a base64 PNG string of the sentiment distribution pie chart."""
+def _figure_png(fig) -> bytes:
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight")
+    return buf.getvalue()
+
+
+# pyplot のグローバル状態を使わず Figure を直接生成するため、
+# スレッドやワーカープロセスから同時に呼び出せる
+def render_sentiment_pie_chart(sentiment_counts: pd.Series) -> bytes:
+    """Return PNG bytes of the sentiment distribution pie chart."""
     if not set_japanese_font() or sentiment_counts.empty:
-        return ""
+        return b""
+    from matplotlib.figure import Figure
 
-    fig, ax = plt.subplots()
+    fig = Figure()
+    ax = fig.subplots()
     ax.pie(
         sentiment_counts,
         labels=sentiment_counts.index,
@@ -84,57 +98,108 @@ def create_sentiment_pie_chart_base64(sentiment_counts: pd.Series) -> str:
     )
     ax.axis("equal")
     ax.set_title("感情分析サマリー")
+    return _figure_png(fig)
 
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png", bbox_inches="tight")
-    buf.seek(0)
-    plt.close(fig)
-    return base64.b64encode(buf.getvalue()).decode("utf-8")
 
-
-def create_topics_bar_chart_base64(topic_counts: pd.Series) -> str:
-    """Return a base64 PNG string of the top topics bar chart."""
+def render_topics_bar_chart(topic_counts: pd.Series) -> bytes:
+    """Return PNG bytes of the top topics bar chart."""
     if not set_japanese_font() or topic_counts.empty:
-        return ""
+        return b""
+    from matplotlib.figure import Figure
 
-    fig, ax = plt.subplots(figsize=(10, 8))
+    fig = Figure(figsize=(10, 8))
+    ax = fig.subplots()
     topic_counts.sort_values().plot(kind="barh", ax=ax)
     ax.set_title("主要トピック Top 15")
     ax.set_xlabel("出現回数")
-    plt.tight_layout()
+    fig.tight_layout()
+    return _figure_png(fig)
 
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    plt.close(fig)
-    return base64.b64encode(buf.getvalue()).decode("utf-8")
 
+# PDFに載せるグラフ: 名前 -> (描画関数, summary_data のキー)
+REPORT_CHARTS = {
+    "sentiment": (render_sentiment_pie_chart, "sentiment_counts"),
+    "topics": (render_topics_bar_chart, "topic_counts"),
+}
 
-def create_moderation_bar_chart_base64(moderation_summary: dict[str, int]) -> str:
-    """Return a base64 PNG string of the moderation summary bar chart."""
-    if not set_japanese_font() or not moderation_summary:
-        return ""
 
-    labels = list(moderation_summary.keys())
-    values = list(moderation_summary.values())
+def submit_charts(summary_data: dict, executor: Executor | None = None) -> dict:
+    """Start rendering the report charts of ``summary_data``.
 
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.bar(labels, values, color="skyblue")
-    ax.set_title("モデレーション結果サマリー")
-    ax.set_ylabel("フラグ数")
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
+    Args:
+        summary_data: Summary produced by ``summarize_results``.
+        executor: Executor (e.g. a ``ProcessPoolExecutor``) rendering the
+            charts concurrently. Without one, charts are rendered immediately
+            in the calling thread.
 
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png", bbox_inches="tight")
-    buf.seek(0)
-    plt.close(fig)
-    return base64.b64encode(buf.getvalue()).decode("utf-8")
+    Returns:
+        Mapping of chart name to a future resolving to its PNG bytes.
+    """
+    futures = {}
+    for name, (render, key) in REPORT_CHARTS.items():
+        data = summary_data.get(key, pd.Series())
+        if executor is not None:
+            futures[name] = executor.submit(render, data)
+        else:
+            future = Future()
+            future.set_result(render(data))
+            futures[name] = future
+    return futures
 
 
 # --- PDF generation ---------------------------------------------------------
 
 
+# フォントの使い回しを確認した fpdf2 の版の範囲（2.7.9 と 2.8.9 で検証）。
+# 範囲外の版では文書ごとに add_font で登録する
+FONT_CACHE_FPDF_VERSIONS = ((2, 7, 9), (2, 9))
+# 使い回しで差し替える、または共有する fpdf2 のフォントの属性
+_SHARED_FONT_ATTRIBUTES = ("ttfont", "cw", "glyph_ids")
+
+
+def _fpdf_version() -> tuple[int, ...]:
+    import fpdf
+
+    return tuple(int(part) for part in re.findall(r"\d+", fpdf.__version__)[:3])
+
+
+@lru_cache(maxsize=2)
+def _parsed_fonts(regular_path: str, bold_path: str) -> dict | None:
+    """Parse the report fonts once per process.
+
+    Returns:
+        Mapping of font key to ``(font, file bytes)``, or None when the fonts
+        cannot be shared between documents: fpdf2 outside
+        ``FONT_CACHE_FPDF_VERSIONS`` or with a different font layout, CFF,
+        compressed or color fonts, and TrueType fonts to which fpdf2 adds a
+        fallback ``.notdef`` glyph.
+    """
+    low, high = FONT_CACHE_FPDF_VERSIONS
+    if not low <= _fpdf_version() < high:
+        return None
+    from fontTools.ttLib import TTFont
+
+    # 出力しない文書に登録するため、解析済みのフォントはサブセット化されない
+    template = FPDF()
+    template.add_font("NotoSansJP", "", regular_path)
+    template.add_font("NotoSansJP", "B", bold_path)
+    fonts = {}
+    for (key, font), path in zip(template.fonts.items(), (regular_path, bold_path)):
+        if not all(hasattr(font, attr) for attr in _SHARED_FONT_ATTRIBUTES):
+            return None
+        data = Path(path).read_bytes()
+        raw = TTFont(io.BytesIO(data), lazy=True)
+        if (
+            getattr(font, "is_cff", False)
+            or getattr(font, "is_compressed", False)
+            or getattr(font, "color_font", None) is not None
+            or ("glyf" in raw and ".notdef" not in raw["glyf"])
+        ):
+            return None
+        fonts[key] = (font, data)
+    return fonts
+
+
 class ReportPDF(FPDF):
     """Custom PDF class for 5-page survey reports."""
 
@@ -148,13 +213,28 @@ class ReportPDF(FPDF):
         self.cell(0, 10, f"Page {self.page_no()}", 0, 0, "C")
 
     def setup_fonts(self) -> None:
-        """Register Japanese fonts."""
+        """Register Japanese fonts, reusing fonts parsed by earlier reports."""
         if not (FONT_REGULAR_PATH.exists() and FONT_BOLD_PATH.exists()):
             raise FileNotFoundError(
                 "NotoSansJPフォントファイルが見つかりません。fontsディレクトリを確認してください。",
             )
-        self.add_font("NotoSansJP", "", str(FONT_REGULAR_PATH), uni=True)
-        self.add_font("NotoSansJP", "B", str(FONT_BOLD_PATH), uni=True)
+        fonts = _parsed_fonts(str(FONT_REGULAR_PATH), str(FONT_BOLD_PATH))
+        if self.fonts or fonts is None:
+            self.add_font("NotoSansJP", "", str(FONT_REGULAR_PATH))
+            self.add_font("NotoSansJP", "B", str(FONT_BOLD_PATH))
+            return
+        from fontTools.ttLib import TTFont
+
+        for key, (font, data) in fonts.items():
+            # fpdf2 は出力時に TTFont をその場でサブセット化するため、文書ごとに
+            # ファイルの内容から開き直す。文字幅とグリフ ID の表は読み取り専用なので
+            # 共有し、それ以外の属性は fpdf2 自身の複製処理に任せる
+            ttfont = TTFont(io.BytesIO(data), recalcTimestamp=False, lazy=True)
+            shared = {id(font.ttfont): ttfont, id(font.cw): font.cw}
+            shared[id(font.glyph_ids)] = font.glyph_ids
+            copied = copy.deepcopy(font, shared)
+            copied.ttfont = ttfont
+            self.fonts[key] = copied
 
     # Page builders ------------------------------------------------------
     def create_cover_page(self, analysis_target: str = "（分析対象未設定）") -> None:
@@ -199,7 +279,7 @@ class ReportPDF(FPDF):
     def create_chart_commentary_page(
         self,
         title: str,
-        chart_base64: str,
+        chart_png: bytes,
         commentary_text: str,
         chart_width: int = 160,
     ) -> None:
@@ -210,19 +290,11 @@ class ReportPDF(FPDF):
         self.cell(0, 15, title, 0, 1, "L")
         self.ln(5)
 
-        if chart_base64:
-            tmp_file_path = ""
-            try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp_file:
-                    tmp_file.write(base64.b64decode(chart_base64))
-                    tmp_file_path = tmp_file.name
-                
-                x_pos = (A4_WIDTH - chart_width) / 2
-                self.image(tmp_file_path, x=x_pos, w=chart_width)
-                self.ln(5)
-            finally:
-                if tmp_file_path and os.path.exists(tmp_file_path):
-                    os.remove(tmp_file_path)
+        if chart_png:
+            # PNGをメモリ上のバッファのまま渡す（一時ファイルを使わない）
+            x_pos = (A4_WIDTH - chart_width) / 2
+            self.image(io.BytesIO(chart_png), x=x_pos, w=chart_width)
+            self.ln(5)
 
         self.set_font("NotoSansJP", "B", 12)
         self.cell(0, 10, "■ 分析からの示唆", 0, 1, "L")
@@ -277,10 +349,16 @@ class ReportPDF(FPDF):
 # --- Entry point ------------------------------------------------------------
 
 
-def generate_pdf_report(summary_data: dict, output_path: str):
+def generate_pdf_report(
+    summary_data: dict, output_path: str, charts: dict | None = None
+):
     """
     分析データから新しいデザインのPDFレポートを生成する。
+
+    ``charts`` には :func:`submit_charts` の戻り値を渡せる（省略時はその場で描画する）。
     """
+    if charts is None:
+        charts = submit_charts(summary_data)
     pdf = ReportPDF()
     pdf.setup_fonts()
     pdf.set_auto_page_break(auto=True, margin=15)
@@ -295,19 +373,17 @@ def generate_pdf_report(summary_data: dict, output_path: str):
     )
 
     # ページ3: 感情分析
-    sentiment_chart = create_sentiment_pie_chart_base64(summary_data.get("sentiment_counts", pd.Series()))
     pdf.create_chart_commentary_page(
         title="分析詳細①：全体感情分析",
-        chart_base64=sentiment_chart,
+        chart_png=charts["sentiment"].result(),
         commentary_text=summary_data.get("sentiment_commentary", "解説がありません。"),
         chart_width=120
     )
 
     # ページ4: 主要トピック
-    topics_chart = create_topics_bar_chart_base64(summary_data.get("topic_counts", pd.Series()))
     pdf.create_chart_commentary_page(
         title="分析詳細②：主要トピック",
-        chart_base64=topics_chart,
+        chart_png=charts["topics"].result(),
         commentary_text=summary_data.get("topics_commentary", "解説がありません。"),
         chart_width=180
     )
@@ -321,9 +397,55 @@ def generate_pdf_report(summary_data: dict, output_path: str):
     print(f"新しいデザインのPDFレポートが '{output_path}' として生成されました。")
 
 
-def generate_wordcloud(words: list[str], output_path: str, exclude_words: list[str] | None = None) -> None:
-    """Generate and save a word cloud image."""
-    if not words:
+def generate_pdf_reports(
+    reports: list[tuple[dict, str]], processes: int | None = None
+) -> None:
+    """Generate many PDF reports with charts rendered in worker processes.
+
+    The charts of every report are submitted to one process pool up front,
+    so chart rendering runs concurrently and overlaps with the assembly of
+    earlier PDFs. A single report is generated in the calling process,
+    where starting the pool would cost more than it saves.
+
+    Args:
+        reports: ``(summary_data, output_path)`` pairs.
+        processes: Number of worker processes. Defaults to the CPU count.
+    """
+    if len(reports) <= 1 or processes == 1:
+        for summary_data, output_path in reports:
+            generate_pdf_report(summary_data, output_path)
+        return
+    with process_pool(resolve_processes(processes)) as executor:
+        pending = [
+            (summary_data, output_path, submit_charts(summary_data, executor))
+            for summary_data, output_path in reports
+        ]
+        for summary_data, output_path, charts in pending:
+            generate_pdf_report(summary_data, output_path, charts)
+
+
+def generate_wordcloud(
+    words: Mapping[str, int] | Iterable[str],
+    output_path: str,
+    exclude_words: Iterable[str] | None = None,
+) -> None:
+    """Generate and save a word cloud image.
+
+    Args:
+        words: Token frequencies (e.g. a ``Counter``) or a plain token list.
+        output_path: Destination PNG path.
+        exclude_words: Words left out of the cloud.
+    """
+    if not isinstance(words, Mapping):
+        words = Counter(words)
+    # WordCloud.generate() の既定の正規表現と同じく1文字の語は除外する
+    excluded = set(exclude_words or ())
+    frequencies = {
+        word: count
+        for word, count in words.items()
+        if len(word) > 1 and word not in excluded
+    }
+    if not frequencies:
         print("ワードクラウドを生成するための単語がありません。")
         return
 
@@ -332,9 +454,7 @@ def generate_wordcloud(words: list[str], output_path: str, exclude_words: list[s
         print("日本語フォントが見つからないため、ワードクラウドを生成できません。")
         return
 
-    # Exclude words
-    if exclude_words:
-        words = [word for word in words if word not in exclude_words]
+    from wordcloud import WordCloud
 
     wc = WordCloud(
         width=800,
@@ -342,7 +462,7 @@ def generate_wordcloud(words: list[str], output_path: str, exclude_words: list[s
         background_color="white",
         font_path=font_path,
         collocations=False,
-    ).generate(" ".join(words))
+    ).generate_from_frequencies(frequencies)
 
     wc.to_file(output_path)
     print(f"ワードクラウドが '{output_path}' として保存されました。")
@@ -373,37 +493,29 @@ def create_report(
         .value_counts()
         .reindex(["positive", "neutral", "negative"], fill_value=0)
     )
-    chart_base64 = create_sentiment_pie_chart_base64(counts)
-    if chart_base64:
+    chart_png = render_sentiment_pie_chart(counts)
+    if chart_png:
         chart_path = os.path.join(output_dir, "sentiment_chart.png")
         with open(chart_path, "wb") as f:
-            f.write(base64.b64decode(chart_base64))
+            f.write(chart_png)
 
     # --- Word cloud ------------------------------------------------------
+    texts = df[column_name]
+    texts = texts.astype(str).where(texts.notna()).tolist()
     if wordcloud_type == "normal":
-        texts = df[column_name].dropna().astype(str).tolist()
-        words = tokenize_texts(texts)
-        generate_wordcloud(words, os.path.join(output_dir, "wordcloud.png"))
+        words = frequencies_by_slice(texts, df["sentiment"].tolist(), {"all": None})
+        generate_wordcloud(words["all"], os.path.join(output_dir, "wordcloud.png"))
         pos_wc = neg_wc = None
     else:
-        pos_texts = (
-            df[df["sentiment"].isin(["positive", "neutral"])][column_name]
-            .dropna()
-            .astype(str)
-            .tolist()
-        )
-        neg_texts = (
-            df[df["sentiment"].isin(["negative", "neutral"])][column_name]
-            .dropna()
-            .astype(str)
-            .tolist()
-        )
+        # 中立の回答は両方に含まれるが、分かち書きは1回だけ行う
+        slices = {name: SENTIMENT_SLICES[name] for name in ("positive", "negative")}
+        words = frequencies_by_slice(texts, df["sentiment"].tolist(), slices)
         generate_wordcloud(
-            tokenize_texts(pos_texts),
+            words["positive"],
             os.path.join(output_dir, "positive_wordcloud.png"),
         )
         generate_wordcloud(
-            tokenize_texts(neg_texts),
+            words["negative"],
             os.path.join(output_dir, "negative_wordcloud.png"),
         )
         pos_wc = os.path.join(output_dir, "positive_wordcloud.png")
@@ -460,7 +572,7 @@ def create_report(
     if commentary is not None:
         summary["sentiment_commentary"] = sentiment_commentary
         summary["topics_commentary"] = topics_commentary
-    elif chart_base64:
+    elif chart_png:
         summary["sentiment_commentary"] = ""
     generate_pdf_report(
         summary,
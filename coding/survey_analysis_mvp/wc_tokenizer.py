@@ -1,15 +1,27 @@
-from __future__ import annotations
-
 """Utilities for tokenizing Japanese text with SudachiPy for word cloud generation."""
 
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from functools import partial
 from pathlib import Path
-from typing import Iterable, List
+from typing import Callable, Iterable, Iterator, List, Sequence, TypeVar
 
 from sudachipy import dictionary, tokenizer as sudachi_tokenizer
 
-# Initialize Sudachi tokenizer
+from parallel import DEFAULT_MIN_PARALLEL_ITEMS, map_chunks, map_reduce_chunks
+
+T = TypeVar("T")
+
 SUDACHI_MODE = sudachi_tokenizer.Tokenizer.SplitMode.B
-_SUDACHI = dictionary.Dictionary().create()
+TARGET_POS = ("名詞", "動詞", "形容詞")
+# 1回のプロセス間通信で送る回答数
+CHUNK_SIZE = 1000
+# Sudachi tokenizer, created lazily once per process (each worker has its own)
+_SUDACHI = None
+# Sudachi のトークナイザは複数スレッドから同時に使えないため排他する
+_SUDACHI_LOCK = threading.Lock()
 
 # Load stopwords from bundled file if available
 STOPWORDS_PATH = Path(__file__).resolve().parent / "stopwords_ja.txt"
@@ -20,17 +32,172 @@ else:
     STOPWORDS: set[str] = set()
 
 
-def tokenize_texts(texts: Iterable[str]) -> List[str]:
+def get_sudachi():
+    """Return this process's Sudachi tokenizer, loading the dictionary once."""
+    global _SUDACHI
+    if _SUDACHI is None:
+        _SUDACHI = dictionary.Dictionary().create()
+    return _SUDACHI
+
+
+def map_morphemes(
+    texts: Iterable[str], func: Callable[[Iterable], T], mode=SUDACHI_MODE
+) -> list[T]:
+    """Apply ``func`` to the Sudachi morphemes of each text.
+
+    The texts are tokenized with this process's tokenizer while holding the
+    lock that serializes access to it, so callers in other modules do not
+    need to manage it. ``func`` runs under the lock as well and should only
+    read the morphemes it receives.
+
+    Args:
+        texts: Texts to tokenize.
+        func: Function mapping the morphemes of one text to a result.
+        mode: Sudachi split mode.
+
+    Returns:
+        One result per text, in input order.
+    """
+    sudachi = get_sudachi()
+    with _SUDACHI_LOCK:
+        return [func(sudachi.tokenize(text, mode)) for text in texts]
+
+
+def _iter_tokens(sudachi, text: str, stopwords: frozenset[str]) -> Iterator[str]:
+    for m in sudachi.tokenize(text, SUDACHI_MODE):
+        if m.part_of_speech()[0] in TARGET_POS:
+            lemma = m.dictionary_form()
+            if lemma and lemma not in stopwords:
+                yield lemma
+
+
+def _tokenize_chunk(texts: list[str], stopwords: frozenset[str]) -> list[list[str]]:
+    sudachi = get_sudachi()
+    with _SUDACHI_LOCK:
+        return [list(_iter_tokens(sudachi, text, stopwords)) for text in texts]
+
+
+def _count_chunk(
+    rows: list[tuple[str, object]],
+    slices: dict[str, tuple[str, ...] | None],
+    stopwords: frozenset[str],
+) -> dict[str, Counter]:
+    # チャンクごとに集計した頻度だけを親プロセスへ返す
+    sudachi = get_sudachi()
+    counts = {name: Counter() for name in slices}
+    with _SUDACHI_LOCK:
+        for text, label in rows:
+            row_counts = Counter(_iter_tokens(sudachi, text, stopwords))
+            for name, include in slices.items():
+                if include is None or label in include:
+                    counts[name].update(row_counts)
+    return counts
+
+
+def _merge_counts(
+    total: dict[str, Counter], counts: dict[str, Counter]
+) -> dict[str, Counter]:
+    for name, counter in counts.items():
+        total[name].update(counter)
+    return total
+
+
+def tokenize_rows(
+    texts: Sequence[str],
+    processes: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    min_parallel_items: int = DEFAULT_MIN_PARALLEL_ITEMS,
+) -> List[List[str]]:
+    """Tokenize each text and return its filtered base-form tokens.
+
+    Texts are sharded in chunks of ``chunk_size`` across ``processes`` worker
+    processes, each with its own Sudachi dictionary. Inputs smaller than
+    ``min_parallel_items`` are tokenized in the calling process.
+
+    Args:
+        texts: Texts to tokenize.
+        processes: Number of worker processes. Defaults to the CPU count.
+        chunk_size: Texts sent to a worker per task.
+        min_parallel_items: Minimum number of texts for parallel processing.
+
+    Returns:
+        One token list per text, in input order.
+    """
+    return map_chunks(
+        partial(_tokenize_chunk, stopwords=frozenset(STOPWORDS)),
+        texts,
+        processes=processes,
+        chunk_size=chunk_size,
+        min_parallel_items=min_parallel_items,
+    )
+
+
+# ワードクラウドの種類ごとに含めるセンチメント (None は全回答)
+SENTIMENT_SLICES: dict[str, tuple[str, ...] | None] = {
+    "all": None,
+    "positive": ("positive", "neutral"),
+    "negative": ("negative", "neutral"),
+}
+
+
+def frequencies_by_slice(
+    texts: Sequence,
+    labels: Sequence,
+    slices: dict[str, tuple[str, ...] | None] = SENTIMENT_SLICES,
+    processes: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    min_parallel_items: int = DEFAULT_MIN_PARALLEL_ITEMS,
+) -> dict[str, Counter]:
+    """Tokenize every text once and count the tokens of each slice.
+
+    Only term frequencies are kept, so memory grows with the vocabulary
+    rather than with the total number of tokens.
+
+    Args:
+        texts: One text per row; non-text values such as ``None`` or NaN
+            are skipped.
+        labels: Label (e.g. sentiment) of each row.
+        slices: Slice name mapped to the labels it includes, or ``None`` for
+            all rows.
+        processes: Worker processes, as in :func:`tokenize_rows`.
+        chunk_size: Texts sent to a worker per task.
+        min_parallel_items: Minimum number of texts for parallel processing.
+
+    Returns:
+        Token frequencies per slice name.
+    """
+    rows = [
+        (text, label) for text, label in zip(texts, labels) if isinstance(text, str)
+    ]
+    return map_reduce_chunks(
+        partial(_count_chunk, slices=slices, stopwords=frozenset(STOPWORDS)),
+        _merge_counts,
+        rows,
+        processes=processes,
+        chunk_size=chunk_size,
+        min_parallel_items=min_parallel_items,
+    )
+
+
+def count_tokens(texts: Iterable[str], processes: int | None = None) -> Counter:
+    """Return the frequency of each filtered base-form token in ``texts``."""
+    texts = list(texts)
+    return frequencies_by_slice(
+        texts, [None] * len(texts), {"all": None}, processes=processes
+    )["all"]
+
+
+def tokenize_texts(
+    texts: Iterable[str], processes: int | None = None
+) -> List[str]:
     """Tokenize ``texts`` using Sudachi and return filtered base-form tokens.
 
     The tokenizer uses Sudachi's split mode B and keeps only nouns, verbs and
-    adjectives. Tokens present in ``STOPWORDS`` are removed.
+    adjectives. Tokens present in ``STOPWORDS`` are removed. Large inputs are
+    processed in parallel by :func:`tokenize_rows`. Use :func:`count_tokens`
+    when only the frequencies are needed.
     """
     tokens: List[str] = []
-    for text in texts:
-        for m in _SUDACHI.tokenize(text, SUDACHI_MODE):
-            if m.part_of_speech()[0] in ["名詞", "動詞", "形容詞"]:
-                lemma = m.dictionary_form()
-                if lemma and lemma not in STOPWORDS:
-                    tokens.append(lemma)
+    for row in tokenize_rows(list(texts), processes=processes):
+        tokens.extend(row)
     return tokens
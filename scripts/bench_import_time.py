@@ -0,0 +1,62 @@
+"""Report the cold import time of the application modules.
+
+Usage: python scripts/bench_import_time.py [module ...] [--top N]
+
+Each module is imported in a fresh interpreter with ``python -X importtime``;
+the script prints the total cumulative time and the slowest top-level imports.
+"""
+
+import os
+import pathlib
+import subprocess
+import sys
+
+ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
+MODULE_DIR = ROOT_DIR / "coding" / "survey_analysis_mvp"
+DEFAULT_MODULES = ["analysis", "reporting", "main"]
+
+
+def measure_import(module: str) -> list[tuple[str, int, int]]:
+    """Import ``module`` in a subprocess and parse ``-X importtime`` output.
+
+    Returns:
+        ``(name, depth, cumulative_microseconds)`` per imported module, in
+        the order reported by the interpreter (the last entry is ``module``).
+    """
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "unused"))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=MODULE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(cumulative)))
+    return entries
+
+
+def report(module: str, top: int) -> None:
+    entries = measure_import(module)
+    total = entries[-1][2] if entries else 0
+    print(f"{module:<12} {total / 1e6:6.2f} s")
+    children = sorted((e for e in entries if e[1] == 1), key=lambda e: -e[2])
+    for name, _, cumulative in children[:top]:
+        print(f"    {name:<30} {cumulative / 1e6:6.2f} s")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    top = 5
+    if "--top" in args:
+        pos = args.index("--top")
+        top = int(args[pos + 1])
+        del args[pos : pos + 2]
+    for module in args or DEFAULT_MODULES:
+        report(module, top)
@@ -0,0 +1,83 @@
+"""Measure per-report time when generating many PDF reports in one process.
+
+Usage: python scripts/bench_pdf_reports.py [reports]
+
+Reports are generated in a loop, alternating between fonts parsed by
+``add_font`` for every report (uncached) and the fonts parsed once per
+process by ``ReportPDF.setup_fonts`` (cached), and the median time per
+report is printed for each. Charts are rendered once up front so that the
+numbers reflect PDF assembly. Without the bundled NotoSansJP fonts, the DejaVu Sans
+fonts shipped with matplotlib are used instead.
+"""
+
+import contextlib
+import os
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "coding" / "survey_analysis_mvp"))
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+import matplotlib  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import reporting  # noqa: E402
+
+SUMMARY = {
+    "analysis_target": "改善点",
+    "summary_text": "価格とサポートに関する意見が多く寄せられました。" * 5,
+    "action_items": ["料金プランを見直す"],
+    "sentiment_counts": pd.Series([120, 80, 45], index=["positive", "neutral", "negative"]),
+    "topic_counts": pd.Series([50, 30, 20, 10], index=["価格", "サポート", "品質", "配送"]),
+}
+
+
+def use_fallback_fonts() -> None:
+    if reporting.FONT_REGULAR_PATH.exists() and reporting.FONT_BOLD_PATH.exists():
+        return
+    ttf_dir = pathlib.Path(matplotlib.get_data_path()) / "fonts" / "ttf"
+    reporting.FONT_REGULAR_PATH = ttf_dir / "DejaVuSans.ttf"
+    reporting.FONT_BOLD_PATH = ttf_dir / "DejaVuSans-Bold.ttf"
+    print(f"fonts={ttf_dir}/DejaVuSans*.ttf (NotoSansJP not found)")
+
+
+def uncached_setup_fonts(pdf: reporting.ReportPDF) -> None:
+    # 以前の setup_fonts（比較用）
+    pdf.add_font("NotoSansJP", "", str(reporting.FONT_REGULAR_PATH))
+    pdf.add_font("NotoSansJP", "B", str(reporting.FONT_BOLD_PATH))
+
+
+def measure(reports: int, output_dir: str) -> dict[str, float]:
+    charts = reporting.submit_charts(SUMMARY)
+    variants = {
+        "uncached": uncached_setup_fonts,
+        "cached": reporting.ReportPDF.setup_fonts,
+    }
+    timings: dict[str, list[float]] = {name: [] for name in variants}
+    # 生成メッセージが計測結果に混ざらないよう標準出力を捨てる
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # 負荷の揺らぎが片方に偏らないよう交互に生成する
+        for i in range(reports):
+            for name, setup_fonts in variants.items():
+                reporting.ReportPDF.setup_fonts = setup_fonts
+                start = time.perf_counter()
+                reporting.generate_pdf_report(
+                    SUMMARY, os.path.join(output_dir, f"{i}.pdf"), charts
+                )
+                timings[name].append(time.perf_counter() - start)
+    reporting.ReportPDF.setup_fonts = variants["cached"]
+    return {name: statistics.median(values) for name, values in timings.items()}
+
+
+if __name__ == "__main__":
+    reports = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    use_fallback_fonts()
+    print(f"reports={reports}")
+    with tempfile.TemporaryDirectory() as output_dir:
+        medians = measure(reports, output_dir)
+    for name, median in medians.items():
+        print(f"{name:<10} {median * 1000:8.1f} ms/report (median)")
@@ -0,0 +1,99 @@
+"""Compare the vectorized result aggregation with the former per-row loops.
+
+Usage: python scripts/bench_summarize.py [rows]
+
+Only the aggregation of the result columns is measured; word-cloud
+tokenization is covered by ``bench_wc_tokenizer.py`` and the report
+commentary is an API call.
+"""
+
+import os
+import pathlib
+import sys
+import time
+
+ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "coding" / "survey_analysis_mvp"))
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from analysis import (  # noqa: E402
+    EMOTION_TYPES,
+    MODERATION_CATEGORIES,
+    SENTIMENT_ORDER,
+    aggregate_results,
+)
+
+TOPICS = ["価格", "サポート", "品質", "配送", "デザイン", "操作性", "速度", "説明"]
+
+
+def build_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    topic_ids = rng.integers(0, len(TOPICS), size=(rows, 3))
+    lengths = rng.integers(0, 4, size=rows)
+    data = {
+        "analysis_sentiment": np.array(SENTIMENT_ORDER, dtype=object)[
+            rng.integers(0, 4, size=rows)
+        ],
+        "analysis_key_topics": [
+            [TOPICS[t] for t in ids[:n]] for ids, n in zip(topic_ids, lengths)
+        ],
+    }
+    for cat in MODERATION_CATEGORIES:
+        data[f"moderation_categories_{cat}"] = rng.random(rows) < 0.01
+    for emo in EMOTION_TYPES:
+        data[f"emotion_{emo}"] = rng.random(rows) * 5
+    return pd.DataFrame(data)
+
+
+def legacy_aggregate(df: pd.DataFrame) -> dict:
+    # 以前の summarize_results の集計処理（比較用）
+    sentiment_counts = (
+        df["analysis_sentiment"].value_counts().reindex(SENTIMENT_ORDER, fill_value=0)
+    )
+    all_topics = []
+    for topics in df["analysis_key_topics"]:
+        if isinstance(topics, list):
+            all_topics.extend(topics)
+    topic_counts = pd.Series(all_topics).value_counts()
+    moderation_summary = {}
+    for cat in MODERATION_CATEGORIES:
+        col_name = f"moderation_categories_{cat}"
+        moderation_summary[cat] = df[col_name].sum() if col_name in df.columns else 0
+    emotion_avg = {}
+    for emo in EMOTION_TYPES:
+        col_name = f"emotion_{emo}"
+        emotion_avg[emo] = df[col_name].mean() if col_name in df.columns else 0.0
+    return {
+        "sentiment_counts": sentiment_counts,
+        "topic_counts": topic_counts.head(15),
+        "moderation_summary": moderation_summary,
+        "emotion_avg": emotion_avg,
+    }
+
+
+def measure(name: str, func, df: pd.DataFrame, repeat: int = 3) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        timings.append(time.perf_counter() - start)
+    print(f"{name:<10} {min(timings):8.3f} s (best of {repeat})")
+    return result
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = build_frame(rows)
+    print(f"rows={rows}")
+    legacy = measure("legacy", legacy_aggregate, df)
+    vectorized = measure("vectorized", aggregate_results, df)
+    pd.testing.assert_series_equal(legacy["sentiment_counts"], vectorized["sentiment_counts"])
+    pd.testing.assert_series_equal(legacy["topic_counts"], vectorized["topic_counts"])
+    assert legacy["moderation_summary"] == vectorized["moderation_summary"]
+    assert np.allclose(
+        list(legacy["emotion_avg"].values()), list(vectorized["emotion_avg"].values())
+    )
+    print("results match")
@@ -0,0 +1,36 @@
+"""Compare serial and multi-process word-cloud tokenization.
+
+Usage: python scripts/bench_wc_tokenizer.py [rows] [processes]
+"""
+
+import os
+import pathlib
+import sys
+import time
+
+ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "coding" / "survey_analysis_mvp"))
+
+from wc_tokenizer import tokenize_rows  # noqa: E402
+
+SAMPLES = [
+    "価格が高いと感じました。もう少し安くしてほしいです。",
+    "サポートの対応がとても丁寧で満足しています",
+    "アプリの動作が遅く、ログインに時間がかかります",
+    "商品の品質は良いが配送が遅かった",
+]
+
+
+def measure(name: str, texts: list[str], processes: int) -> None:
+    start = time.perf_counter()
+    tokenize_rows(texts, processes=processes)
+    print(f"{name:<10} {time.perf_counter() - start:8.2f} s")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    texts = [f"{SAMPLES[i % len(SAMPLES)]}{i}" for i in range(rows)]
+    print(f"rows={rows} processes={processes}")
+    measure("serial", texts, 1)
+    measure("parallel", texts, processes)
@@ -0,0 +1,66 @@
+"""Compare one-task-per-row scheduling with the bounded worker pool.
+
+Usage: python scripts/bench_worker_pool.py [rows] [concurrency]
+
+Each "request" is simulated with ``asyncio.sleep(0)`` so the numbers reflect
+scheduling and bookkeeping overhead only. Peak memory is measured with
+tracemalloc.
+"""
+
+import asyncio
+import pathlib
+import sys
+import time
+import tracemalloc
+
+ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "coding" / "survey_analysis_mvp"))
+
+from concurrency import run_worker_pool  # noqa: E402
+
+
+async def fake_request(idx: int) -> int:
+    await asyncio.sleep(0)
+    return idx
+
+
+async def one_task_per_row(rows: int, concurrency: int) -> None:
+    """Previous analyze_dataframe scheduling: create_task + as_completed."""
+    semaphore = asyncio.Semaphore(concurrency)
+    results = [None] * rows
+
+    async def sem_task(idx: int):
+        async with semaphore:
+            return idx, await fake_request(idx)
+
+    tasks = [asyncio.create_task(sem_task(idx)) for idx in range(rows)]
+    for coro in asyncio.as_completed(tasks):
+        idx, value = await coro
+        results[idx] = value
+
+
+async def worker_pool(rows: int, concurrency: int) -> None:
+    results = [None] * rows
+
+    async def handle(idx: int) -> None:
+        results[idx] = await fake_request(idx)
+
+    await run_worker_pool(range(rows), handle, worker_count=concurrency)
+
+
+def measure(name: str, func, rows: int, concurrency: int) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    asyncio.run(func(rows, concurrency))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<18} {elapsed:8.2f} s  peak {peak / 1024 / 1024:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print(f"rows={rows} concurrency={concurrency}")
+    measure("one task per row", one_task_per_row, rows, concurrency)
+    measure("worker pool", worker_pool, rows, concurrency)
@@ -0,0 +1,35 @@
+"""Measure how much Sudachi pre-tokenization inflates survey prompt tokens.
+
+Usage: python scripts/measure_prompt_inflation.py <file.xlsx|file.csv> <column> [mode]
+
+Prints the prompt tokens of the raw responses and of their space-joined
+tokenization. Install ``tiktoken`` for exact counts; otherwise the built-in
+estimate is used. Use the result to decide whether to set
+``PRETOKENIZE_PROMPTS=false``.
+"""
+
+import os
+import pathlib
+import sys
+
+import pandas as pd
+
+ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "coding" / "survey_analysis_mvp"))
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+from analysis import measure_prompt_inflation  # noqa: E402
+
+
+if __name__ == "__main__":
+    path, column = sys.argv[1], sys.argv[2]
+    mode = sys.argv[3] if len(sys.argv) > 3 else "B"
+    if path.endswith(".csv"):
+        df = pd.read_csv(path, usecols=[column])
+    else:
+        df = pd.read_excel(path, usecols=[column])
+    report = measure_prompt_inflation(df[column].tolist(), mode)
+    print(f"counter           {report['counter']}")
+    print(f"raw tokens        {report['raw_tokens']}")
+    print(f"tokenized tokens  {report['tokenized_tokens']}")
+    print(f"inflation         {report['inflation']:.3f}x")
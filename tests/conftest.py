@@ -0,0 +1,119 @@
+import os
+import re
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import analysis
+from analysis import (
+    BatchAnalysis,
+    BatchItemAnalysis,
+    EmotionScores,
+    FusedAnalysis,
+    ModerationCategories,
+    ModerationScores,
+    SurveyResponseAnalysis,
+)
+
+
+def make_item(item_id: str) -> BatchItemAnalysis:
+    return BatchItemAnalysis(
+        id=item_id,
+        survey_analysis=SurveyResponseAnalysis(
+            sentiment="positive",
+            key_topics=["batch"],
+            verbatim_quote=item_id,
+            actionable_insight=False,
+        ),
+        emotion_scores=EmotionScores(
+            joy=3.0, sadness=0.0, fear=0.0, surprise=0.0, anger=0.0, disgust=0.0,
+            reason="",
+        ),
+    )
+
+
+class FakeCompletions:
+    """Chat completions answering every response model without the API.
+
+    Batched requests return one item per row ID found in the prompt, except
+    for ``drop_ids``.
+    """
+
+    def __init__(self, drop_ids=()):
+        self.calls = []
+        self.drop_ids = set(drop_ids)
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        response_model = kwargs["response_model"]
+        if response_model is BatchAnalysis:
+            prompt = kwargs["messages"][-1]["content"]
+            ids = re.findall(r'"id": "(\d+)"', prompt)
+            return BatchAnalysis(
+                items=[make_item(i) for i in ids if i not in self.drop_ids]
+            )
+        survey = SurveyResponseAnalysis(
+            sentiment="negative",
+            key_topics=["価格"],
+            verbatim_quote="高い",
+            actionable_insight=True,
+        )
+        emotion = EmotionScores(
+            joy=0.0, sadness=1.0, fear=0.0, surprise=0.0, anger=2.0, disgust=0.0,
+            reason="不満",
+        )
+        if response_model is FusedAnalysis:
+            return FusedAnalysis(survey_analysis=survey, emotion_scores=emotion)
+        if response_model is SurveyResponseAnalysis:
+            return survey
+        return emotion
+
+
+class FakeModerations:
+    """Moderation endpoint returning one unflagged result per input."""
+
+    def __init__(self):
+        self.inputs = []
+
+    async def create(self, input):
+        self.inputs.append(input)
+        result = SimpleNamespace(
+            flagged=False,
+            categories=ModerationCategories(
+                hate=False, hate_threatening=False, self_harm=False, sexual=False,
+                sexual_minors=False, violence=False, violence_graphic=False,
+            ),
+            category_scores=ModerationScores(
+                hate=0.0, hate_threatening=0.0, self_harm=0.0, sexual=0.0,
+                sexual_minors=0.0, violence=0.0, violence_graphic=0.0,
+            ),
+        )
+        count = len(input) if isinstance(input, list) else 1
+        return SimpleNamespace(results=[result] * count)
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    """Return a function replacing the OpenAI client with the fakes above.
+
+    The function takes the ``drop_ids`` of :class:`FakeCompletions` and
+    returns the installed ``(completions, moderations)``.
+    """
+
+    def install(drop_ids=()):
+        completions = FakeCompletions(drop_ids)
+        moderations = FakeModerations()
+        client = SimpleNamespace(
+            chat=SimpleNamespace(completions=completions), moderations=moderations
+        )
+        monkeypatch.setattr(analysis, "aclient", client)
+        return completions, moderations
+
+    return install
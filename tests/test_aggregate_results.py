@@ -0,0 +1,61 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import analysis
+
+
+def test_aggregate_results_counts_topics_flags_and_emotions():
+    survey = analysis.EMPTY_RESULT.survey_analysis
+    results = [
+        analysis.EMPTY_RESULT.model_copy(
+            update={
+                "survey_analysis": survey.model_copy(
+                    update={"sentiment": sentiment, "key_topics": topics}
+                )
+            }
+        )
+        for sentiment, topics in [
+            ("positive", ["価格", "品質"]),
+            ("negative", ["価格"]),
+            ("negative", []),
+        ]
+    ]
+    df = analysis.build_result_frame(pd.DataFrame({"回答": ["a", "b", "c"]}), results)
+    df.loc[0, "moderation_categories_hate"] = True
+    df["emotion_joy"] = [3.0, 0.0, 0.0]
+    # Parquet から読み込んだ配列や欠損値が混ざっていても数えられる
+    df["analysis_key_topics"] = [np.array(["価格", "品質"]), ["価格"], None]
+
+    summary = analysis.aggregate_results(df)
+
+    assert summary["sentiment_counts"].to_dict() == {
+        "positive": 1,
+        "neutral": 0,
+        "negative": 2,
+        "mixed": 0,
+    }
+    assert summary["topic_counts"].to_dict() == {"価格": 2, "品質": 1}
+    assert summary["moderation_summary"]["hate"] == 1
+    assert summary["moderation_summary"]["violence"] == 0
+    assert summary["emotion_avg"]["joy"] == 1.0
+    assert set(summary["emotion_avg"]) == {"joy", "sadness", "fear", "surprise", "anger", "disgust"}
+
+
+def test_aggregate_results_ignores_strings_and_missing_topics():
+    df = analysis.build_result_frame(
+        pd.DataFrame({"回答": ["a", "b", "c"]}), [analysis.empty_result() for _ in range(3)]
+    )
+    df["analysis_key_topics"] = [("価格",), "価格", None]
+
+    summary = analysis.aggregate_results(df)
+
+    assert summary["topic_counts"].to_dict() == {"価格": 1}
@@ -20,7 +20,9 @@ from analysis import (
 )
 
 
-async def fake_analyze_single_text(text: str, mode: str = "B") -> ComprehensiveAnalysisResult:
+async def fake_analyze_single_text(
+    text: str, mode: str = "B", **kwargs
+) -> ComprehensiveAnalysisResult:
     return ComprehensiveAnalysisResult(
         survey_analysis=SurveyResponseAnalysis(
             sentiment="positive",
@@ -68,3 +70,73 @@ def test_analyze_dataframe(monkeypatch):
     assert "analysis_sentiment" in result.columns
     assert len(result) == 2
     assert all(result["analysis_sentiment"] == "positive")
+
+
+def test_analyze_dataframe_collapses_duplicates(monkeypatch):
+    calls = []
+
+    async def counting_analyze(text, mode="B", **kwargs):
+        calls.append(text)
+        return await fake_analyze_single_text(text, mode)
+
+    monkeypatch.setattr(analysis, "analyze_single_text", counting_analyze)
+    df = pd.DataFrame({"text": ["特になし", "満足", "特になし ", "特になし", None]})
+    report = {}
+    result = asyncio.run(analysis.analyze_dataframe(df, "text", run_report=report))
+    assert [c for c in calls if isinstance(c, str)] == ["特になし", "満足"]
+    assert len(calls) == 3
+    assert len(result) == 5
+    assert all(result["analysis_sentiment"] == "positive")
+    assert report["unique_texts"] == 3
+    assert report["dedup_ratio"] == 0.4
+
+
+def test_deduplicated_rows_do_not_share_topic_lists(monkeypatch):
+    monkeypatch.setattr(analysis, "analyze_single_text", fake_analyze_single_text)
+    df = pd.DataFrame({"text": ["同じ", "同じ", None, "", None]})
+    result = asyncio.run(analysis.analyze_dataframe(df, "text", dedup=True))
+
+    topics = result["analysis_key_topics"]
+    assert len({id(cell) for cell in topics}) == len(df)
+    # 1行のトピックを書き換えても同じ結果を共有する他の行には影響しない
+    topics[0].append("追加")
+    topics[2].append("追加")
+    assert topics[1] == ["topic"]
+    assert "追加" not in topics[3] and "追加" not in topics[4]
+
+
+def test_analyze_dataframe_typed_columns_without_mutating_input(monkeypatch):
+    monkeypatch.setattr(analysis, "analyze_single_text", fake_analyze_single_text)
+    df = pd.DataFrame({"text": ["a", "b", None]}, index=[10, 20, 30])
+    result = asyncio.run(analysis.analyze_dataframe(df, "text"))
+    assert list(df.index) == [10, 20, 30]
+    assert list(df.columns) == ["text"]
+    assert list(result.index) == [0, 1, 2]
+    assert result["emotion_joy"].dtype == "float64"
+    assert result["moderation_flagged"].dtype == bool
+    assert result["moderation_categories_hate"].dtype == bool
+    assert result["moderation_category_scores_violence"].dtype == "float64"
+    assert "moderation_categories" not in result.columns
+    assert result.loc[0, "analysis_key_topics"] == ["topic"]
+
+
+def test_analyze_dataframe_multiple_columns_in_one_run(monkeypatch):
+    calls = []
+
+    async def counting_analyze(text, mode="B", **kwargs):
+        calls.append(text)
+        return await fake_analyze_single_text(text, mode)
+
+    monkeypatch.setattr(analysis, "analyze_single_text", counting_analyze)
+    df = pd.DataFrame({"良い点": ["安い", "早い"], "改善点": ["高い", "安い"]})
+    report = {}
+    result = asyncio.run(
+        analysis.analyze_dataframe(df, ["良い点", "改善点"], run_report=report)
+    )
+    assert sorted(calls) == sorted(["安い", "早い", "高い"])
+    assert report["rows"] == 4
+    assert "改善点_analysis_sentiment" in result.columns
+    assert "analysis_sentiment" not in result.columns
+    assert result["良い点_emotion_joy"].tolist() == [1.0, 1.0]
+    per_column = analysis.column_results(result, "改善点")
+    assert list(per_column.columns[:2]) == ["改善点", "analysis_sentiment"]
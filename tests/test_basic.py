@@ -12,10 +12,20 @@ os.environ.setdefault("OPENAI_API_KEY", "test-key")
 import analysis
 import reporting
 
+
 def test_get_tokenizer_runs():
     tok = analysis.get_tokenizer()
     assert tok is not None
 
+
 def test_set_japanese_font_runs():
     result = reporting.set_japanese_font()
     assert isinstance(result, bool)
+
+
+def test_empty_results_are_independent_copies():
+    first = analysis.empty_result()
+    second = analysis.empty_result()
+    first.survey_analysis.key_topics.append("編集")
+    assert second.survey_analysis.key_topics == ["無回答"]
+    assert analysis.EMPTY_RESULT.survey_analysis.key_topics == ["無回答"]
@@ -0,0 +1,70 @@
+import os
+import sys
+import asyncio
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import analysis
+from concurrency import AdaptiveConcurrencyLimiter
+
+
+def test_plan_batches_respects_item_and_token_limits():
+    items = list(enumerate(["あ" * 10] * 5))
+    batches = analysis.plan_batches(items, max_items=2, max_tokens=10_000)
+    assert [len(b) for b in batches] == [2, 2, 1]
+    # 毎回送るシステムプロンプト・指示・スキーマの分も予算に含める
+    overhead = analysis.estimate_request_tokens(
+        analysis.build_batch_messages([]), analysis.BatchAnalysis, 0
+    )
+    budget = overhead + 2 * (10 + analysis.BATCH_OUTPUT_TOKENS_PER_ITEM)
+    batches = analysis.plan_batches(items, max_items=10, max_tokens=budget)
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert [idx for b in batches for idx, _ in b] == [0, 1, 2, 3, 4]
+
+
+def test_analyze_batch_leaves_out_missing_ids(fake_client):
+    completions, moderations = fake_client(drop_ids={"1"})
+
+    results = asyncio.run(analysis.analyze_batch([(0, "良い"), (1, "悪い"), (2, "普通")]))
+
+    assert len(completions.calls) == 1
+    assert moderations.inputs == [["良い", "悪い", "普通"]]
+    assert set(results) == {0, 2}
+    assert results[0].survey_analysis.verbatim_quote == "0"
+    assert results[2].survey_analysis.verbatim_quote == "2"
+
+
+def test_analyze_batch_keeps_row_ids_from_ten_upwards(fake_client):
+    completions, _ = fake_client(drop_ids={"12"})
+    items = [(idx, f"回答{idx}") for idx in range(15)]
+
+    results = asyncio.run(analysis.analyze_batch(items))
+
+    assert len(completions.calls) == 1
+    assert set(results) == set(range(15)) - {12}
+    assert results[14].survey_analysis.verbatim_quote == "14"
+
+
+def test_missing_ids_are_requeued_under_the_limiter(fake_client, monkeypatch):
+    fake_client(drop_ids={"1"})
+    limiter = AdaptiveConcurrencyLimiter(1, min_limit=1, max_limit=1)
+    fallback = []
+
+    async def fake_single(text, mode="B", **kwargs):
+        # 再分析も同時実行数の枠を1つ使っている
+        fallback.append((text, limiter.in_flight))
+        return analysis.empty_result()
+
+    monkeypatch.setattr(analysis, "analyze_single_text", fake_single)
+    results = asyncio.run(
+        analysis.analyze_texts(
+            ["良い", "悪い", "普通"], batch_size=3, cache=None, limiter=limiter
+        )
+    )
+
+    assert fallback == [("悪い", 1)]
+    assert [r.survey_analysis.verbatim_quote for r in results] == ["0", "N/A", "2"]
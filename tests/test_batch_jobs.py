@@ -0,0 +1,130 @@
+import os
+import sys
+import json
+import pandas as pd
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import batch_jobs
+from batch_jobs import LocalBatchBackend
+
+
+def fake_batch_worker(backend: LocalBatchBackend, fail_ids=()):
+    """Answer every request dropped in the inbox like the Batch API would."""
+    for path in backend.inbox.glob("*.jsonl"):
+        lines = []
+        for raw in path.read_text(encoding="utf-8").splitlines():
+            request = json.loads(raw)
+            custom_id = request["custom_id"]
+            if custom_id in fail_ids:
+                lines.append({"custom_id": custom_id, "response": None, "error": {"message": "boom"}})
+                continue
+            kind = custom_id.split("-")[0]
+            if kind == "moderation":
+                body = {
+                    "results": [
+                        {
+                            "flagged": False,
+                            "categories": {"hate": False, "hate/threatening": False, "self-harm": False,
+                                           "sexual": False, "sexual/minors": False, "violence": False,
+                                           "violence/graphic": False, "harassment": False},
+                            "category_scores": {"hate": 0.1, "hate/threatening": 0.0, "self-harm": 0.0,
+                                                "sexual": 0.0, "sexual/minors": 0.0, "violence": 0.0,
+                                                "violence/graphic": 0.0, "harassment": 0.0},
+                        }
+                    ]
+                }
+            else:
+                if kind == "survey":
+                    content = {"sentiment": "positive", "key_topics": ["食堂"],
+                               "verbatim_quote": "美味しい", "actionable_insight": False}
+                else:
+                    content = {"joy": 4, "sadness": 0, "fear": 0, "surprise": 0,
+                               "anger": 0, "disgust": 0, "reason": "満足"}
+                body = {"choices": [{"message": {"content": json.dumps(content, ensure_ascii=False)}}]}
+            lines.append({"custom_id": custom_id, "response": {"status_code": 200, "body": body}, "error": None})
+        out = backend.outbox / path.name
+        out.write_text("\n".join(json.dumps(l, ensure_ascii=False) for l in lines), encoding="utf-8")
+
+
+def test_batch_job_roundtrip(tmp_path):
+    df = pd.DataFrame({"text": ["食堂が美味しい", "", "食堂が美味しい", "駐車場が狭い"]})
+    job_dir = tmp_path / "job"
+    batch_jobs.export_batch_job(df, "text", job_dir, fused=False)
+
+    backend = LocalBatchBackend(tmp_path / "drop")
+    batch_jobs.submit_batch_job(job_dir, backend)
+    assert not batch_jobs.collect_batch_results(job_dir, backend)
+
+    fake_batch_worker(backend, fail_ids={"emotion-3"})
+    assert batch_jobs.collect_batch_results(job_dir, backend)
+
+    result = batch_jobs.ingest_batch_results(df, job_dir)
+    assert len(result) == 4
+    assert list(result["analysis_sentiment"]) == ["positive", "neutral", "positive", "neutral"]
+    assert result.loc[0, "analysis_key_topics"] == ["食堂"]
+    assert result.loc[1, "analysis_key_topics"] == ["無回答"]
+    assert result.loc[3, "analysis_key_topics"] == ["分析エラー"]
+    assert result.loc[2, "emotion_joy"] == 4
+    assert result.loc[0, "moderation_category_scores_hate"] == 0.1
+
+
+def test_lines_with_malformed_custom_id_are_skipped(tmp_path, capsys):
+    df = pd.DataFrame({"text": ["食堂が美味しい"]})
+    job_dir = tmp_path / "job"
+    batch_jobs.export_batch_job(df, "text", job_dir, fused=False)
+    backend = LocalBatchBackend(tmp_path / "drop")
+    batch_jobs.submit_batch_job(job_dir, backend)
+    fake_batch_worker(backend)
+    assert batch_jobs.collect_batch_results(job_dir, backend)
+
+    manifest = json.loads((job_dir / batch_jobs.MANIFEST_NAME).read_text(encoding="utf-8"))
+    output = job_dir / manifest["outputs"][0]
+    broken = [
+        {"custom_id": "survey-abc", "response": {"status_code": 200, "body": {}}},
+        {"response": {"status_code": 200, "body": {}}},
+    ]
+    with open(output, "a", encoding="utf-8") as f:
+        for line in broken:
+            f.write("\n" + json.dumps(line))
+
+    result = batch_jobs.ingest_batch_results(df, job_dir)
+    # 行IDの分からない結果は行0のエラーにせず読み飛ばす
+    assert result.loc[0, "analysis_key_topics"] == ["食堂"]
+    assert capsys.readouterr().out.count("スキップ") == 2
+
+
+def _finished_job(tmp_path, df):
+    job_dir = tmp_path / "job"
+    batch_jobs.export_batch_job(df, "text", job_dir, fused=False)
+    backend = LocalBatchBackend(tmp_path / "drop")
+    batch_jobs.submit_batch_job(job_dir, backend)
+    fake_batch_worker(backend)
+    assert batch_jobs.collect_batch_results(job_dir, backend)
+    return job_dir
+
+
+def test_rows_changed_since_export_receive_error_results(tmp_path):
+    df = pd.DataFrame({"text": ["食堂が美味しい", "駐車場が狭い", "食堂が美味しい"]})
+    job_dir = _finished_job(tmp_path, df)
+
+    # 並べ替え・編集された入力に別の行の結果を付けない
+    edited = pd.DataFrame({"text": ["駐車場が狭い", "食堂が美味しい", "食堂が美味しい！"]})
+    result = batch_jobs.ingest_batch_results(edited, job_dir)
+    assert result["analysis_key_topics"].tolist() == [["分析エラー"], ["分析エラー"], ["分析エラー"]]
+
+    result = batch_jobs.ingest_batch_results(df, job_dir)
+    assert result["analysis_key_topics"].tolist() == [["食堂"], ["食堂"], ["食堂"]]
+
+
+def test_prompt_change_since_export_raises(tmp_path, monkeypatch):
+    df = pd.DataFrame({"text": ["食堂が美味しい"]})
+    job_dir = _finished_job(tmp_path, df)
+    monkeypatch.setattr(batch_jobs, "prompt_version", lambda: "changed")
+    with pytest.raises(ValueError, match="プロンプト"):
+        batch_jobs.ingest_batch_results(df, job_dir)
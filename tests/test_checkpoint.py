@@ -0,0 +1,107 @@
+import os
+import sys
+import asyncio
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import analysis
+from test_analyze_dataframe import fake_analyze_single_text
+
+
+def collect(agen):
+    async def run():
+        return [chunk async for chunk in agen]
+
+    return asyncio.run(run())
+
+
+def test_streaming_resumes_from_checkpoint(monkeypatch, tmp_path):
+    calls = []
+    crash = {"enabled": True}
+
+    async def counting_analyze(text, mode="B", **kwargs):
+        calls.append(text)
+        if text == "c" and crash["enabled"]:
+            raise RuntimeError("ウィンドウが閉じられた")
+        return await fake_analyze_single_text(text, mode)
+
+    monkeypatch.setattr(analysis, "analyze_single_text", counting_analyze)
+    df = pd.DataFrame({"text": ["a", "b", "c", "d", "e"]})
+    checkpoint = tmp_path / "job.jsonl"
+
+    try:
+        collect(analysis.analyze_dataframe_streaming(df, "text", str(checkpoint), chunk_size=2))
+    except RuntimeError:
+        pass
+    assert "e" not in calls
+
+    crash["enabled"] = False
+    calls.clear()
+    chunks = collect(analysis.analyze_dataframe_streaming(df, "text", str(checkpoint), chunk_size=2))
+    assert [list(chunk.index) for chunk in chunks] == [[2, 3], [4]]
+    assert sorted(calls) == ["c", "d", "e"]
+
+    result = analysis.load_checkpoint(df, "text", str(checkpoint))
+    assert len(result) == 5
+    assert all(result["analysis_sentiment"] == "positive")
+
+
+def test_resume_reanalyzes_edited_rows(monkeypatch, tmp_path):
+    calls = []
+
+    async def counting_analyze(text, mode="B", **kwargs):
+        calls.append(text)
+        return await fake_analyze_single_text(text, mode)
+
+    monkeypatch.setattr(analysis, "analyze_single_text", counting_analyze)
+    checkpoint = tmp_path / "job.jsonl"
+    df = pd.DataFrame({"text": ["a", "b", "c"]})
+    collect(analysis.analyze_dataframe_streaming(df, "text", str(checkpoint)))
+
+    # 行数も列名も同じまま1セルだけ書き換えてから再開する
+    edited = pd.DataFrame({"text": ["a", "B", "c"]})
+    calls.clear()
+    chunks = collect(analysis.analyze_dataframe_streaming(edited, "text", str(checkpoint)))
+    assert calls == ["B"]
+    assert [list(chunk.index) for chunk in chunks] == [[1]]
+
+    result = analysis.load_checkpoint(edited, "text", str(checkpoint))
+    assert list(result["text"]) == ["a", "B", "c"]
+    assert not any(result["analysis_key_topics"].map(lambda t: analysis.ERROR_TOPIC in t))
+
+    # 結果の保存後にさらに書き換えられた行は結果なしとして扱う
+    changed = pd.DataFrame({"text": ["a", "B", "C"]})
+    result = analysis.load_checkpoint(changed, "text", str(checkpoint))
+    assert analysis.ERROR_TOPIC in result["analysis_key_topics"][2]
+
+
+def test_failed_rows_are_retried_on_resume(monkeypatch, tmp_path):
+    calls = []
+    fail = {"b"}
+
+    async def flaky_analyze(text, mode="B", **kwargs):
+        calls.append(text)
+        if text in fail:
+            return analysis.error_result("429 Too Many Requests")
+        return await fake_analyze_single_text(text, mode)
+
+    monkeypatch.setattr(analysis, "analyze_single_text", flaky_analyze)
+    checkpoint = tmp_path / "job.jsonl"
+    df = pd.DataFrame({"text": ["a", "b", "c"]})
+    collect(analysis.analyze_dataframe_streaming(df, "text", str(checkpoint)))
+    assert analysis.ERROR_TOPIC in analysis.load_checkpoint(
+        df, "text", str(checkpoint)
+    )["analysis_key_topics"][1]
+
+    fail.clear()
+    calls.clear()
+    chunks = collect(analysis.analyze_dataframe_streaming(df, "text", str(checkpoint)))
+    assert calls == ["b"]
+    assert [list(chunk.index) for chunk in chunks] == [[1]]
+    result = analysis.load_checkpoint(df, "text", str(checkpoint))
+    assert all(result["analysis_sentiment"] == "positive")
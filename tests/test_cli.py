@@ -0,0 +1,82 @@
+import os
+import sys
+import asyncio
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import analysis
+import cli
+
+
+def test_run_jobs_shares_one_limiter_across_files(tmp_path, monkeypatch):
+    for name in ["営業部", "開発部"]:
+        pd.DataFrame({"改善点": ["価格", "特になし"], "良い点": ["対応", None]}).to_excel(
+            tmp_path / f"{name}.xlsx", index=False
+        )
+    limiters = []
+
+    async def fake_analyze(text, mode="B", **kwargs):
+        limiters.append(analysis._active_limiter.get())
+        return analysis.empty_result()
+
+    monkeypatch.setattr(analysis, "analyze_single_text", fake_analyze)
+    jobs = cli.build_jobs(
+        [str(tmp_path / "営業部.xlsx"), str(tmp_path / "開発部.xlsx")],
+        [],
+        ["改善点", "良い点"],
+    )
+    results = asyncio.run(cli.run_jobs(jobs, tmp_path / "out", pdf=False))
+
+    assert len(jobs) == 2
+    assert [r["rows"] for r in results] == [4, 4]
+    assert len({id(limiter) for limiter in limiters}) == 1
+    saved = pd.read_excel(tmp_path / "out" / "営業部.xlsx")
+    assert "改善点_analysis_sentiment" in saved.columns
+    assert "良い点_analysis_key_topics_1" in saved.columns
+
+    missing = cli.build_jobs([str(tmp_path / "営業部.xlsx")], [], ["存在しない列"])
+    results = asyncio.run(cli.run_jobs(missing, tmp_path / "out", pdf=False))
+    assert isinstance(results[0], ValueError)
+
+
+def test_build_jobs_gives_colliding_outputs_unique_names(tmp_path):
+    jobs = cli.build_jobs(
+        [str(tmp_path / "a" / "survey.xlsx"), str(tmp_path / "b" / "survey.csv"), "Survey.csv"],
+        [],
+        ["改善点"],
+    )
+    assert [job.name for job in jobs] == ["survey", "survey_2", "Survey_3"]
+
+
+def test_run_job_renders_all_column_reports_together(tmp_path, monkeypatch):
+    import reporting
+
+    pd.DataFrame({"改善点": ["価格"], "良い点": ["対応"]}).to_excel(
+        tmp_path / "営業部.xlsx", index=False
+    )
+
+    async def fake_analyze(text, mode="B", **kwargs):
+        return analysis.empty_result()
+
+    async def fake_summarize_columns(df, columns):
+        return {column: ({"analysis_target": column}, {}) for column in columns}
+
+    rendered = []
+    monkeypatch.setattr(analysis, "analyze_single_text", fake_analyze)
+    monkeypatch.setattr(cli, "summarize_columns", fake_summarize_columns)
+    monkeypatch.setattr(reporting, "generate_pdf_reports", rendered.append)
+
+    jobs = cli.build_jobs([str(tmp_path / "営業部.xlsx")], [], ["改善点", "良い点"])
+    asyncio.run(cli.run_jobs(jobs, tmp_path / "out", pdf=True))
+
+    assert len(rendered) == 1
+    assert [path for _, path in rendered[0]] == [
+        str(tmp_path / "out" / "営業部_改善点.pdf"),
+        str(tmp_path / "out" / "営業部_良い点.pdf"),
+    ]
@@ -0,0 +1,61 @@
+import os
+import sys
+import asyncio
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+from concurrency import AdaptiveConcurrencyLimiter, run_worker_pool
+
+
+def test_limiter_increases_and_backs_off():
+    limiter = AdaptiveConcurrencyLimiter(initial=2, max_limit=10)
+    for _ in range(20):
+        limiter.record_success(0.1)
+    grown = limiter.limit
+    assert grown > 2
+    limiter.record_failure(rate_limited=True)
+    assert limiter.limit == grown * 0.5
+    assert [limit for _, limit in limiter.trajectory][0] == 2
+    assert limiter.trajectory[-1][1] == int(limiter.limit)
+
+
+def test_limiter_caps_in_flight_tasks():
+    limiter = AdaptiveConcurrencyLimiter(initial=3, min_limit=3, max_limit=3)
+    peak = 0
+
+    async def worker():
+        nonlocal peak
+        async with limiter:
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(worker() for _ in range(10)))
+
+    asyncio.run(run())
+    assert peak == 3
+    assert limiter.in_flight == 0
+
+
+def test_worker_pool_consumes_items_lazily():
+    produced = []
+    handled = []
+    max_ahead = 0
+
+    def items():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    async def handle(item):
+        nonlocal max_ahead
+        max_ahead = max(max_ahead, len(produced) - len(handled))
+        await asyncio.sleep(0)
+        handled.append(item)
+
+    asyncio.run(run_worker_pool(items(), handle, worker_count=4))
+    assert sorted(handled) == list(range(100))
+    # キュー(8件) + 処理中のワーカー(4件) + 投入待ちの1件を超えて先読みしない
+    assert max_ahead <= 13
@@ -0,0 +1,99 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import main
+from exporting import expand_key_topic_columns, safe_file_name, save_analysis
+
+
+def analyzed_frame():
+    return pd.DataFrame(
+        {
+            "改善点": ["価格", None, "対応"],
+            "analysis_sentiment": ["negative", "neutral", "positive"],
+            "analysis_key_topics": [["価格", "送料"], [], None],
+            "moderation_score": [0.1, float("nan"), 0.3],
+        }
+    )
+
+
+def test_expand_key_topic_columns_pads_shorter_lists():
+    df = expand_key_topic_columns(analyzed_frame())
+
+    assert list(df.columns[-2:]) == ["analysis_key_topics_1", "analysis_key_topics_2"]
+    assert df["analysis_key_topics_1"].tolist()[0] == "価格"
+    assert df["analysis_key_topics_2"].isna().tolist() == [False, True, True]
+
+
+def test_excel_export_matches_pandas_writer(tmp_path):
+    path = tmp_path / "result.xlsx"
+    save_analysis(analyzed_frame(), path)
+
+    expected_path = tmp_path / "expected.xlsx"
+    expand_key_topic_columns(analyzed_frame()).to_excel(expected_path, index=False)
+    pd.testing.assert_frame_equal(pd.read_excel(path), pd.read_excel(expected_path))
+
+
+def test_excel_export_rejects_frames_larger_than_a_sheet(tmp_path, monkeypatch):
+    import exporting
+
+    path = tmp_path / "result.xlsx"
+    wide = pd.DataFrame(columns=range(exporting.EXCEL_MAX_COLUMNS + 1))
+    with pytest.raises(ValueError, match="too large"):
+        exporting.write_excel(wide, path)
+
+    # 見出し行を含めて上限を超える行数も書き込まずにエラーにする
+    monkeypatch.setattr(exporting, "EXCEL_MAX_ROWS", 3)
+    with pytest.raises(ValueError, match="too large"):
+        save_analysis(analyzed_frame(), path)
+    assert not path.exists()
+    exporting.write_excel(analyzed_frame().head(2), path)
+    assert len(pd.read_excel(path)) == 2
+
+
+def test_parquet_export_keeps_topic_lists(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "result.parquet"
+    df = analyzed_frame()
+    df["ID"] = [1, "A-2", 3]
+    save_analysis(df, path)
+
+    loaded = pd.read_parquet(path)
+    assert [list(x) for x in loaded["analysis_key_topics"]] == [["価格", "送料"], [], []]
+    assert loaded["ID"].tolist() == ["1", "A-2", "3"]
+
+
+def test_parquet_without_pyarrow_reports_how_to_install(tmp_path, monkeypatch):
+    import builtins
+
+    real_import = builtins.__import__
+
+    def import_without_pyarrow(name, *args, **kwargs):
+        if name.split(".")[0] == "pyarrow":
+            raise ImportError("No module named 'pyarrow'")
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", import_without_pyarrow)
+    with pytest.raises(RuntimeError, match="pip install pyarrow"):
+        save_analysis(analyzed_frame(), tmp_path / "result.parquet")
+
+
+def test_output_paths_of_several_columns_stay_in_the_chosen_folder(tmp_path):
+    assert safe_file_name('評価/改善点: "自由記述"') == "評価_改善点_自由記述_"
+    gui = SimpleNamespace(summaries={"良い点": None, "../改善点\\その他": None})
+    base = str(tmp_path / "report")
+    paths = main.App._output_paths(gui, base, ".pdf")
+    assert paths == {
+        "良い点": f"{base}_良い点.pdf",
+        "../改善点\\その他": f"{base}_.._改善点_その他.pdf",
+    }
+    assert all(os.path.dirname(p) == str(tmp_path) for p in paths.values())
@@ -0,0 +1,28 @@
+import os
+import sys
+import asyncio
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import analysis
+from analysis import FusedAnalysis
+
+
+def test_fused_mode_uses_single_completion(fake_client):
+    completions, _ = fake_client()
+    result = asyncio.run(analysis.analyze_single_text("価格が高い", fused=True))
+    assert len(completions.calls) == 1
+    assert completions.calls[0]["response_model"] is FusedAnalysis
+    assert result.survey_analysis.sentiment == "negative"
+    assert result.emotion_scores.anger == 2.0
+
+
+def test_default_mode_uses_two_completions(fake_client):
+    completions, _ = fake_client()
+    result = asyncio.run(analysis.analyze_single_text("価格が高い", fused=False))
+    assert len(completions.calls) == 2
+    assert result.survey_analysis.key_topics == ["価格"]
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import analysis
+from exporting import save_analysis
+from loading import load_previous_analysis
+
+
+def fake_analyzer(calls):
+    async def fake_analyze(text, mode="B", **kwargs):
+        if not isinstance(text, str):
+            return analysis.empty_result()
+        calls.append(text)
+        survey = analysis.EMPTY_RESULT.survey_analysis.model_copy(
+            update={
+                "sentiment": "negative",
+                "key_topics": [text[:2], "共通"],
+                "verbatim_quote": "" if "空" in text else text,
+            }
+        )
+        return analysis.EMPTY_RESULT.model_copy(update={"survey_analysis": survey})
+
+    return fake_analyze
+
+
+@pytest.mark.parametrize("suffix", [".xlsx", ".parquet"])
+def test_only_new_or_changed_rows_are_analyzed(tmp_path, monkeypatch, suffix):
+    if suffix == ".parquet":
+        pytest.importorskip("pyarrow")
+    calls = []
+    monkeypatch.setattr(analysis, "analyze_single_text", fake_analyzer(calls))
+    first = pd.DataFrame({"ID": [1, 2, 3], "改善点": ["価格が高い", "空欄の理由", None]})
+    previous_path = tmp_path / f"previous{suffix}"
+    save_analysis(
+        asyncio.run(analysis.analyze_dataframe(first, "改善点", cache=None)), previous_path
+    )
+    calls.clear()
+
+    second = pd.DataFrame({"改善点": ["空欄の理由", "価格が高い ", "配送が遅い", None]})
+    previous = load_previous_analysis(previous_path, ["改善点"])
+    run_report = {}
+    result = asyncio.run(
+        analysis.analyze_dataframe(
+            second, "改善点", cache=None, previous=previous, run_report=run_report
+        )
+    )
+
+    assert calls == ["配送が遅い"]
+    assert run_report["reused"] == 2
+    assert result["analysis_key_topics"].tolist()[:3] == [
+        ["空欄", "共通"],
+        ["価格", "共通"],
+        ["配送", "共通"],
+    ]
+    assert result["analysis_verbatim_quote"].tolist()[:2] == ["", "価格が高い"]
+
+
+def test_error_rows_are_analyzed_again(monkeypatch):
+    calls = []
+    monkeypatch.setattr(analysis, "analyze_single_text", fake_analyzer(calls))
+    previous = analysis.build_result_frame(
+        pd.DataFrame({"改善点": ["価格が高い"]}), [analysis.error_result("timeout")]
+    )
+
+    assert analysis.previous_results(previous, "改善点") == {}
@@ -0,0 +1,119 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from loading import is_result_column, list_columns, load_columns, restore_input_columns
+
+
+def sample_frame():
+    return pd.DataFrame(
+        {
+            "ID": [1, 2, 3],
+            "良い点": ["対応が丁寧", None, "速い"],
+            "改善点": ["価格", "特になし", None],
+        }
+    )
+
+
+def test_xlsx_streams_only_selected_columns(tmp_path):
+    path = tmp_path / "survey.xlsx"
+    sample_frame().to_excel(path, index=False)
+
+    assert list_columns(path) == ["ID", "良い点", "改善点"]
+    df = load_columns(path, ["改善点", "良い点"])
+    expected = pd.read_excel(path)[["改善点", "良い点"]]
+    assert list(df.columns) == ["改善点", "良い点"]
+    assert df.fillna("").values.tolist() == expected.fillna("").values.tolist()
+    with pytest.raises(ValueError):
+        load_columns(path, ["存在しない列"])
+
+
+def test_csv_is_read_with_fallback_encoding(tmp_path):
+    path = tmp_path / "survey.csv"
+    sample_frame().to_csv(path, index=False, encoding="cp932")
+
+    assert list_columns(path) == ["ID", "良い点", "改善点"]
+    df = load_columns(path, ["改善点"])
+    assert df["改善点"].tolist()[:2] == ["価格", "特になし"]
+
+
+def test_parquet_columns(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "survey.parquet"
+    sample_frame().to_parquet(path)
+
+    assert list_columns(path) == ["ID", "良い点", "改善点"]
+    assert list(load_columns(path, ["良い点"]).columns) == ["良い点"]
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        list_columns(tmp_path / "survey.txt")
+
+
+def test_restore_input_columns_keeps_unanalyzed_columns(tmp_path):
+    path = tmp_path / "survey.xlsx"
+    frame = sample_frame()
+    frame["部署"] = ["営業", "開発", "総務"]
+    frame["emotion_score"] = [3, 4, 5]
+    frame["analysis_sentiment"] = ["positive", "positive", "positive"]
+    frame.to_excel(path, index=False)
+
+    # 分析対象の列だけが空の末尾の行も、他の列に値があれば残す
+    df = load_columns(path, ["改善点"])
+    assert len(df) == 3
+    df["analysis_sentiment"] = ["negative", "neutral", "neutral"]
+    restored = restore_input_columns(df, path)
+
+    assert list(restored.columns) == [
+        "ID", "良い点", "改善点", "部署", "emotion_score", "analysis_sentiment"
+    ]
+    assert restored["ID"].tolist() == [1, 2, 3]
+    assert restored["部署"].tolist() == ["営業", "開発", "総務"]
+    assert restored["emotion_score"].tolist() == [3, 4, 5]
+    assert restored["analysis_sentiment"].tolist() == ["negative", "neutral", "neutral"]
+
+
+def test_xlsx_keeps_rows_with_blank_answers_at_the_end(tmp_path):
+    path = tmp_path / "survey.xlsx"
+    pd.DataFrame(
+        {"ID": [1, 2, 3, 4], "改善点": ["価格", "速度", None, None]}
+    ).to_excel(path, index=False)
+
+    df = load_columns(path, ["改善点"])
+    assert len(df) == len(pd.read_excel(path)) == 4
+    assert df["改善点"].tolist()[:2] == ["価格", "速度"]
+
+
+def test_result_columns_are_matched_by_exact_name():
+    assert is_result_column("analysis_sentiment")
+    assert is_result_column("改善点_moderation_flagged")
+    assert is_result_column("改善点_analysis_key_topics_2")
+    assert is_result_column("analysis_duplicate_cluster")
+    assert not is_result_column("emotion_score")
+    assert not is_result_column("my_analysis_notes")
+
+
+def test_previous_parquet_without_pyarrow_reports_how_to_install(tmp_path, monkeypatch):
+    import builtins
+
+    from loading import load_previous_analysis
+
+    real_import = builtins.__import__
+
+    def import_without_pyarrow(name, *args, **kwargs):
+        if name.split(".")[0] == "pyarrow":
+            raise ImportError("No module named 'pyarrow'")
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", import_without_pyarrow)
+    with pytest.raises(RuntimeError, match="pip install pyarrow"):
+        load_previous_analysis(tmp_path / "previous.parquet", ["改善点"])
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import analysis
+from metrics import MetricsRegistry, get_metrics
+
+
+def test_snapshot_reports_quantiles_costs_and_failures(tmp_path):
+    registry = MetricsRegistry(prompt_price=1.0, completion_price=2.0)
+    for i in range(1, 101):
+        registry.record_call("survey", i / 100, prompt_tokens=10, completion_tokens=5)
+    registry.record_call("moderation", 0.3, failure="rate_limited")
+    registry.record_cache(hits=3, misses=1)
+    registry.record_wait("concurrency_slot", 0.5)
+
+    snapshot = registry.snapshot()
+
+    survey = snapshot["calls"]["survey"]
+    assert survey["latency"]["p50"] == pytest.approx(0.505)
+    assert survey["latency"]["p99"] == pytest.approx(0.9901)
+    assert survey["cost_usd"] == pytest.approx((1000 * 1.0 + 500 * 2.0) / 1_000_000)
+    assert snapshot["totals"]["requests"] == 101
+    assert snapshot["totals"]["failures"] == 1
+    assert snapshot["result_cache"]["hit_ratio"] == 0.75
+
+    registry.to_json(tmp_path / "metrics.json")
+    assert json.loads((tmp_path / "metrics.json").read_text(encoding="utf-8"))["calls"]
+
+    text = registry.to_prometheus()
+    prefix = "survey_analysis_api"
+    assert f'{prefix}_request_duration_seconds_bucket{{call_type="survey",le="0.5"}} 50' in text
+    assert f'{prefix}_request_duration_seconds_count{{call_type="survey"}} 100' in text
+    assert f'{prefix}_failures_total{{call_type="moderation",reason="rate_limited"}} 1' in text
+
+
+def test_call_api_records_usage_retries_and_failures(monkeypatch):
+    registry = get_metrics()
+    registry.reset()
+
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr(analysis.asyncio, "sleep", no_sleep)
+    monkeypatch.setattr(analysis.settings, "API_MAX_RETRIES", 2)
+
+    async def succeed_after_retry():
+        # instructor のフックが試行ごとに呼ばれる
+        analysis._count_attempt()
+        analysis._count_attempt()
+        usage = SimpleNamespace(prompt_tokens=40, completion_tokens=8, total_tokens=48)
+        return SimpleNamespace(_raw_response=SimpleNamespace(usage=usage))
+
+    async def fail():
+        error = RuntimeError("server error")
+        error.status_code = 500
+        raise error
+
+    asyncio.run(analysis._call_api(succeed_after_retry, "chat", 50, "survey"))
+    with pytest.raises(RuntimeError):
+        asyncio.run(analysis._call_api(fail, "moderation"))
+
+    calls = registry.snapshot()["calls"]
+    assert calls["survey"]["retries"] == 1
+    assert calls["survey"]["prompt_tokens"] == 40
+    assert calls["survey"]["completion_tokens"] == 8
+    # サーバーエラーは API_MAX_RETRIES 回まで再送され、試行ごとに記録される
+    assert calls["moderation"]["requests"] == 3
+    assert calls["moderation"]["retries"] == 2
+    assert calls["moderation"]["failures"] == {"http_500": 3}
+
+
+def test_each_cli_run_starts_with_empty_metrics(tmp_path, monkeypatch):
+    import pandas as pd
+
+    import cli
+
+    pd.DataFrame({"改善点": ["価格", "対応"]}).to_excel(tmp_path / "a.xlsx", index=False)
+
+    async def fake_analyze(text, mode="B", **kwargs):
+        get_metrics().record_call("survey", 0.1)
+        return analysis.empty_result()
+
+    monkeypatch.setattr(analysis, "analyze_single_text", fake_analyze)
+    jobs = cli.build_jobs([str(tmp_path / "a.xlsx")], [], ["改善点"])
+    for _ in range(2):
+        asyncio.run(cli.run_jobs(jobs, tmp_path / "out", pdf=False))
+        assert get_metrics().snapshot()["calls"]["survey"]["requests"] == 2
@@ -0,0 +1,76 @@
+import asyncio
+import os
+import sys
+import zlib
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import analysis
+import near_duplicates
+from near_duplicates import cluster_near_duplicates, lsh_bands
+
+
+def test_clusters_join_the_first_similar_response():
+    texts = [
+        "特にありません",
+        "価格が高い",
+        "特にありません。",
+        "特に　ありません！",
+        "価格が安い",
+        None,
+        "",
+        "サポートの対応が遅くて困りました。早急に改善してほしいです。",
+        "サポートの対応がかなり遅くて困りました。早急に改善してほしいです。",
+    ]
+
+    assert cluster_near_duplicates(texts, processes=1) == [0, 1, 0, 0, 4, 5, 6, 7, 7]
+
+
+def test_higher_thresholds_use_more_rows_per_band():
+    bands, rows = lsh_bands(0.9)
+    assert bands * rows <= 128
+    assert rows > lsh_bands(0.5)[1]
+
+
+def test_near_duplicates_are_analyzed_once(monkeypatch):
+    calls = []
+
+    async def fake_analyze(text, mode="B", **kwargs):
+        calls.append(text)
+        return analysis.EMPTY_RESULT
+
+    monkeypatch.setattr(analysis, "analyze_single_text", fake_analyze)
+    df = pd.DataFrame({"感想": ["特にありません", "配送が遅い", "特にありません。"]})
+    run_report = {}
+    result = asyncio.run(
+        analysis.analyze_dataframe(
+            df, "感想", cache=None, near_dedup=True, run_report=run_report
+        )
+    )
+
+    assert len(calls) == 2
+    assert run_report["near_duplicates"] == 1
+    assert result["analysis_duplicate_cluster"].tolist() == [0, 1, 0]
+
+    plain = asyncio.run(analysis.analyze_dataframe(df, "感想", cache=None, near_dedup=False))
+    assert "analysis_duplicate_cluster" not in plain.columns
+
+
+def test_minhash_signatures_match_exact_integer_arithmetic():
+    sets = [{"食堂が", "堂が美", "が美味"}, {"駐車場"}]
+    signatures = near_duplicates.minhash_signatures(sets, num_perm=16)
+    a, b = near_duplicates._permutations(16, 1)
+    prime = (1 << 61) - 1
+    for row, shingle_set in enumerate(sets):
+        # uint64 の途中で溢れていれば Python の整数演算と一致しない
+        expected = [
+            min((zlib.crc32(s.encode("utf-8")) * int(x) + int(y)) % prime for s in shingle_set)
+            for x, y in zip(a, b)
+        ]
+        assert signatures[row].tolist() == expected
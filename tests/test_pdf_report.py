@@ -1,6 +1,13 @@
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import matplotlib
 import pandas as pd
+import pytest
+from matplotlib import font_manager
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
@@ -9,6 +16,7 @@ sys.path.insert(0, MODULE_DIR)
 os.environ.setdefault("OPENAI_API_KEY", "test-key")
 
 import reporting
+from parallel import process_pool
 
 
 def test_generate_pdf_report(tmp_path):
@@ -22,3 +30,99 @@ def test_generate_pdf_report(tmp_path):
     output_pdf = tmp_path / "report.pdf"
     reporting.generate_pdf_report(summary, str(output_pdf))
     assert output_pdf.exists()
+
+
+def test_charts_render_to_png_bytes_in_worker_processes(monkeypatch):
+    fonts = [f for f in font_manager.findSystemFonts() if f.endswith(".ttf")]
+    if not fonts and not reporting.FONT_REGULAR_PATH.exists():
+        pytest.skip("TTFフォントがありません")
+    if not reporting.FONT_REGULAR_PATH.exists():
+        monkeypatch.setattr(reporting, "FONT_REGULAR_PATH", Path(fonts[0]))
+    summary = {
+        "sentiment_counts": pd.Series([1, 2], index=["positive", "negative"]),
+        "topic_counts": pd.Series([2], index=["Topic"]),
+    }
+    serial = reporting.submit_charts(summary)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        charts = {name: f.result() for name, f in reporting.submit_charts(summary, executor).items()}
+    assert set(charts) == {"sentiment", "topics"}
+    for name, png in charts.items():
+        assert png.startswith(b"\x89PNG")
+        assert serial[name].result().startswith(b"\x89PNG")
+
+
+def test_each_document_gets_its_own_copy_of_the_parsed_fonts(monkeypatch):
+    ttf_dir = Path(matplotlib.get_data_path()) / "fonts" / "ttf"
+    monkeypatch.setattr(reporting, "FONT_REGULAR_PATH", ttf_dir / "DejaVuSans.ttf")
+    monkeypatch.setattr(reporting, "FONT_BOLD_PATH", ttf_dir / "DejaVuSans-Bold.ttf")
+    reporting._parsed_fonts.cache_clear()
+
+    def build(text, cached):
+        pdf = reporting.ReportPDF()
+        pdf.set_creation_date(datetime(2024, 1, 1, tzinfo=timezone.utc))
+        if cached:
+            pdf.setup_fonts()
+        else:
+            pdf.add_font("NotoSansJP", "", str(reporting.FONT_REGULAR_PATH))
+            pdf.add_font("NotoSansJP", "B", str(reporting.FONT_BOLD_PATH))
+        assert {"notosansjp", "notosansjpB"} <= set(pdf.fonts)
+        pdf.add_page()
+        pdf.set_font("NotoSansJP", "B", 12)
+        pdf.cell(0, 10, text)
+        return pdf, bytes(pdf.output())
+
+    first, alpha = build("Alpha", cached=True)
+    second, beta = build("Beta gamma", cached=True)
+
+    # フォントの解析はプロセス内で1回だけ行い、文書ごとに別のサブセットを埋め込む
+    assert reporting._parsed_fonts.cache_info().misses == 1
+    assert first.fonts["notosansjpB"] is not second.fonts["notosansjpB"]
+    assert alpha == build("Alpha", cached=False)[1]
+    assert beta == build("Beta gamma", cached=False)[1]
+
+
+def test_untested_fpdf_versions_register_fonts_per_document(monkeypatch):
+    ttf_dir = Path(matplotlib.get_data_path()) / "fonts" / "ttf"
+    monkeypatch.setattr(reporting, "FONT_REGULAR_PATH", ttf_dir / "DejaVuSans.ttf")
+    monkeypatch.setattr(reporting, "FONT_BOLD_PATH", ttf_dir / "DejaVuSans-Bold.ttf")
+    monkeypatch.setattr(reporting, "FONT_CACHE_FPDF_VERSIONS", ((0,), (1,)))
+    reporting._parsed_fonts.cache_clear()
+
+    pdf = reporting.ReportPDF()
+    pdf.setup_fonts()
+    assert reporting._parsed_fonts(
+        str(reporting.FONT_REGULAR_PATH), str(reporting.FONT_BOLD_PATH)
+    ) is None
+    assert {"notosansjp", "notosansjpB"} <= set(pdf.fonts)
+    reporting._parsed_fonts.cache_clear()
+
+
+def test_single_report_is_generated_without_a_process_pool(monkeypatch):
+    generated = []
+    monkeypatch.setattr(
+        reporting, "generate_pdf_report", lambda data, path: generated.append(path)
+    )
+    monkeypatch.setattr(reporting, "process_pool", None)
+    reporting.generate_pdf_reports([({}, "only.pdf")])
+    assert generated == ["only.pdf"]
+
+
+def test_multiple_reports_share_a_pool_that_does_not_fork(monkeypatch):
+    generated = {}
+    pools = []
+
+    def fake_report(data, path, charts):
+        generated[path] = {name: future.result() for name, future in charts.items()}
+
+    def recording_pool(max_workers):
+        pools.append(process_pool(max_workers))
+        return pools[-1]
+
+    monkeypatch.setattr(reporting, "generate_pdf_report", fake_report)
+    monkeypatch.setattr(reporting, "process_pool", recording_pool)
+    summary = {"sentiment_counts": pd.Series(dtype=int), "topic_counts": pd.Series(dtype=int)}
+    reporting.generate_pdf_reports([(summary, "a.pdf"), (summary, "b.pdf")], processes=2)
+
+    assert generated == {path: {"sentiment": b"", "topics": b""} for path in ("a.pdf", "b.pdf")}
+    # 他スレッドが保持中のロックを引き継がないよう fork 以外で起動する
+    assert pools[0]._mp_context.get_start_method() != "fork"
@@ -0,0 +1,111 @@
+import os
+import sys
+import asyncio
+import threading
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import analysis
+from config import settings
+from parallel import map_chunks, map_reduce_chunks
+import prompt_tokens
+from prompt_tokens import pretokenize_texts, tokenize_for_prompt
+
+
+CHUNK_LOCK = threading.Lock()
+
+
+def double_chunk(items):
+    return [item * 2 for item in items]
+
+
+def double_chunk_locked(items):
+    with CHUNK_LOCK:
+        return double_chunk(items)
+
+
+def run_in_thread(func, *args, **kwargs):
+    # デッドロックしてもテストが終わるよう、デーモンスレッドで実行して待つ
+    result = {}
+    thread = threading.Thread(
+        target=lambda: result.setdefault("value", func(*args, **kwargs)), daemon=True
+    )
+    thread.start()
+    thread.join(timeout=60)
+    assert not thread.is_alive(), "worker processes inherited a held lock"
+    return result["value"]
+
+
+def test_map_chunks_preserves_order_across_processes():
+    items = list(range(50))
+    result = map_chunks(double_chunk, items, processes=2, chunk_size=7, min_parallel_items=10)
+    assert result == [i * 2 for i in items]
+
+
+def test_map_reduce_chunks_combines_one_summary_per_chunk():
+    items = list(range(50))
+    result = map_reduce_chunks(
+        sum, lambda a, b: a + b, items, processes=2, chunk_size=7, min_parallel_items=10
+    )
+    assert result == sum(items)
+    assert map_reduce_chunks(sum, lambda a, b: a + b, [], processes=2) == 0
+
+
+def test_map_chunks_from_thread_while_lock_is_held():
+    items = list(range(50))
+    with CHUNK_LOCK:
+        result = run_in_thread(
+            map_chunks,
+            double_chunk_locked,
+            items,
+            processes=2,
+            chunk_size=7,
+            min_parallel_items=10,
+        )
+    assert result == [i * 2 for i in items]
+
+
+def test_pretokenize_texts_matches_single_text_tokenization():
+    texts = ["価格が高いです", None, "  ", "サポートが丁寧でした"]
+    result = pretokenize_texts(texts, processes=2, chunk_size=1)
+    assert result[0] == tokenize_for_prompt(texts[0])
+    assert result[1:3] == [None, "  "]
+    assert result[3] == tokenize_for_prompt(texts[3])
+
+
+def test_pretokenize_texts_in_parallel_while_prompt_lock_is_held():
+    texts = ["価格が高いです", "サポートが丁寧でした"] * 10
+    expected = [tokenize_for_prompt(text) for text in texts]
+    # イベントループ側のスレッドが tokenize_for_prompt でロックを保持している状況
+    with prompt_tokens._TOKENIZER_LOCK:
+        result = run_in_thread(
+            pretokenize_texts, texts, processes=2, chunk_size=5, min_parallel_items=10
+        )
+    assert result == expected
+
+
+def test_analyze_texts_pretokenizes_before_dispatch(monkeypatch):
+    seen = {}
+
+    async def fake_analyze(text, mode="B", fused=None, tokenized_text=None):
+        seen[text] = tokenized_text
+        return analysis.empty_result()
+
+    monkeypatch.setattr(analysis, "analyze_single_text", fake_analyze)
+    asyncio.run(analysis.analyze_texts(["価格が高いです", "満足"], fused=False))
+    assert seen["価格が高いです"] == tokenize_for_prompt("価格が高いです")
+
+    seen.clear()
+    monkeypatch.setattr(settings, "PRETOKENIZE_PROMPTS", False)
+    asyncio.run(analysis.analyze_texts(["価格が高いです"], fused=False))
+    assert seen == {"価格が高いです": None}
+
+
+def test_measure_prompt_inflation_counts_added_spaces():
+    report = analysis.measure_prompt_inflation(["価格が高いです", "サポートが丁寧でした"])
+    assert report["tokenized_tokens"] >= report["raw_tokens"] > 0
+    assert report["inflation"] >= 1.0
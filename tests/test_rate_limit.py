@@ -0,0 +1,163 @@
+import os
+import sys
+import asyncio
+
+import httpx
+import openai
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import analysis
+import rate_limit
+from concurrency import AdaptiveConcurrencyLimiter
+from rate_limit import TokenBucketRateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_waits_for_token_budget(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", clock.sleep)
+    limiter = TokenBucketRateLimiter(rpm=1000, tpm=600, clock=clock)
+
+    async def run():
+        waits = [await limiter.acquire(300) for _ in range(3)]
+        return waits
+
+    waits = asyncio.run(run())
+    # 600トークンの枠を使い切った後、300トークン分(30秒)待つ
+    assert waits[:2] == [0.0, 0.0]
+    assert abs(waits[2] - 30.0) < 1e-6
+    assert abs(limiter.waited_seconds - 30.0) < 1e-6
+
+
+def test_token_bucket_limits_requests_per_minute(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", clock.sleep)
+    limiter = TokenBucketRateLimiter(rpm=2, clock=clock)
+
+    async def run():
+        for _ in range(3):
+            await limiter.acquire()
+
+    asyncio.run(run())
+    assert abs(clock.now - 30.0) < 1e-6
+
+
+def test_disabled_limiter_never_waits():
+    limiter = TokenBucketRateLimiter()
+    assert not limiter.enabled
+    assert asyncio.run(limiter.acquire(10_000)) == 0.0
+
+
+def test_client_leaves_retries_to_the_limiters(monkeypatch):
+    monkeypatch.setattr(analysis, "aclient", None)
+    client = analysis.get_client()
+    assert client.client.max_retries == 0
+
+
+def test_rate_limited_requests_are_resent_through_the_limiter(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(analysis.asyncio, "sleep", fake_sleep)
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    calls = []
+
+    async def make_request():
+        calls.append(True)
+        if len(calls) == 1:
+            response = httpx.Response(429, headers={"retry-after": "3"}, request=request)
+            raise openai.RateLimitError("rate limited", response=response, body=None)
+        return "ok"
+
+    limiter = AdaptiveConcurrencyLimiter(initial=8, max_limit=8)
+
+    async def run():
+        token = analysis._active_limiter.set(limiter)
+        try:
+            return await analysis._call_api(make_request, "chat", 10)
+        finally:
+            analysis._active_limiter.reset(token)
+
+    assert asyncio.run(run()) == "ok"
+    assert len(calls) == 2
+    assert sleeps == [3.0]
+    # 429 を受けるたびに同時実行数を半分にする
+    assert limiter.trajectory[-1][1] == 4
+
+
+def test_response_headers_lower_the_buckets(monkeypatch):
+    bucket = TokenBucketRateLimiter(rpm=100, tpm=10_000)
+    monkeypatch.setitem(analysis._rate_limiters, "chat", bucket)
+    limiter = AdaptiveConcurrencyLimiter(initial=4)
+    response = httpx.Response(
+        200,
+        headers={
+            "x-ratelimit-remaining-requests": "5",
+            "x-ratelimit-remaining-tokens": "0",
+            "x-ratelimit-reset-tokens": "1m30s",
+        },
+        request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"),
+    )
+
+    async def run():
+        token = analysis._active_limiter.set(limiter)
+        try:
+            await analysis._observe_response(response)
+        finally:
+            analysis._active_limiter.reset(token)
+
+    asyncio.run(run())
+    assert bucket._requests <= 5
+    assert bucket._tokens <= 1
+    assert limiter._paused_until - rate_limit.time.monotonic() > 80
+    assert analysis._parse_reset("20ms") == 0.02
+
+
+def test_token_bucket_is_usable_from_consecutive_event_loops(monkeypatch):
+    # GUI と PDF 生成は実行のたびに asyncio.run で新しいイベントループを作る
+    clock = FakeClock()
+    real_sleep = asyncio.sleep
+
+    async def sleep(seconds):
+        clock.now += seconds
+        await real_sleep(0)
+
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", sleep)
+    limiter = TokenBucketRateLimiter(rpm=60, tpm=600, clock=clock)
+
+    async def run():
+        await asyncio.gather(*(limiter.acquire(300) for _ in range(4)))
+
+    asyncio.run(run())
+    asyncio.run(run())
+    assert limiter.waited_seconds > 0
+
+
+def test_request_estimate_reuses_the_schema_tokens_of_each_model(monkeypatch):
+    messages = [{"role": "user", "content": "価格が高いです"}]
+    analysis.schema_tokens.cache_clear()
+    expected = analysis.estimate_request_tokens(messages, analysis.SurveyResponseAnalysis)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("schema regenerated")
+
+    monkeypatch.setattr(analysis.SurveyResponseAnalysis, "model_json_schema", fail)
+    assert analysis.estimate_request_tokens(messages, analysis.SurveyResponseAnalysis) == expected
+    assert expected > analysis.estimate_request_tokens(messages, None, completion_tokens=300)
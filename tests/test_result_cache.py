@@ -0,0 +1,105 @@
+import os
+import sys
+import asyncio
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, MODULE_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import analysis
+from result_cache import ResultCache, make_cache_key
+from test_analyze_dataframe import fake_analyze_single_text
+
+
+def test_result_cache_roundtrip_and_eviction(tmp_path):
+    cache = ResultCache(tmp_path / "cache.sqlite", max_entries=2)
+    cache.set_many({"a": "1", "b": "2", "c": "3"})
+    assert cache.get("a") == "1"
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    cache.evict()
+    assert len(cache) == 2
+    assert cache.get("a") == "1"  # 最近参照されたエントリは残る
+    cache.close()
+    assert make_cache_key("x", "y") != make_cache_key("xy", "")
+
+
+def test_analyze_dataframe_reuses_cached_results(monkeypatch, tmp_path):
+    calls = []
+
+    async def counting_analyze(text, mode="B", **kwargs):
+        calls.append(text)
+        return await fake_analyze_single_text(text, mode)
+
+    monkeypatch.setattr(analysis, "analyze_single_text", counting_analyze)
+    df = pd.DataFrame({"text": ["良い", "悪い"]})
+
+    with ResultCache(tmp_path / "cache.sqlite") as cache:
+        asyncio.run(analysis.analyze_dataframe(df.copy(), "text", cache=cache))
+        assert len(calls) == 2
+        result = asyncio.run(
+            analysis.analyze_dataframe(
+                pd.DataFrame({"text": ["良い", " 悪い ", "普通"]}), "text", cache=cache
+            )
+        )
+        assert calls == ["良い", "悪い", "普通"]
+        assert cache.hits == 2
+    assert list(result["analysis_sentiment"]) == ["positive"] * 3
+
+
+def test_completed_rows_are_cached_when_the_run_fails(monkeypatch, tmp_path):
+    async def failing_analyze(text, mode="B", **kwargs):
+        if text == "失敗":
+            raise RuntimeError("中断")
+        return await fake_analyze_single_text(text, mode)
+
+    monkeypatch.setattr(analysis, "analyze_single_text", failing_analyze)
+    monkeypatch.setattr(analysis.settings, "RESULT_CACHE_PATH", str(tmp_path / "c.sqlite"))
+    closed = []
+    original_close = ResultCache.close
+    monkeypatch.setattr(
+        ResultCache, "close", lambda self: (closed.append(True), original_close(self))
+    )
+
+    try:
+        asyncio.run(
+            analysis.analyze_texts(
+                ["良い", "失敗"], max_concurrent_tasks=1, batch_size=1, dedup=False
+            )
+        )
+    except RuntimeError:
+        pass
+    assert closed == [True]
+
+    with ResultCache(tmp_path / "c.sqlite") as cache:
+        assert cache.get(analysis.result_cache_key("良い")) is not None
+        assert cache.get(analysis.result_cache_key("失敗")) is None
+
+
+def test_cache_key_depends_on_prompt_shape():
+    assert analysis.result_cache_key("良い", batched=True) != analysis.result_cache_key(
+        "良い", batched=False
+    )
+
+
+def test_batch_run_reuses_rows_analyzed_one_by_one(fake_client, tmp_path):
+    # "悪い" はバッチ結果から抜けて個別に再分析され、"最後" は1件だけのバッチになる
+    texts = ["良い", "悪い", "普通", "最後"]
+    with ResultCache(tmp_path / "cache.sqlite") as cache:
+        completions, _ = fake_client(drop_ids={"1"})
+        asyncio.run(
+            analysis.analyze_texts(texts, batch_size=3, cache=cache, near_dedup=False)
+        )
+        assert len(completions.calls) > 2
+
+        completions, moderations = fake_client()
+        results = asyncio.run(
+            analysis.analyze_texts(texts, batch_size=3, cache=cache, near_dedup=False)
+        )
+        assert completions.calls == []
+        assert moderations.inputs == []
+    assert not any(analysis.is_error_result(r) for r in results)
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from bench_import_time import measure_import
+
+# 起動時に読み込まれてはいけない重いライブラリ
+HEAVY_MODULES = ["openai", "instructor", "spacy", "matplotlib", "wordcloud", "google.cloud"]
+# 遅い環境でも誤検知しないよう余裕を持たせた上限（秒）
+IMPORT_BUDGET_SECONDS = 3.0
+
+
+def loaded_modules(module: str) -> set[str]:
+    code = f"import sys, {module}; print(' '.join(sys.modules))"
+    env = dict(os.environ, OPENAI_API_KEY="test-key")
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=MODULE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(proc.stdout.split())
+
+
+def test_app_modules_defer_heavy_imports():
+    for module in ["analysis", "main"]:
+        loaded = loaded_modules(module)
+        assert not [m for m in HEAVY_MODULES if m in loaded], module
+
+
+def test_analysis_import_time_within_budget():
+    entries = measure_import("analysis")
+    assert entries[-1][0] == "analysis"
+    assert entries[-1][2] / 1e6 < IMPORT_BUDGET_SECONDS
+
+
+def test_cli_does_not_import_tk():
+    loaded = loaded_modules("cli")
+    assert "tkinter" not in loaded
+    assert "customtkinter" not in loaded
@@ -1,11 +1,20 @@
 import os
 import sys
+import threading
+from collections import Counter
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 MODULE_DIR = os.path.join(BASE_DIR, "coding", "survey_analysis_mvp")
 sys.path.insert(0, MODULE_DIR)
 
-from wc_tokenizer import tokenize_texts
+import wc_tokenizer
+from wc_tokenizer import (
+    count_tokens,
+    frequencies_by_slice,
+    map_morphemes,
+    tokenize_rows,
+    tokenize_texts,
+)
 
 
 def test_tokenize_texts_basic():
@@ -18,3 +27,60 @@ def test_tokenize_texts_basic():
     # stopword 'する' should be removed, but '勉強' should remain
     assert "勉強" in tokens
     assert "する" not in tokens
+
+
+def test_tokenize_rows_parallel_matches_serial():
+    texts = ["美味しいカレーを食べた", "昨日映画を見た", "勉強する"] * 20
+    serial = tokenize_rows(texts, processes=1)
+    parallel = tokenize_rows(texts, processes=2, chunk_size=7, min_parallel_items=10)
+    assert parallel == serial
+    assert serial[1] == ["昨日", "映画", "見る"]
+    assert tokenize_texts(texts[:3]) == [t for row in serial[:3] for t in row]
+
+
+def test_frequencies_by_slice_matches_per_slice_tokenization():
+    texts = ["美味しいカレーを食べた", float("nan"), "昨日映画を見た", "勉強する"]
+    labels = ["positive", "negative", "neutral", "negative"]
+    freqs = frequencies_by_slice(texts, labels)
+    assert freqs["all"] == Counter(tokenize_texts([texts[0], texts[2], texts[3]]))
+    assert freqs["positive"] == Counter(tokenize_texts([texts[0], texts[2]]))
+    assert freqs["negative"] == Counter(tokenize_texts([texts[2], texts[3]]))
+    parallel = frequencies_by_slice(
+        texts * 10, labels * 10, processes=2, chunk_size=7, min_parallel_items=10
+    )
+    assert parallel["negative"] == Counter(
+        {word: count * 10 for word, count in freqs["negative"].items()}
+    )
+    assert count_tokens(["カレーを食べたカレー"]) == Counter({"カレー": 2, "食べる": 1})
+
+
+def test_frequencies_by_slice_in_parallel_while_sudachi_lock_is_held():
+    texts = ["美味しいカレーを食べた", "昨日映画を見た"] * 10
+    labels = ["positive", "negative"] * 10
+    result = {}
+
+    def count():
+        result["freqs"] = frequencies_by_slice(
+            texts, labels, processes=2, chunk_size=5, min_parallel_items=10
+        )
+
+    # 別スレッドが直列のトークナイズでロックを保持している間にプロセスプールを起動する
+    with wc_tokenizer._SUDACHI_LOCK:
+        thread = threading.Thread(target=count, daemon=True)
+        thread.start()
+        thread.join(timeout=60)
+    assert not thread.is_alive(), "worker processes inherited the held Sudachi lock"
+    assert result["freqs"]["all"] == Counter(tokenize_texts(texts))
+
+
+def test_map_morphemes_from_concurrent_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    def surfaces(morphemes):
+        return [m.surface() for m in morphemes]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(
+            executor.map(lambda _: map_morphemes(["映画を見た", ""], surfaces), range(8))
+        )
+    assert all(result == [["映画", "を", "見", "た"], []] for result in results)